@@ -0,0 +1,366 @@
+"""
+Matrix-based career matching
+Careers are encoded once into sparse requirement matrices (skills, personality
+traits and subjects weighted by importance, plus a binary interest matrix), and
+student profiles into matching value/presence matrices, so scoring any number
+of students against the whole catalog is a few sparse matrix products.
+The build_career_index command compiles the catalog from the processed
+dataset files into one .npz that processes load at start without re-encoding.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the on-disk layout written by CareerCatalog.save changes
+INDEX_FORMAT = 1
+
+# Weights of the score components (a subject counts 0.3, interests 0.4 and high growth 0.2)
+SUBJECT_WEIGHT = 0.3
+INTEREST_WEIGHT = 0.4
+GROWTH_BONUS = 0.2
+
+# Clusters reported even when empty, in this order
+CAREER_CLUSTERS = ('technology', 'healthcare', 'education', 'business', 'science')
+
+# Only this many of the best matches are grouped into clusters
+CLUSTER_CANDIDATES = 50
+
+# Importance assumed for skills listed without one in imported datasets
+DEFAULT_SKILL_IMPORTANCE = 0.7
+
+DEFAULT_CAREERS = (
+    {
+        'id': 'software_engineer',
+        'skills': {'programming': 0.9, 'problem_solving': 0.8, 'mathematics': 0.7},
+        'personality': {'analytical': 0.8, 'detail_oriented': 0.7},
+        'subjects': ['mathematics', 'computer_science', 'physics'],
+        'interests': ['technology', 'problem_solving', 'innovation'],
+        'cluster': 'technology',
+        'education': 'bachelor_computer_science',
+        'growth_rate': 0.22,
+        'salary_range': [70000, 150000]
+    },
+    {
+        'id': 'data_scientist',
+        'skills': {'mathematics': 0.9, 'statistics': 0.9, 'programming': 0.8},
+        'personality': {'analytical': 0.9, 'curious': 0.8},
+        'subjects': ['mathematics', 'statistics', 'computer_science'],
+        'interests': ['research', 'analysis', 'mathematics'],
+        'cluster': 'technology',
+        'education': 'bachelor_mathematics_statistics',
+        'growth_rate': 0.31,
+        'salary_range': [95000, 180000]
+    },
+    {
+        'id': 'teacher',
+        'skills': {'communication': 0.9, 'patience': 0.8, 'empathy': 0.8},
+        'personality': {'nurturing': 0.9, 'organized': 0.7},
+        'subjects': ['education', 'psychology', 'communication'],
+        'interests': ['education', 'mentoring', 'communication'],
+        'cluster': 'education',
+        'education': 'bachelor_education',
+        'growth_rate': 0.05,
+        'salary_range': [40000, 70000]
+    },
+    {
+        'id': 'healthcare_worker',
+        'skills': {'empathy': 0.9, 'attention_to_detail': 0.8, 'physical_stamina': 0.7},
+        'personality': {'caring': 0.9, 'patient': 0.8},
+        'subjects': ['biology', 'chemistry', 'health_science'],
+        'interests': ['helping_others', 'health', 'medical_science'],
+        'cluster': 'healthcare',
+        'education': 'healthcare_certification',
+        'growth_rate': 0.15,
+        'salary_range': [45000, 120000]
+    },
+    {
+        'id': 'business_analyst',
+        'skills': {'analytical_thinking': 0.9, 'communication': 0.8, 'problem_solving': 0.8},
+        'personality': {'logical': 0.8, 'detail_oriented': 0.7},
+        'subjects': ['mathematics', 'business_studies', 'economics'],
+        'interests': ['business', 'analysis', 'strategy'],
+        'cluster': 'business',
+        'education': 'bachelor_business',
+        'growth_rate': 0.11,
+        'salary_range': [60000, 110000]
+    },
+)
+
+
+def slugify(value) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', str(value).strip().lower()).strip('_')
+
+
+def _names(value) -> List[str]:
+    """Names from a list or a comma/semicolon separated string"""
+    if isinstance(value, str):
+        value = re.split(r'[,;|]', value)
+    return [slugify(item) for item in value or [] if slugify(item)]
+
+
+def _weighted(value) -> Dict[str, float]:
+    if isinstance(value, dict):
+        return {slugify(name): float(weight) for name, weight in value.items()}
+    return dict.fromkeys(_names(value), DEFAULT_SKILL_IMPORTANCE)
+
+
+def career_records_from_mapping(career_mapping: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Career records from the output of create_career_mapping_from_data (its career_fields list)"""
+    records = {}
+    for field in career_mapping.get('career_fields', []):
+        title = field.get('title') or field.get('job') or field.get('career')
+        career_id = slugify(title or '')
+        if not career_id or career_id in records:
+            continue
+        records[career_id] = {
+            'id': career_id,
+            'title': str(title),
+            'skills': _weighted(field.get('skills')),
+            'personality': _weighted(field.get('personality')),
+            'subjects': _names(field.get('subjects')),
+            'interests': _names(field.get('interests')),
+            'cluster': slugify(field.get('cluster') or field.get('sector') or field.get('industry') or 'other'),
+            'education': field.get('education', ''),
+            'growth_rate': float(field.get('growth_rate') or 0),
+            'salary_range': field.get('salary_range') or [],
+        }
+    return list(records.values())
+
+
+def college_records_from_database(college_database: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """College records from the output of create_college_database, keyed by a slug of their name"""
+    records = {}
+    for college in college_database.get('colleges', []):
+        name = college.get('college') or college.get('university') or college.get('institute') or college.get('name')
+        college_id = slugify(name or '')
+        if college_id and college_id not in records:
+            records[college_id] = {'id': college_id, **{str(key): value for key, value in college.items()}}
+    return list(records.values())
+
+
+class CareerCatalog:
+    """Careers encoded as sparse requirement matrices over a shared feature vocabulary"""
+
+    def __init__(self, records: Sequence[Dict[str, Any]], features: Sequence[str], requirements,
+                 interests: Sequence[str], interest_matrix, colleges: Sequence[Dict[str, Any]] = ()):
+        self.records = tuple(records)
+        self.ids = tuple(record['id'] for record in self.records)
+        self.index = {career_id: row for row, career_id in enumerate(self.ids)}
+        self.id_array = np.array(self.ids, dtype=object)
+        self.clusters = np.array([record.get('cluster', 'other') for record in self.records], dtype=object)
+        self.colleges = tuple(colleges)
+
+        # Skills, traits and subjects share one vocabulary, namespaced so a skill and a trait never collide
+        self.features = {feature: col for col, feature in enumerate(features)}
+        self.requirements = requirements.tocsr()
+        self.interests = {interest: col for col, interest in enumerate(interests)}
+        self.interest_matrix = interest_matrix.tocsr()
+
+        interest_counts = np.asarray(self.interest_matrix.sum(axis=1)).ravel()
+        self.inverse_interest_counts = np.divide(
+            1.0, interest_counts, out=np.zeros_like(interest_counts), where=interest_counts > 0
+        )
+
+        # Lookup indexes: the column-major matrices list the careers needing each feature
+        self._requirement_columns = self.requirements.tocsc()
+        self._interest_columns = self.interest_matrix.tocsc()
+        cluster_names, cluster_codes = np.unique(self.clusters.astype(str), return_inverse=True) if len(self) else ([], [])
+        self._cluster_rows = {name: np.flatnonzero(cluster_codes == code) for code, name in enumerate(cluster_names)}
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]], colleges: Sequence[Dict[str, Any]] = ()):
+        """Encode career records (see DEFAULT_CAREERS for the layout)"""
+        features: Dict[str, int] = {}
+        rows, cols, weights = [], [], []
+        for row, record in enumerate(records):
+            requirements = [(f'skill:{name}', weight) for name, weight in record.get('skills', {}).items()]
+            requirements += [(f'trait:{name}', weight) for name, weight in record.get('personality', {}).items()]
+            requirements += [(f'subject:{name}', SUBJECT_WEIGHT) for name in dict.fromkeys(record.get('subjects', []))]
+            for feature, weight in requirements:
+                rows.append(row)
+                cols.append(features.setdefault(feature, len(features)))
+                weights.append(weight)
+        requirements = sparse.csr_matrix((weights, (rows, cols)), shape=(len(records), len(features)), dtype=float)
+
+        interests: Dict[str, int] = {}
+        rows, cols = [], []
+        for row, record in enumerate(records):
+            for interest in set(record.get('interests', [])):
+                rows.append(row)
+                cols.append(interests.setdefault(interest, len(interests)))
+        interest_matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(records), len(interests)))
+
+        return cls(records, list(features), requirements, list(interests), interest_matrix, colleges)
+
+    def save(self, path: str) -> str:
+        """Write the encoded catalog as one uncompressed .npz, atomically"""
+        metadata = {
+            'format': INDEX_FORMAT,
+            'features': list(self.features),
+            'interests': list(self.interests),
+            'records': list(self.records),
+            'colleges': list(self.colleges),
+        }
+        arrays = {'metadata': np.frombuffer(json.dumps(metadata, separators=(',', ':')).encode('utf-8'), dtype=np.uint8)}
+        for name, matrix in (('requirements', self.requirements), ('interest_matrix', self.interest_matrix)):
+            arrays[f'{name}_data'] = matrix.data
+            arrays[f'{name}_indices'] = matrix.indices
+            arrays[f'{name}_indptr'] = matrix.indptr
+            arrays[f'{name}_shape'] = np.array(matrix.shape)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path: str):
+        """Load a catalog written by save(); no re-encoding happens"""
+        with np.load(path, allow_pickle=False) as arrays:
+            metadata = json.loads(arrays['metadata'].tobytes().decode('utf-8'))
+            if metadata.get('format') != INDEX_FORMAT:
+                raise ValueError(f"Unsupported career index format in {path}")
+            matrices = {
+                name: sparse.csr_matrix(
+                    (arrays[f'{name}_data'], arrays[f'{name}_indices'], arrays[f'{name}_indptr']),
+                    shape=tuple(arrays[f'{name}_shape'])
+                )
+                for name in ('requirements', 'interest_matrix')
+            }
+        return cls(
+            metadata['records'], metadata['features'], matrices['requirements'],
+            metadata['interests'], matrices['interest_matrix'], metadata['colleges']
+        )
+
+    def _rows_with(self, columns, lookup: Dict[str, int], key: str) -> List[str]:
+        col = lookup.get(key)
+        if col is None:
+            return []
+        rows = columns.indices[columns.indptr[col]:columns.indptr[col + 1]]
+        return [self.ids[row] for row in np.sort(rows)]
+
+    def careers_with_skill(self, skill: str) -> List[str]:
+        return self._rows_with(self._requirement_columns, self.features, f'skill:{skill}')
+
+    def careers_for_subject(self, subject: str) -> List[str]:
+        return self._rows_with(self._requirement_columns, self.features, f'subject:{subject}')
+
+    def careers_with_interest(self, interest: str) -> List[str]:
+        return self._rows_with(self._interest_columns, self.interests, interest)
+
+    def careers_in_cluster(self, cluster: str) -> List[str]:
+        return [self.ids[row] for row in self._cluster_rows.get(cluster, ())]
+
+    def __len__(self):
+        return len(self.records)
+
+    def career(self, career_id: str) -> Dict[str, Any]:
+        return self.records[self.index[career_id]]
+
+    def growth_bonus(self, high_growth_sectors: Iterable[str]) -> np.ndarray:
+        """GROWTH_BONUS for careers named in the high growth sectors, else 0"""
+        return np.where(np.isin(self.id_array, list(high_growth_sectors)), GROWTH_BONUS, 0.0)
+
+    def encode_profiles(self, profiles: Sequence[Dict[str, Any]]):
+        """Value, presence and interest matrices for student profiles; unknown features are dropped"""
+        value_rows, value_cols, values = [], [], []
+        interest_rows, interest_cols = [], []
+        for row, profile in enumerate(profiles):
+            entries = [(f'skill:{name}', value) for name, value in profile.get('skills', {}).items()]
+            entries += [(f'trait:{name}', value) for name, value in profile.get('personality', {}).items()]
+            entries += [(f'subject:{name}', score / 100) for name, score in profile.get('academic_scores', {}).items()]
+            for feature, value in entries:
+                col = self.features.get(feature)
+                if col is not None:
+                    value_rows.append(row)
+                    value_cols.append(col)
+                    values.append(value)
+            for interest in set(profile.get('interests', [])):
+                col = self.interests.get(interest)
+                if col is not None:
+                    interest_rows.append(row)
+                    interest_cols.append(col)
+
+        shape = (len(profiles), len(self.features))
+        value_matrix = sparse.csr_matrix((values, (value_rows, value_cols)), shape=shape, dtype=float)
+        presence = sparse.csr_matrix((np.ones(len(values)), (value_rows, value_cols)), shape=shape)
+        interests = sparse.csr_matrix(
+            (np.ones(len(interest_rows)), (interest_rows, interest_cols)), shape=(len(profiles), len(self.interests))
+        )
+        return value_matrix, presence, interests
+
+    def score(self, profiles: Sequence[Dict[str, Any]], bonus: Optional[np.ndarray] = None) -> np.ndarray:
+        """Match score of every profile (rows) against every career (columns)
+
+        Each score is the importance-weighted mean of the student's values over the
+        requirements the student has data for, plus the interest overlap and growth bonus
+        """
+        values, presence, interests = self.encode_profiles(profiles)
+        bonus = np.zeros(len(self)) if bonus is None else bonus
+
+        requirements_t = self.requirements.T.tocsc()
+        matched = np.asarray((values @ requirements_t).todense())
+        weight = np.asarray((presence @ requirements_t).todense())
+        overlap = np.asarray((interests @ self.interest_matrix.T).todense()) * self.inverse_interest_counts
+
+        return (matched + INTEREST_WEIGHT * overlap + bonus) / (weight + INTEREST_WEIGHT + bonus)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indexes of the k best scores per row, best first (ties keep catalog order)"""
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        # Stable ordering among the candidates, by score then catalog position
+        candidates.sort(axis=1)
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_career_catalog() -> CareerCatalog:
+    """Process-wide career catalog, loaded from the built index (see build_career_index) when present"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                path = getattr(settings, 'CAREER_INDEX_PATH', None)
+                catalog = None
+                if path and os.path.exists(path):
+                    try:
+                        catalog = CareerCatalog.load(path)
+                    except Exception as e:
+                        logger.warning(f"Could not load career index {path}: {e}")
+                _catalog = catalog or CareerCatalog.from_records(DEFAULT_CAREERS)
+    return _catalog
+
+
+def reset_career_catalog() -> None:
+    """Drop the catalog so the next call reloads the index"""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
@@ -19,6 +19,7 @@ from .forms import GuestAssessmentForm, CareerMappingForm, AIAnalysisForm
 from .models import Assessment, AssessmentResult
 from .ml_service import MLAssessmentService
 from .psychometric_service import PsychometricTestService
+from dashboard.result_store import get_result, put_result, result_key
 
 
 def guest_assessment_landing(request):
@@ -59,8 +60,8 @@ def guest_assessment_form(request):
                 'status': 'form_completed'
             }
             
-            # Store in session
-            request.session['guest_assessment'] = guest_data
+            # Store server-side; the session keeps only the session id
+            save_guest_data(request, guest_data)
             
             messages.success(request, 'Assessment form submitted successfully!')
             return redirect('guest_assessment_upload', session_id=session_id)
@@ -76,8 +77,8 @@ def guest_assessment_form(request):
 
 def guest_assessment_upload(request, session_id):
     """Document upload for guest assessment."""
-    guest_data = request.session.get('guest_assessment')
-    if not guest_data or guest_data.get('session_id') != session_id:
+    guest_data = load_guest_data(request, session_id)
+    if not guest_data:
         messages.error(request, 'Invalid session. Please start over.')
         return redirect('guest_assessment_landing')
     
@@ -100,7 +101,7 @@ def guest_assessment_upload(request, session_id):
             # Update guest data
             guest_data['uploaded_files'] = uploaded_files
             guest_data['status'] = 'files_uploaded'
-            request.session['guest_assessment'] = guest_data
+            save_guest_data(request, guest_data)
             
             messages.success(request, f'{len(uploaded_files)} files uploaded successfully!')
             return redirect('guest_assessment_workflow', session_id=session_id)
@@ -117,8 +118,8 @@ def guest_assessment_upload(request, session_id):
 
 def guest_assessment_workflow(request, session_id):
     """Guest assessment workflow processing."""
-    guest_data = request.session.get('guest_assessment')
-    if not guest_data or guest_data.get('session_id') != session_id:
+    guest_data = load_guest_data(request, session_id)
+    if not guest_data:
         messages.error(request, 'Invalid session. Please start over.')
         return redirect('guest_assessment_landing')
     
@@ -151,7 +152,7 @@ def guest_assessment_workflow(request, session_id):
             # Update guest data
             guest_data['assessment_data'] = assessment_data
             guest_data['status'] = 'processing'
-            request.session['guest_assessment'] = guest_data
+            save_guest_data(request, guest_data)
             
             # Start AI processing
             results = process_guest_assessment(assessment_data, ml_service, psychometric_service)
@@ -160,7 +161,7 @@ def guest_assessment_workflow(request, session_id):
             guest_data['results'] = results
             guest_data['status'] = 'completed'
             guest_data['completed_at'] = timezone.now().isoformat()
-            request.session['guest_assessment'] = guest_data
+            save_guest_data(request, guest_data)
             
             messages.success(request, 'Assessment completed successfully!')
             return redirect('guest_assessment_results', session_id=session_id)
@@ -180,8 +181,8 @@ def guest_assessment_workflow(request, session_id):
 
 def guest_assessment_results(request, session_id):
     """Display guest assessment results."""
-    guest_data = request.session.get('guest_assessment')
-    if not guest_data or guest_data.get('session_id') != session_id:
+    guest_data = load_guest_data(request, session_id)
+    if not guest_data:
         messages.error(request, 'Invalid session. Please start over.')
         return redirect('guest_assessment_landing')
     
@@ -202,8 +203,8 @@ def guest_assessment_results(request, session_id):
 
 def guest_career_mapping(request, session_id):
     """Career mapping for guest assessment."""
-    guest_data = request.session.get('guest_assessment')
-    if not guest_data or guest_data.get('session_id') != session_id:
+    guest_data = load_guest_data(request, session_id)
+    if not guest_data:
         messages.error(request, 'Invalid session. Please start over.')
         return redirect('guest_assessment_landing')
     
@@ -229,7 +230,7 @@ def guest_career_mapping(request, session_id):
             # Update guest data
             guest_data['career_mapping'] = career_data
             guest_data['career_recommendations'] = career_recommendations
-            request.session['guest_assessment'] = guest_data
+            save_guest_data(request, guest_data)
             
             messages.success(request, 'Career mapping completed!')
             return redirect('guest_career_results', session_id=session_id)
@@ -247,8 +248,8 @@ def guest_career_mapping(request, session_id):
 
 def guest_career_results(request, session_id):
     """Display career mapping results."""
-    guest_data = request.session.get('guest_assessment')
-    if not guest_data or guest_data.get('session_id') != session_id:
+    guest_data = load_guest_data(request, session_id)
+    if not guest_data:
         messages.error(request, 'Invalid session. Please start over.')
         return redirect('guest_assessment_landing')
     
@@ -269,8 +270,8 @@ def guest_career_results(request, session_id):
 
 def guest_download_report(request, session_id):
     """Download guest assessment report."""
-    guest_data = request.session.get('guest_assessment')
-    if not guest_data or guest_data.get('session_id') != session_id:
+    guest_data = load_guest_data(request, session_id)
+    if not guest_data:
         messages.error(request, 'Invalid session.')
         return redirect('guest_assessment_landing')
     
@@ -318,6 +319,19 @@ def guest_assessment_api(request):
 
 # Helper functions
 
+def load_guest_data(request, session_id):
+    """Load the guest assessment referenced by this browser session, if it matches session_id."""
+    if request.session.get('guest_assessment_id') != session_id:
+        return None
+    return get_result(result_key('guest_assessment', session_id))
+
+
+def save_guest_data(request, guest_data):
+    """Store the guest assessment server-side and keep only its id in the session."""
+    put_result(result_key('guest_assessment', guest_data['session_id']), guest_data)
+    request.session['guest_assessment_id'] = guest_data['session_id']
+
+
 def process_guest_assessment(assessment_data, ml_service, psychometric_service):
     """Process guest assessment with AI services."""
     try:
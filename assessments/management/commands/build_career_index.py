@@ -0,0 +1,63 @@
+"""
+Compile career and college datasets into the indexed career catalog
+Defaults to the fixtures tracked in assessments/data, so the build is reproducible;
+point --career-mapping/--colleges at the full processed Kaggle files to index those.
+"""
+
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assessments.career_matching import (
+    DEFAULT_CAREERS, CareerCatalog, career_records_from_mapping, college_records_from_database,
+    reset_career_catalog
+)
+
+FIXTURE_DIR = Path(__file__).resolve().parents[2] / 'data'
+
+
+class Command(BaseCommand):
+    help = ('Build the career index loaded by the career recommendation engine from a career mapping '
+            'and a college database (default: the fixtures in assessments/data)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--career-mapping', default=str(FIXTURE_DIR / 'career-mapping.json'),
+                            help='e.g. data/processed/career-mapping-from-kaggle.json')
+        parser.add_argument('--colleges', default=str(FIXTURE_DIR / 'college-database.json'),
+                            help='e.g. data/processed/college-database.json')
+        parser.add_argument('--output', default=settings.CAREER_INDEX_PATH)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        # Built-in careers always come first; dataset careers extend them
+        careers = {record['id']: record for record in DEFAULT_CAREERS}
+        for record in career_records_from_mapping(self._read_json(options['career_mapping'])):
+            careers.setdefault(record['id'], record)
+        college_records = college_records_from_database(self._read_json(options['colleges']))
+
+        catalog = CareerCatalog.from_records(list(careers.values()), college_records)
+        path = catalog.save(options['output'])
+        reset_career_catalog()
+
+        load_started = time.perf_counter()
+        CareerCatalog.load(path)
+        load_ms = (time.perf_counter() - load_started) * 1000
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {path}: {len(catalog)} careers, {len(catalog.features)} requirement features, "
+            f"{len(catalog.interests)} interests, {len(college_records)} colleges "
+            f"in {time.perf_counter() - started:.2f}s (loads in {load_ms:.1f}ms)"
+        ))
+
+    def _read_json(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise CommandError(f"{path} not found")
+        except ValueError as e:
+            raise CommandError(f"Could not parse {path}: {e}")
@@ -17,8 +17,67 @@ from django.conf import settings
 import os
 import logging
 
+from .career_matching import CAREER_CLUSTERS, CLUSTER_CANDIDATES, get_career_catalog, top_k
+
 logger = logging.getLogger(__name__)
 
+ACADEMIC_FEATURES = (
+    # Academic history
+    'previous_gpa', 'attendance_rate', 'assignment_completion_rate', 'test_average', 'homework_average',
+    # Demographics
+    'age', 'gender', 'socioeconomic_index',
+    # Behaviour
+    'study_hours_per_week', 'extracurricular_participation', 'teacher_rating', 'peer_interaction_score',
+    # Learning style
+    'visual_learning_preference', 'auditory_learning_preference', 'kinesthetic_learning_preference',
+)
+
+BEHAVIORAL_FEATURES = (
+    # Behavioral indicators
+    'attention_span_score', 'impulse_control_score', 'social_interaction_score',
+    'emotional_regulation_score', 'motivation_level',
+    # Environmental factors
+    'family_support_score', 'peer_influence_score', 'teacher_relationship_score',
+    # Academic behavior
+    'participation_rate', 'homework_completion_rate', 'classroom_behavior_score',
+)
+
+# (indicator, flagged below, risk factor, risk weight)
+BEHAVIORAL_RISK_RULES = (
+    ('attention_span_score', 60, 'attention_difficulties', 0.2),
+    ('impulse_control_score', 60, 'impulse_control_issues', 0.2),
+    ('social_interaction_score', 60, 'social_difficulties', 0.15),
+    ('emotional_regulation_score', 60, 'emotional_regulation_challenges', 0.25),
+    ('motivation_level', 50, 'low_motivation', 0.2),
+)
+
+INTERVENTION_RECOMMENDATIONS = (
+    "Immediate academic intervention required",
+    "Consider one-on-one tutoring",
+    "Implement structured study schedule"
+)
+SUPPORT_RECOMMENDATIONS = (
+    "Additional academic support recommended",
+    "Join study groups",
+    "Meet with academic advisor"
+)
+
+
+def _column(students, name, default):
+    """One field for every student (list of dicts or DataFrame) as a float array, default where missing"""
+    if isinstance(students, pd.DataFrame):
+        if name not in students.columns:
+            return np.full(len(students), default, dtype=float)
+        return students[name].fillna(default).to_numpy(dtype=float)
+    return np.fromiter((student.get(name, default) for student in students), dtype=float, count=len(students))
+
+
+def _gender_column(students):
+    if isinstance(students, pd.DataFrame):
+        genders = students['gender'] if 'gender' in students.columns else pd.Series([None] * len(students))
+        return (genders == 'M').to_numpy(dtype=float)
+    return np.fromiter((student.get('gender') == 'M' for student in students), dtype=float, count=len(students))
+
 
 class AcademicPerformancePredictor:
     """Predicts academic performance based on historical data and current metrics"""
@@ -35,55 +94,22 @@ class AcademicPerformancePredictor:
         
     def prepare_features(self, student_data):
         """Prepare features for academic prediction"""
-        features = []
-        
-        # Academic history features
-        features.extend([
-            student_data.get('previous_gpa', 0),
-            student_data.get('attendance_rate', 0),
-            student_data.get('assignment_completion_rate', 0),
-            student_data.get('test_average', 0),
-            student_data.get('homework_average', 0)
-        ])
-        
-        # Demographic features
-        features.extend([
-            student_data.get('age', 0),
-            1 if student_data.get('gender') == 'M' else 0,
-            student_data.get('socioeconomic_index', 0)
-        ])
-        
-        # Behavioral features
-        features.extend([
-            student_data.get('study_hours_per_week', 0),
-            student_data.get('extracurricular_participation', 0),
-            student_data.get('teacher_rating', 0),
-            student_data.get('peer_interaction_score', 0)
-        ])
-        
-        # Learning style features
-        features.extend([
-            student_data.get('visual_learning_preference', 0),
-            student_data.get('auditory_learning_preference', 0),
-            student_data.get('kinesthetic_learning_preference', 0)
-        ])
-        
-        return np.array(features).reshape(1, -1)
+        return self.prepare_feature_matrix([student_data])
+    
+    def prepare_feature_matrix(self, students):
+        """Feature matrix (one row per student) from a list of student dicts or a DataFrame, built column-wise"""
+        columns = [
+            (_gender_column(students) if feature == 'gender' else _column(students, feature, 0))
+            for feature in ACADEMIC_FEATURES
+        ]
+        return np.column_stack(columns) if columns[0].size else np.empty((0, len(ACADEMIC_FEATURES)))
     
     def train(self, training_data):
         """Train the academic performance prediction model"""
         try:
             # Prepare training data
-            X = []
-            y = []
-            
-            for record in training_data:
-                features = self.prepare_features(record)
-                X.append(features.flatten())
-                y.append(record.get('target_gpa', 0))
-            
-            X = np.array(X)
-            y = np.array(y)
+            X = self.prepare_feature_matrix(training_data)
+            y = _column(training_data, 'target_gpa', 0)
             
             # Scale features
             X_scaled = self.scaler.fit_transform(X)
@@ -93,17 +119,8 @@ class AcademicPerformancePredictor:
             self.is_trained = True
             
             # Calculate feature importance
-            feature_names = [
-                'previous_gpa', 'attendance_rate', 'assignment_completion_rate',
-                'test_average', 'homework_average', 'age', 'gender',
-                'socioeconomic_index', 'study_hours_per_week',
-                'extracurricular_participation', 'teacher_rating',
-                'peer_interaction_score', 'visual_learning_preference',
-                'auditory_learning_preference', 'kinesthetic_learning_preference'
-            ]
-            
             self.feature_importance = dict(zip(
-                feature_names, 
+                ACADEMIC_FEATURES, 
                 self.model.feature_importances_
             ))
             
@@ -116,24 +133,36 @@ class AcademicPerformancePredictor:
     
     def predict(self, student_data):
         """Predict academic performance for a student"""
+        results = self.predict_batch([student_data])
+        return results[0] if results else None
+    
+    def predict_batch(self, students):
+        """Predict academic performance for many students (list of dicts or DataFrame) with one model call"""
         if not self.is_trained:
             return None
             
         try:
-            features = self.prepare_features(student_data)
-            features_scaled = self.scaler.transform(features)
-            
-            prediction = self.model.predict(features_scaled)[0]
+            features_scaled = self.scaler.transform(self.prepare_feature_matrix(students))
+            predictions = self.model.predict(features_scaled)
             
             # Calculate confidence based on model certainty
-            confidence = min(0.95, max(0.5, 1.0 - (abs(prediction - student_data.get('previous_gpa', prediction)) / 4.0)))
+            previous_gpa = _column(students, 'previous_gpa', np.nan)
+            previous_gpa = np.where(np.isnan(previous_gpa), predictions, previous_gpa)
+            confidences = np.minimum(0.95, np.maximum(0.5, 1.0 - np.abs(predictions - previous_gpa) / 4.0))
+            
+            risk_levels = np.select([predictions >= 3.5, predictions >= 2.5], ['low', 'moderate'], default='high')
+            recommendations = self._generate_academic_recommendations_batch(students, predictions)
             
-            return {
-                'predicted_gpa': round(prediction, 2),
-                'confidence': round(confidence, 3),
-                'risk_level': self._assess_risk_level(prediction),
-                'recommendations': self._generate_academic_recommendations(student_data, prediction)
-            }
+            return [
+                {
+                    'predicted_gpa': round(float(prediction), 2),
+                    'confidence': round(float(confidence), 3),
+                    'risk_level': str(risk_level),
+                    'recommendations': student_recommendations
+                }
+                for prediction, confidence, risk_level, student_recommendations
+                in zip(predictions, confidences, risk_levels, recommendations)
+            ]
             
         except Exception as e:
             logger.error(f"Error making academic prediction: {e}")
@@ -153,17 +182,9 @@ class AcademicPerformancePredictor:
         recommendations = []
         
         if predicted_gpa < 2.5:
-            recommendations.extend([
-                "Immediate academic intervention required",
-                "Consider one-on-one tutoring",
-                "Implement structured study schedule"
-            ])
+            recommendations.extend(INTERVENTION_RECOMMENDATIONS)
         elif predicted_gpa < 3.0:
-            recommendations.extend([
-                "Additional academic support recommended",
-                "Join study groups",
-                "Meet with academic advisor"
-            ])
+            recommendations.extend(SUPPORT_RECOMMENDATIONS)
         
         if student_data.get('attendance_rate', 100) < 85:
             recommendations.append("Improve attendance rate")
@@ -172,6 +193,26 @@ class AcademicPerformancePredictor:
             recommendations.append("Increase dedicated study time")
             
         return recommendations
+    
+    def _generate_academic_recommendations_batch(self, students, predictions):
+        """_generate_academic_recommendations for every student, with the conditions evaluated column-wise"""
+        low_attendance = _column(students, 'attendance_rate', 100) < 85
+        low_study_time = _column(students, 'study_hours_per_week', 10) < 5
+        
+        recommendations = []
+        for predicted_gpa, attendance_flag, study_flag in zip(predictions, low_attendance, low_study_time):
+            if predicted_gpa < 2.5:
+                student_recommendations = list(INTERVENTION_RECOMMENDATIONS)
+            elif predicted_gpa < 3.0:
+                student_recommendations = list(SUPPORT_RECOMMENDATIONS)
+            else:
+                student_recommendations = []
+            if attendance_flag:
+                student_recommendations.append("Improve attendance rate")
+            if study_flag:
+                student_recommendations.append("Increase dedicated study time")
+            recommendations.append(student_recommendations)
+        return recommendations
 
 
 class BehavioralPatternAnalyzer:
@@ -189,81 +230,71 @@ class BehavioralPatternAnalyzer:
         
     def prepare_features(self, behavioral_data):
         """Prepare features for behavioral analysis"""
-        features = []
-        
-        # Behavioral indicators
-        features.extend([
-            behavioral_data.get('attention_span_score', 0),
-            behavioral_data.get('impulse_control_score', 0),
-            behavioral_data.get('social_interaction_score', 0),
-            behavioral_data.get('emotional_regulation_score', 0),
-            behavioral_data.get('motivation_level', 0)
-        ])
-        
-        # Environmental factors
-        features.extend([
-            behavioral_data.get('family_support_score', 0),
-            behavioral_data.get('peer_influence_score', 0),
-            behavioral_data.get('teacher_relationship_score', 0)
-        ])
-        
-        # Academic behavior
-        features.extend([
-            behavioral_data.get('participation_rate', 0),
-            behavioral_data.get('homework_completion_rate', 0),
-            behavioral_data.get('classroom_behavior_score', 0)
-        ])
-        
-        return np.array(features).reshape(1, -1)
+        return self.prepare_feature_matrix([behavioral_data])
+    
+    def prepare_feature_matrix(self, students):
+        """Feature matrix (one row per student) from a list of behavioral dicts or a DataFrame, built column-wise"""
+        columns = [_column(students, feature, 0) for feature in BEHAVIORAL_FEATURES]
+        return np.column_stack(columns) if columns[0].size else np.empty((0, len(BEHAVIORAL_FEATURES)))
     
     def analyze_behavior(self, behavioral_data):
         """Analyze behavioral patterns and provide insights"""
+        results = self.analyze_behavior_batch([behavioral_data])
+        return results[0] if results else None
+    
+    def analyze_behavior_batch(self, students):
+        """Analyze many students' behavioral data (list of dicts or DataFrame) column by column"""
         try:
-            # Calculate behavioral risk score
-            risk_factors = []
-            risk_score = 0
-            
-            # Check individual behavioral indicators
-            if behavioral_data.get('attention_span_score', 100) < 60:
-                risk_factors.append('attention_difficulties')
-                risk_score += 0.2
-                
-            if behavioral_data.get('impulse_control_score', 100) < 60:
-                risk_factors.append('impulse_control_issues')
-                risk_score += 0.2
-                
-            if behavioral_data.get('social_interaction_score', 100) < 60:
-                risk_factors.append('social_difficulties')
-                risk_score += 0.15
-                
-            if behavioral_data.get('emotional_regulation_score', 100) < 60:
-                risk_factors.append('emotional_regulation_challenges')
-                risk_score += 0.25
-                
-            if behavioral_data.get('motivation_level', 100) < 50:
-                risk_factors.append('low_motivation')
-                risk_score += 0.2
+            # Calculate behavioral risk score; indicators are checked in the same order as they are summed
+            n = len(students)
+            risk_scores = np.zeros(n)
+            flags = []
+            for indicator, threshold, factor, weight in BEHAVIORAL_RISK_RULES:
+                flagged = _column(students, indicator, 100) < threshold
+                risk_scores = risk_scores + np.where(flagged, weight, 0)
+                flags.append((factor, flagged))
             
             # Determine intervention level
-            if risk_score >= 0.6:
-                intervention_level = 'intensive'
-            elif risk_score >= 0.3:
-                intervention_level = 'moderate'
-            else:
-                intervention_level = 'minimal'
+            intervention_levels = np.select(
+                [risk_scores >= 0.6, risk_scores >= 0.3], ['intensive', 'moderate'], default='minimal'
+            )
+            profiles = self._create_behavioral_profiles(students)
             
-            return {
-                'risk_factors': risk_factors,
-                'risk_score': round(risk_score, 3),
-                'intervention_level': intervention_level,
-                'behavioral_profile': self._create_behavioral_profile(behavioral_data),
-                'interventions': self._recommend_interventions(risk_factors, intervention_level)
-            }
+            results = []
+            for row in range(n):
+                risk_factors = [factor for factor, flagged in flags if flagged[row]]
+                intervention_level = str(intervention_levels[row])
+                results.append({
+                    'risk_factors': risk_factors,
+                    'risk_score': round(float(risk_scores[row]), 3),
+                    'intervention_level': intervention_level,
+                    'behavioral_profile': profiles[row],
+                    'interventions': self._recommend_interventions(risk_factors, intervention_level)
+                })
+            return results
             
         except Exception as e:
             logger.error(f"Error analyzing behavior: {e}")
             return None
     
+    def _create_behavioral_profiles(self, students):
+        """_create_behavioral_profile for every student; DataFrame score columns are levelled column-wise"""
+        if not isinstance(students, pd.DataFrame):
+            return [self._create_behavioral_profile(student) for student in students]
+        
+        profiles = [{} for _ in range(len(students))]
+        for key in students.columns:
+            if 'score' not in key:
+                continue
+            values = students[key].to_numpy(dtype=float)
+            levels = np.select(
+                [values >= 80, values >= 70, values >= 60], ['excellent', 'good', 'fair'], default='needs_improvement'
+            )
+            for profile, value, level in zip(profiles, values, levels):
+                if not np.isnan(value):
+                    profile[key] = {'score': value.item(), 'level': str(level)}
+        return profiles
+    
     def _create_behavioral_profile(self, behavioral_data):
         """Create comprehensive behavioral profile"""
         profile = {}
@@ -338,50 +369,11 @@ class BehavioralPatternAnalyzer:
 class CareerRecommendationEngine:
     """Recommends careers based on student profile and market trends"""
     
-    def __init__(self):
-        self.career_database = self._load_career_database()
+    def __init__(self, catalog=None):
+        self.catalog = catalog or get_career_catalog()
         self.market_trends = self._load_market_trends()
+        self.growth_bonus = self.catalog.growth_bonus(self.market_trends['high_growth_sectors'])
         
-    def _load_career_database(self):
-        """Load comprehensive career database"""
-        return {
-            'software_engineer': {
-                'skills': {'programming': 0.9, 'problem_solving': 0.8, 'mathematics': 0.7},
-                'personality': {'analytical': 0.8, 'detail_oriented': 0.7},
-                'education': 'bachelor_computer_science',
-                'growth_rate': 0.22,
-                'salary_range': [70000, 150000]
-            },
-            'data_scientist': {
-                'skills': {'mathematics': 0.9, 'statistics': 0.9, 'programming': 0.8},
-                'personality': {'analytical': 0.9, 'curious': 0.8},
-                'education': 'bachelor_mathematics_statistics',
-                'growth_rate': 0.31,
-                'salary_range': [95000, 180000]
-            },
-            'teacher': {
-                'skills': {'communication': 0.9, 'patience': 0.8, 'empathy': 0.8},
-                'personality': {'nurturing': 0.9, 'organized': 0.7},
-                'education': 'bachelor_education',
-                'growth_rate': 0.05,
-                'salary_range': [40000, 70000]
-            },
-            'healthcare_worker': {
-                'skills': {'empathy': 0.9, 'attention_to_detail': 0.8, 'physical_stamina': 0.7},
-                'personality': {'caring': 0.9, 'patient': 0.8},
-                'education': 'healthcare_certification',
-                'growth_rate': 0.15,
-                'salary_range': [45000, 120000]
-            },
-            'business_analyst': {
-                'skills': {'analytical_thinking': 0.9, 'communication': 0.8, 'problem_solving': 0.8},
-                'personality': {'logical': 0.8, 'detail_oriented': 0.7},
-                'education': 'bachelor_business',
-                'growth_rate': 0.11,
-                'salary_range': [60000, 110000]
-            }
-        }
-    
     def _load_market_trends(self):
         """Load current job market trends"""
         return {
@@ -401,120 +393,58 @@ class CareerRecommendationEngine:
     
     def recommend_careers(self, student_profile):
         """Recommend careers based on comprehensive student profile"""
+        results = self.recommend_careers_batch([student_profile])
+        return results[0] if results else None
+    
+    def recommend_careers_batch(self, student_profiles, top_n=5):
+        """Recommend careers for many students, scoring them against the catalog in one pass"""
         try:
-            career_scores = {}
-            
-            # Extract student characteristics
-            student_skills = student_profile.get('skills', {})
-            student_personality = student_profile.get('personality', {})
-            academic_scores = student_profile.get('academic_scores', {})
-            interests = student_profile.get('interests', [])
-            
-            # Calculate match scores for each career
-            for career, requirements in self.career_database.items():
-                score = 0
-                factors = 0
-                
-                # Skills matching
-                for skill, importance in requirements['skills'].items():
-                    if skill in student_skills:
-                        score += student_skills[skill] * importance
-                        factors += importance
-                
-                # Personality matching
-                for trait, importance in requirements['personality'].items():
-                    if trait in student_personality:
-                        score += student_personality[trait] * importance
-                        factors += importance
-                
-                # Academic alignment
-                relevant_subjects = self._get_relevant_subjects(career)
-                for subject in relevant_subjects:
-                    if subject in academic_scores:
-                        score += (academic_scores[subject] / 100) * 0.3
-                        factors += 0.3
-                
-                # Interest alignment
-                career_interests = self._get_career_interests(career)
-                interest_match = len(set(interests) & set(career_interests)) / len(career_interests) if career_interests else 0
-                score += interest_match * 0.4
-                factors += 0.4
-                
-                # Market trend bonus
-                if career in self.market_trends['high_growth_sectors']:
-                    score += 0.2
-                    factors += 0.2
-                
-                # Calculate final score
-                final_score = score / factors if factors > 0 else 0
-                career_scores[career] = {
-                    'match_score': round(final_score, 3),
-                    'growth_rate': requirements['growth_rate'],
-                    'salary_range': requirements['salary_range'],
-                    'education_required': requirements['education']
-                }
-            
-            # Sort by match score
-            sorted_careers = sorted(
-                career_scores.items(), 
-                key=lambda x: x[1]['match_score'], 
-                reverse=True
-            )
+            scores = self.catalog.score(student_profiles, self.growth_bonus)
+            # Careers are ranked at the precision their scores are reported with
+            ranked = top_k(np.round(scores, 3), max(top_n, CLUSTER_CANDIDATES))
             
-            return {
-                'top_recommendations': sorted_careers[:5],
-                'career_clusters': self._group_by_clusters(sorted_careers),
-                'development_areas': self._identify_development_areas(student_profile, sorted_careers[:3])
-            }
+            results = []
+            for profile, row_scores, row_ranked in zip(student_profiles, scores, ranked):
+                sorted_careers = [
+                    (self.catalog.ids[index], self._career_summary(index, row_scores[index]))
+                    for index in row_ranked
+                ]
+                results.append({
+                    'top_recommendations': sorted_careers[:top_n],
+                    'career_clusters': self._group_by_clusters(sorted_careers),
+                    'development_areas': self._identify_development_areas(profile, sorted_careers[:3])
+                })
+            return results
             
         except Exception as e:
             logger.error(f"Error recommending careers: {e}")
             return None
     
+    def _career_summary(self, index, score):
+        career = self.catalog.records[index]
+        return {
+            'match_score': round(float(score), 3),
+            'growth_rate': career['growth_rate'],
+            'salary_range': career['salary_range'],
+            'education_required': career['education']
+        }
+    
     def _get_relevant_subjects(self, career):
         """Get relevant academic subjects for a career"""
-        subject_mapping = {
-            'software_engineer': ['mathematics', 'computer_science', 'physics'],
-            'data_scientist': ['mathematics', 'statistics', 'computer_science'],
-            'teacher': ['education', 'psychology', 'communication'],
-            'healthcare_worker': ['biology', 'chemistry', 'health_science'],
-            'business_analyst': ['mathematics', 'business_studies', 'economics']
-        }
-        return subject_mapping.get(career, [])
+        return list(self.catalog.career(career).get('subjects', [])) if career in self.catalog.index else []
     
     def _get_career_interests(self, career):
         """Get interests associated with a career"""
-        interest_mapping = {
-            'software_engineer': ['technology', 'problem_solving', 'innovation'],
-            'data_scientist': ['research', 'analysis', 'mathematics'],
-            'teacher': ['education', 'mentoring', 'communication'],
-            'healthcare_worker': ['helping_others', 'health', 'medical_science'],
-            'business_analyst': ['business', 'analysis', 'strategy']
-        }
-        return interest_mapping.get(career, [])
+        return list(self.catalog.career(career).get('interests', [])) if career in self.catalog.index else []
     
     def _group_by_clusters(self, sorted_careers):
         """Group careers by industry clusters"""
-        clusters = {
-            'technology': [],
-            'healthcare': [],
-            'education': [],
-            'business': [],
-            'science': []
-        }
-        
-        cluster_mapping = {
-            'software_engineer': 'technology',
-            'data_scientist': 'technology',
-            'teacher': 'education',
-            'healthcare_worker': 'healthcare',
-            'business_analyst': 'business'
-        }
+        clusters = {cluster: [] for cluster in CAREER_CLUSTERS}
         
         for career, data in sorted_careers:
-            cluster = cluster_mapping.get(career, 'other')
-            if cluster in clusters:
-                clusters[cluster].append((career, data))
+            cluster = self.catalog.clusters[self.catalog.index[career]]
+            if cluster != 'other':
+                clusters.setdefault(cluster, []).append((career, data))
                 
         return clusters
     
@@ -526,7 +456,7 @@ class CareerRecommendationEngine:
         student_skills = student_profile.get('skills', {})
         
         for career, data in top_careers:
-            career_requirements = self.career_database[career]['skills']
+            career_requirements = self.catalog.career(career)['skills']
             for skill, importance in career_requirements.items():
                 current_level = student_skills.get(skill, 0)
                 if current_level < 0.7 and importance > 0.6:  # Significant gap
@@ -550,35 +480,50 @@ class MLAssessmentService:
         
     def comprehensive_assessment(self, student_data):
         """Perform comprehensive ML-based assessment"""
+        return self.comprehensive_assessment_batch([student_data])[0]
+    
+    def comprehensive_assessment_batch(self, students):
+        """Comprehensive assessment of a whole class; each component runs once over all students"""
         try:
-            results = {
-                'timestamp': datetime.now().isoformat(),
-                'student_id': student_data.get('student_id'),
-                'assessment_type': 'comprehensive_ml'
-            }
-            
-            # Academic performance prediction
-            if 'academic_data' in student_data:
-                academic_results = self.academic_predictor.predict(student_data['academic_data'])
-                results['academic_prediction'] = academic_results
-            
-            # Behavioral analysis
-            if 'behavioral_data' in student_data:
-                behavioral_results = self.behavioral_analyzer.analyze_behavior(student_data['behavioral_data'])
-                results['behavioral_analysis'] = behavioral_results
-            
-            # Career recommendations
-            career_results = self.career_engine.recommend_careers(student_data)
-            results['career_recommendations'] = career_results
-            
-            # Overall risk assessment
-            results['overall_assessment'] = self._calculate_overall_assessment(results)
-            
-            return results
-            
+            academic = self._batch_component(students, 'academic_data', self.academic_predictor.predict_batch)
+            behavioral = self._batch_component(students, 'behavioral_data', self.behavioral_analyzer.analyze_behavior_batch)
+            careers = self.career_engine.recommend_careers_batch(students) or [None] * len(students)
         except Exception as e:
             logger.error(f"Error in comprehensive assessment: {e}")
-            return None
+            return [None] * len(students)
+        
+        timestamp = datetime.now().isoformat()
+        assessments = []
+        for row, student_data in enumerate(students):
+            try:
+                results = {
+                    'timestamp': timestamp,
+                    'student_id': student_data.get('student_id'),
+                    'assessment_type': 'comprehensive_ml'
+                }
+                if row in academic:
+                    results['academic_prediction'] = academic[row]
+                if row in behavioral:
+                    results['behavioral_analysis'] = behavioral[row]
+                results['career_recommendations'] = careers[row]
+                
+                # Overall risk assessment
+                results['overall_assessment'] = self._calculate_overall_assessment(results)
+                assessments.append(results)
+                
+            except Exception as e:
+                logger.error(f"Error in comprehensive assessment: {e}")
+                assessments.append(None)
+        return assessments
+    
+    @staticmethod
+    def _batch_component(students, key, analyze_batch):
+        """Run one batch component over the students that carry its data, keyed by position"""
+        rows = [row for row, student_data in enumerate(students) if key in student_data]
+        if not rows:
+            return {}
+        results = analyze_batch([students[row][key] for row in rows]) or [None] * len(rows)
+        return dict(zip(rows, results))
     
     def _calculate_overall_assessment(self, results):
         """Calculate overall assessment and risk levels"""
@@ -1,3 +1,177 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from .career_matching import (
+    DEFAULT_CAREERS, GROWTH_BONUS, INTEREST_WEIGHT, SUBJECT_WEIGHT, CareerCatalog, career_records_from_mapping,
+    top_k
+)
+from .ml_service import AcademicPerformancePredictor, BehavioralPatternAnalyzer, CareerRecommendationEngine
+
+PROFILES = [
+    {
+        'skills': {'programming': 0.8, 'mathematics': 0.9, 'communication': 0.4},
+        'personality': {'analytical': 0.9},
+        'academic_scores': {'mathematics': 92, 'physics': 81},
+        'interests': ['technology', 'analysis'],
+    },
+    {
+        'skills': {'empathy': 0.9, 'communication': 0.8},
+        'personality': {'caring': 0.7, 'nurturing': 0.8},
+        'academic_scores': {'biology': 75},
+        'interests': ['helping_others', 'education', 'unknown_interest'],
+    },
+    {},
+]
+
+
+def reference_score(profile, career, bonus):
+    """Match score of one profile and career, computed the way the per-career loop did"""
+    values = {f'skill:{name}': value for name, value in profile.get('skills', {}).items()}
+    values.update({f'trait:{name}': value for name, value in profile.get('personality', {}).items()})
+    values.update({f'subject:{name}': score / 100 for name, score in profile.get('academic_scores', {}).items()})
+    requirements = {f'skill:{name}': weight for name, weight in career['skills'].items()}
+    requirements.update({f'trait:{name}': weight for name, weight in career['personality'].items()})
+    requirements.update({f'subject:{name}': SUBJECT_WEIGHT for name in career['subjects']})
+
+    matched = sum(values[feature] * weight for feature, weight in requirements.items() if feature in values)
+    weight = sum(weight for feature, weight in requirements.items() if feature in values)
+    career_interests = set(career['interests'])
+    overlap = len(career_interests & set(profile.get('interests', []))) / len(career_interests)
+    return (matched + INTEREST_WEIGHT * overlap + bonus) / (weight + INTEREST_WEIGHT + bonus)
+
+
+class CareerCatalogTests(SimpleTestCase):
+
+    def setUp(self):
+        self.catalog = CareerCatalog.from_records(DEFAULT_CAREERS)
+
+    def test_matrix_scores_match_per_career_scoring(self):
+        bonus = self.catalog.growth_bonus(['software_engineer', 'healthcare_worker'])
+        scores = self.catalog.score(PROFILES, bonus)
+        self.assertEqual(scores.shape, (len(PROFILES), len(DEFAULT_CAREERS)))
+        for row, profile in enumerate(PROFILES):
+            for col, career in enumerate(DEFAULT_CAREERS):
+                self.assertAlmostEqual(scores[row, col], reference_score(profile, career, bonus[col]))
+
+    def test_growth_bonus(self):
+        bonus = self.catalog.growth_bonus(['data_scientist'])
+        self.assertEqual(bonus.tolist(), [0, GROWTH_BONUS, 0, 0, 0])
+
+    def test_top_k_orders_best_first_and_keeps_catalog_order_for_ties(self):
+        scores = np.array([[0.2, 0.9, 0.5, 0.9, 0.1], [0.3, 0.3, 0.3, 0.3, 0.3]])
+        self.assertEqual(top_k(scores, 3).tolist(), [[1, 3, 2], [0, 1, 2]])
+        self.assertEqual(top_k(scores, 10).tolist(), [[1, 3, 2, 0, 4], [0, 1, 2, 3, 4]])
+
+    def test_lookups(self):
+        self.assertEqual(self.catalog.careers_with_skill('programming'), ['software_engineer', 'data_scientist'])
+        self.assertEqual(self.catalog.careers_for_subject('mathematics'), ['software_engineer', 'data_scientist', 'business_analyst'])
+        self.assertEqual(self.catalog.careers_with_interest('analysis'), ['data_scientist', 'business_analyst'])
+        self.assertEqual(self.catalog.careers_in_cluster('technology'), ['software_engineer', 'data_scientist'])
+        self.assertEqual(self.catalog.careers_with_skill('juggling'), [])
+
+    def test_saved_index_loads_unchanged(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = self.catalog.save(os.path.join(directory, 'career-index.npz'))
+        loaded = CareerCatalog.load(path)
+        self.assertEqual(loaded.records, self.catalog.records)
+        np.testing.assert_allclose(loaded.score(PROFILES), self.catalog.score(PROFILES))
+
+    def test_mapping_records(self):
+        records = career_records_from_mapping({'career_fields': [
+            {'title': 'Civil Engineer', 'skills': 'Mathematics, Design', 'subjects': ['Physics'], 'sector': 'Infrastructure'},
+            {'title': 'civil engineer'},
+            {'skills': 'ignored without a title'},
+        ]})
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual((record['id'], record['cluster'], record['subjects']), ('civil_engineer', 'infrastructure', ['physics']))
+        self.assertEqual(record['skills'], {'mathematics': 0.7, 'design': 0.7})
+
+
+class BuildCareerIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.output = os.path.join(self.directory, 'career-index.npz')
+
+    def test_builds_from_the_tracked_fixtures(self):
+        out = StringIO()
+        call_command('build_career_index', output=self.output, stdout=out)
+        catalog = CareerCatalog.load(self.output)
+        self.assertEqual(catalog.ids[:len(DEFAULT_CAREERS)], tuple(career['id'] for career in DEFAULT_CAREERS))
+        self.assertEqual((len(catalog), len(catalog.colleges)), (14, 6))
+        self.assertIn('14 careers', out.getvalue())
+
+    def test_missing_dataset(self):
+        with self.assertRaisesMessage(CommandError, 'not found'):
+            call_command('build_career_index', career_mapping=os.path.join(self.directory, 'missing.json'),
+                         output=self.output, stdout=StringIO())
+        self.assertFalse(os.path.exists(self.output))
+
+
+class CareerRecommendationEngineTests(SimpleTestCase):
+
+    def test_batch_matches_single_recommendations(self):
+        engine = CareerRecommendationEngine(CareerCatalog.from_records(DEFAULT_CAREERS))
+        batch = engine.recommend_careers_batch(PROFILES)
+        self.assertEqual(batch, [engine.recommend_careers(profile) for profile in PROFILES])
+        top_career, summary = batch[0]['top_recommendations'][0]
+        self.assertEqual(top_career, 'data_scientist')
+        self.assertEqual(summary['growth_rate'], 0.31)
+
+
+def student_rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for index in range(count):
+        rows.append({
+            'previous_gpa': round(rng.uniform(1.5, 4.0), 2),
+            'attendance_rate': rng.uniform(60, 100),
+            'study_hours_per_week': rng.uniform(0, 15),
+            'test_average': rng.uniform(40, 100),
+            'gender': 'M' if index % 2 else 'F',
+            'attention_span_score': rng.uniform(30, 100),
+            'impulse_control_score': rng.uniform(30, 100),
+            'motivation_level': rng.uniform(30, 100),
+            'target_gpa': round(rng.uniform(1.5, 4.0), 2),
+        })
+    # Missing fields fall back to their defaults
+    rows[0].pop('attendance_rate')
+    rows[1].pop('motivation_level')
+    return rows
+
+
+class AnalyzerBatchTests(SimpleTestCase):
+
+    def test_academic_batch_matches_single_predictions(self):
+        rows = student_rows(40)
+        predictor = AcademicPerformancePredictor()
+        self.assertIsNone(predictor.predict_batch(rows))
+        self.assertTrue(predictor.train(rows))
+
+        batch = predictor.predict_batch(rows)
+        self.assertEqual(batch, [predictor.predict(row) for row in rows])
+        self.assertEqual(predictor.predict_batch(pd.DataFrame(rows)), batch)
+
+    def test_behavioral_batch_matches_single_analysis(self):
+        rows = student_rows(30, seed=1)
+        analyzer = BehavioralPatternAnalyzer()
+        batch = analyzer.analyze_behavior_batch(rows)
+        self.assertEqual(batch, [analyzer.analyze_behavior(row) for row in rows])
+        self.assertTrue(any(result['intervention_level'] != 'minimal' for result in batch))
+
+        frame_batch = analyzer.analyze_behavior_batch(pd.DataFrame(rows))
+        self.assertEqual(
+            [(result['risk_factors'], result['risk_score'], result['interventions']) for result in frame_batch],
+            [(result['risk_factors'], result['risk_score'], result['interventions']) for result in batch]
+        )
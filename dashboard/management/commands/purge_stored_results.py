@@ -0,0 +1,15 @@
+"""
+Delete expired entries from the server-side result store
+"""
+
+from django.core.management.base import BaseCommand
+
+from dashboard.result_store import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired analysis results from the server-side result store'
+
+    def handle(self, *args, **options):
+        purged = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired stored results'))
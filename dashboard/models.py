@@ -233,3 +233,19 @@ class DashboardSetting(models.Model):
     
     def __str__(self):
         return f"{self.user.get_full_name()} - Dashboard Settings"
+
+
+class StoredResult(models.Model):
+    """Compressed analysis result kept server-side; sessions only hold its key."""
+    
+    key = models.CharField(max_length=128, unique=True)
+    payload = models.BinaryField()  # zlib-compressed JSON
+    size = models.PositiveIntegerField(default=0)  # uncompressed bytes
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        db_table = 'dashboard_stored_results'
+    
+    def __str__(self):
+        return f"{self.key} (expires {self.expires_at})"
@@ -0,0 +1,91 @@
+"""
+Server-side store for large analysis results
+Results are kept as compressed JSON keyed by upload/session id so that sessions,
+which are rewritten on every request, only carry the key
+"""
+
+import json
+import logging
+import threading
+import time
+import zlib
+from datetime import timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import StoredResult
+
+logger = logging.getLogger(__name__)
+
+# Expired rows are swept from put_result at most this often per process
+PURGE_INTERVAL_SECONDS = 3600
+
+_last_purge = 0.0
+_purge_lock = threading.Lock()
+
+
+def result_key(namespace: str, identifier) -> str:
+    """Build the store key for a result, e.g. result_key('upload_session', 42)"""
+    return f"{namespace}:{identifier}"
+
+
+def put_result(key: str, data: Any, ttl: Optional[int] = None) -> str:
+    """Compress and store a JSON-serializable result, replacing any previous value"""
+    raw = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+    ttl = settings.RESULT_STORE_TTL if ttl is None else ttl
+
+    StoredResult.objects.update_or_create(
+        key=key,
+        defaults={
+            'payload': zlib.compress(raw, 6),
+            'size': len(raw),
+            'expires_at': timezone.now() + timedelta(seconds=ttl),
+        }
+    )
+    _maybe_purge()
+    return key
+
+
+def get_result(key: Optional[str]) -> Optional[Any]:
+    """Load a stored result, or None when it is missing or expired"""
+    if not key:
+        return None
+    row = StoredResult.objects.filter(key=key, expires_at__gt=timezone.now()).values_list('payload', flat=True).first()
+    if row is None:
+        return None
+    try:
+        return json.loads(zlib.decompress(bytes(row)).decode('utf-8'))
+    except (zlib.error, ValueError) as e:
+        logger.warning(f"Discarding unreadable stored result {key}: {e}")
+        delete_result(key)
+        return None
+
+
+def delete_result(key: str) -> None:
+    StoredResult.objects.filter(key=key).delete()
+
+
+def purge_expired() -> int:
+    """Delete every expired result and return how many were removed"""
+    deleted, _ = StoredResult.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def _maybe_purge() -> None:
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge < PURGE_INTERVAL_SECONDS:
+        return
+    with _purge_lock:
+        if now - _last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        _last_purge = now
+    try:
+        purged = purge_expired()
+        if purged:
+            logger.info(f"Purged {purged} expired stored results")
+    except Exception as e:
+        logger.warning(f"Stored result purge failed: {e}")
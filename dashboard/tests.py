@@ -1,3 +1,92 @@
-from django.test import TestCase
+import json
+import zlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import StoredResult
+from .result_store import delete_result, get_result, purge_expired, put_result, result_key
+
+
+class ResultStoreTests(TestCase):
+
+    def setUp(self):
+        # Keep put_result from sweeping so each test controls purging
+        self.enterContext(mock.patch('dashboard.result_store._maybe_purge'))
+
+    def test_round_trip(self):
+        data = {'scores': {'Maths': [70, 75.5]}, 'nested': [{'ok': True, 'note': None}], 'text': 'é'}
+        key = put_result(result_key('upload_session', 42), data)
+        self.assertEqual(key, 'upload_session:42')
+        self.assertEqual(get_result(key), data)
+
+        row = StoredResult.objects.get(key=key)
+        self.assertEqual(row.size, len(json.dumps(data, separators=(',', ':')).encode('utf-8')))
+        self.assertEqual(json.loads(zlib.decompress(bytes(row.payload))), data)
+
+    def test_django_types_are_serialized(self):
+        key = put_result('k', {'day': date(2024, 5, 1), 'at': datetime(2024, 5, 1, 9, 30), 'amount': Decimal('1.50')})
+        self.assertEqual(get_result(key), {'day': '2024-05-01', 'at': '2024-05-01T09:30:00', 'amount': '1.50'})
+
+    def test_put_replaces_the_previous_value(self):
+        put_result('k', {'version': 1})
+        put_result('k', {'version': 2})
+        self.assertEqual(get_result('k'), {'version': 2})
+        self.assertEqual(StoredResult.objects.count(), 1)
+
+    def test_missing_keys(self):
+        self.assertIsNone(get_result(None))
+        self.assertIsNone(get_result(''))
+        self.assertIsNone(get_result('upload_session:404'))
+
+    @override_settings(RESULT_STORE_TTL=60)
+    def test_expired_results_are_not_returned(self):
+        put_result('default', [1])
+        put_result('short', [2], ttl=0)
+        self.assertEqual(get_result('default'), [1])
+        self.assertIsNone(get_result('short'))
+
+        expires_at = StoredResult.objects.get(key='default').expires_at
+        self.assertAlmostEqual(expires_at, timezone.now() + timedelta(seconds=60), delta=timedelta(seconds=5))
+
+    def test_unreadable_payloads_are_discarded(self):
+        for payload in (b'not zlib', zlib.compress(b'{not json')):
+            with self.subTest(payload=payload):
+                StoredResult.objects.create(key='bad', payload=payload, expires_at=timezone.now() + timedelta(hours=1))
+                with self.assertLogs('dashboard.result_store', 'WARNING'):
+                    self.assertIsNone(get_result('bad'))
+                self.assertFalse(StoredResult.objects.filter(key='bad').exists())
+
+    def test_delete(self):
+        put_result('k', {})
+        delete_result('k')
+        self.assertIsNone(get_result('k'))
+
+    def test_purge_removes_only_expired_results(self):
+        put_result('live', 1)
+        put_result('old', 2, ttl=0)
+        self.assertEqual(purge_expired(), 1)
+        self.assertEqual(list(StoredResult.objects.values_list('key', flat=True)), ['live'])
+
+        put_result('old', 2, ttl=0)
+        out = StringIO()
+        call_command('purge_stored_results', stdout=out)
+        self.assertIn('Purged 1 expired stored results', out.getvalue())
+
+
+class ResultStorePurgeTests(TestCase):
+
+    @mock.patch('dashboard.result_store._last_purge', float('-inf'))
+    def test_put_sweeps_expired_results_at_most_once_per_interval(self):
+        StoredResult.objects.create(key='old', payload=b'', expires_at=timezone.now())
+        put_result('new', 2)
+        self.assertFalse(StoredResult.objects.filter(key='old').exists())
+
+        StoredResult.objects.create(key='old', payload=b'', expires_at=timezone.now())
+        put_result('newer', 3)
+        self.assertTrue(StoredResult.objects.filter(key='old').exists())
@@ -307,6 +307,32 @@ LOGGING = {
 # ML Engine settings
 ML_ENGINE_URL = os.environ.get('ML_ENGINE_URL', 'http://localhost:5000')
 ML_CACHE_TIMEOUT = int(os.environ.get('ML_CACHE_TIMEOUT', '3600'))
+SCORE_FORECASTER_PATH = os.environ.get('SCORE_FORECASTER_PATH', str(BASE_DIR / 'ml_models' / 'score_forecaster.joblib'))
+ML_MODEL_DIR = os.environ.get('ML_MODEL_DIR', str(BASE_DIR / 'ml_models'))
+ML_MODEL_RELOAD_INTERVAL = int(os.environ.get('ML_MODEL_RELOAD_INTERVAL', '30'))  # seconds between artifact change checks
+ML_TRAINING_CORES = int(os.environ.get('ML_TRAINING_CORES', '0'))  # 0 uses every available core
+ML_FULL_RETRAIN_INTERVAL_HOURS = int(os.environ.get('ML_FULL_RETRAIN_INTERVAL_HOURS', '168'))  # backstop for incremental updates
+ML_SERVE_INCREMENTAL_MODELS = os.environ.get('ML_SERVE_INCREMENTAL_MODELS', 'True').lower() == 'true'  # else serve the initialize_ml artifacts
+ML_BENCHMARK_BASELINE_PATH = os.environ.get('ML_BENCHMARK_BASELINE_PATH', str(BASE_DIR / 'ml_models' / 'benchmark-baseline.json'))
+BATCH_PREDICTION_WORKERS = int(os.environ.get('BATCH_PREDICTION_WORKERS', '1'))
+CAREER_INDEX_PATH = os.environ.get('CAREER_INDEX_PATH', str(BASE_DIR / 'data' / 'processed' / 'career-index.npz'))
+PREDICTION_CACHE_TTL = int(os.environ.get('PREDICTION_CACHE_TTL', '86400'))
+PREDICTION_CACHE_MAX_ENTRIES = int(os.environ.get('PREDICTION_CACHE_MAX_ENTRIES', '50000'))
+PREDICTION_CACHE_SWEEP_INTERVAL = int(os.environ.get('PREDICTION_CACHE_SWEEP_INTERVAL', '300'))
+
+# Upload processing settings
+UPLOAD_PROCESSING_WORKERS = int(os.environ.get('UPLOAD_PROCESSING_WORKERS', '2'))
+
+# Server-side result store settings
+RESULT_STORE_TTL = int(os.environ.get('RESULT_STORE_TTL', '604800'))  # 7 days
+
+# Workflow settings
+WORKFLOW_SCHEDULER_POLL_INTERVAL = int(os.environ.get('WORKFLOW_SCHEDULER_POLL_INTERVAL', '5'))  # longest sleep between due checks
+WORKFLOW_SCHEDULER_BATCH_SIZE = int(os.environ.get('WORKFLOW_SCHEDULER_BATCH_SIZE', '100'))
+WORKFLOW_SCHEDULER_IN_PROCESS = os.environ.get('WORKFLOW_SCHEDULER_IN_PROCESS', 'True').lower() == 'true'  # off when run_workflow_scheduler runs as a service
+WORKFLOW_LOG_FLUSH_STEPS = int(os.environ.get('WORKFLOW_LOG_FLUSH_STEPS', '10'))  # steps between checkpoints of step/audit records (side-effecting steps write their own record at once)
+WORKFLOW_STEP_WORKERS = int(os.environ.get('WORKFLOW_STEP_WORKERS', '8'))  # threads running independent steps of parallel workflows
+WORKFLOW_TRIGGER_INDEX_CHECK_INTERVAL = int(os.environ.get('WORKFLOW_TRIGGER_INDEX_CHECK_INTERVAL', '5'))  # seconds between trigger change checks
 
 # Analytics settings
 ANALYTICS_CACHE_TIMEOUT = int(os.environ.get('ANALYTICS_CACHE_TIMEOUT', '1800'))
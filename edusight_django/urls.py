@@ -62,6 +62,7 @@ urlpatterns = [
     path('analytics/', include('data_analytics.urls')),
     path('ml/', include('ml_predictions.urls')),
     path('crm/', include('crm.urls')),
+    path('workflows/', include('workflow_system.urls')),
     
     # Authentication (Django built-in)
     path('accounts/', include('django.contrib.auth.urls')),
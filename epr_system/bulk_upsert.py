@@ -0,0 +1,86 @@
+"""
+Bulk upsert of data entries keyed by their natural key
+Writes a batch of model instances in a few statements and reports
+how many rows were inserted, updated or skipped
+"""
+
+from typing import Dict, List, Tuple, Any
+from django.db import connection, transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+def bulk_upsert(model, instances: List[Any], unique_fields: List[str], update_fields: List[str],
+                batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """Insert new rows and update existing ones matched on unique_fields
+
+    Uses a native INSERT ... ON CONFLICT when the key is a unique constraint of the
+    model and the database supports it, otherwise merges against the existing keys
+    with bulk_create/bulk_update. Each batch runs in its own transaction. Instances
+    repeating a key already seen in the input are skipped; the last one wins.
+    """
+    counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+
+    fields = [model._meta.get_field(name) for name in unique_fields]
+    keyed = {}
+    for instance in instances:
+        keyed[tuple(getattr(instance, field.attname) for field in fields)] = instance
+    counts['skipped'] = len(instances) - len(keyed)
+
+    native = _supports_native_upsert(model, unique_fields)
+    items = list(keyed.items())
+
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        with transaction.atomic():
+            existing = _existing_keys(model, fields, [key for key, _ in batch])
+
+            if native:
+                model.objects.bulk_create(
+                    [instance for _, instance in batch],
+                    update_conflicts=True,
+                    unique_fields=unique_fields,
+                    update_fields=update_fields
+                )
+                updated = sum(1 for key, _ in batch if key in existing)
+            else:
+                to_create = []
+                to_update = []
+                for key, instance in batch:
+                    if key in existing:
+                        instance.pk = existing[key]
+                        for name in update_fields:
+                            # Applies auto_now and similar pre-save hooks skipped by bulk_update
+                            field = model._meta.get_field(name)
+                            setattr(instance, field.attname, field.pre_save(instance, add=False))
+                        to_update.append(instance)
+                    else:
+                        to_create.append(instance)
+                model.objects.bulk_create(to_create)
+                model.objects.bulk_update(to_update, update_fields)
+                updated = len(to_update)
+
+        counts['updated'] += updated
+        counts['inserted'] += len(batch) - updated
+
+    logger.info(f"Bulk upsert into {model.__name__}: {counts}")
+    return counts
+
+def _supports_native_upsert(model, unique_fields: List[str]) -> bool:
+    """Whether the key is backed by a unique constraint usable as ON CONFLICT target"""
+    if not connection.features.supports_update_conflicts_with_target:
+        return False
+    key = set(unique_fields)
+    return any(set(fields) == key for fields in model._meta.unique_together)
+
+def _existing_keys(model, fields, keys: List[Tuple]) -> Dict[Tuple, int]:
+    """Map the keys of a batch that already exist in the table to their primary keys"""
+    lookups = {
+        f"{field.attname}__in": {key[position] for key in keys}
+        for position, field in enumerate(fields)
+    }
+    wanted = set(keys)
+    rows = model.objects.filter(**lookups).values_list('pk', *[field.attname for field in fields])
+    return {tuple(row[1:]): row[0] for row in rows if tuple(row[1:]) in wanted}
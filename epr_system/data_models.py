@@ -106,6 +106,15 @@ class DataUpload(models.Model):
         ('needs_review', 'Needs Manual Review')
     ]
     
+    PROCESSING_STAGES = [
+        ('queued', 'Queued'),
+        ('parse', 'Parsing File'),
+        ('validate', 'Validating Data'),
+        ('persist', 'Saving Entries'),
+        ('recalc', 'Recalculating Profile'),
+        ('done', 'Done')
+    ]
+    
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='data_uploads')
     
     # File information
@@ -118,6 +127,8 @@ class DataUpload(models.Model):
     original_filename = models.CharField(max_length=255)
     file_size = models.PositiveIntegerField(help_text="File size in bytes")
     file_type = models.CharField(max_length=20, choices=FILE_TYPES)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 of the file contents")
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates')
     
     # Upload metadata
     upload_type = models.CharField(max_length=20, choices=UPLOAD_TYPES)
@@ -126,7 +137,10 @@ class DataUpload(models.Model):
     
     # Processing status
     processing_status = models.CharField(max_length=20, choices=PROCESSING_STATUS, default='pending')
+    processing_stage = models.CharField(max_length=20, choices=PROCESSING_STAGES, default='queued')
+    processing_progress = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])
     processing_notes = models.TextField(blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last progress report from the processing worker")
     extracted_data = models.JSONField(default=dict, help_text="Data extracted from file")
     validation_errors = models.JSONField(default=list, help_text="Validation errors found")
     
@@ -14,14 +14,31 @@ import re
 # import cv2
 # import numpy as np
 from typing import Dict, List, Any, Tuple, Optional
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.utils import timezone
+import hashlib
 import logging
 import io
 import os
 
 logger = logging.getLogger(__name__)
 
+class HashingFile(File):
+    """Uploaded file that hashes (SHA-256) its chunks as storage reads them, so saving it also hashes it"""
+    
+    def __init__(self, uploaded_file):
+        super().__init__(uploaded_file, name=uploaded_file.name)
+        self.digest = hashlib.sha256()
+    
+    def chunks(self, chunk_size=None):
+        for chunk in self.file.chunks(chunk_size):
+            self.digest.update(chunk)
+            yield chunk
+    
+    @property
+    def content_hash(self) -> str:
+        return self.digest.hexdigest()
+
 class FileProcessor:
     """Base class for file processing"""
     
@@ -608,9 +625,13 @@ class FileProcessor:
 class DataValidator:
     """Validate extracted data and identify issues"""
     
+    # Records validated per DataFrame chunk in validate_records
+    CHUNK_SIZE = 50000
+    
     def __init__(self):
         self.validation_rules = {
             'academic': {
+                'subject': {'type': 'text', 'required': True},
                 'marks_obtained': {'type': 'numeric', 'min': 0, 'max': 1000},
                 'total_marks': {'type': 'numeric', 'min': 1, 'max': 1000},
                 'percentage': {'type': 'numeric', 'min': 0, 'max': 100},
@@ -627,6 +648,7 @@ class DataValidator:
                 'mood_score': {'type': 'numeric', 'min': 0, 'max': 10}
             }
         }
+        self._compiled_rules = {}
     
     def validate_data(self, data: Dict[str, Any], data_type: str) -> List[Dict[str, Any]]:
         """Validate data and return list of issues"""
@@ -643,12 +665,26 @@ class DataValidator:
                 issue = self.validate_field(field, value, rule)
                 if issue:
                     issues.append(issue)
+            elif rule.get('required'):
+                issues.append(self._missing_issue(field))
         
         return issues
     
     def validate_field(self, field_name: str, value: Any, rule: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Validate individual field"""
         try:
+            if rule.get('required') and (value is None or not str(value).strip()):
+                return self._missing_issue(field_name)
+            
+            if 'choices' in rule and value not in rule['choices']:
+                return {
+                    'field': field_name,
+                    'issue': 'invalid_choice',
+                    'current_value': value,
+                    'expected_values': list(rule['choices']),
+                    'severity': 'medium'
+                }
+            
             if rule['type'] == 'numeric':
                 numeric_value = float(value)
                 
@@ -680,3 +716,131 @@ class DataValidator:
                 'expected_type': rule['type'],
                 'severity': 'high'
             }
+    
+    def validate_records(self, records: List[Dict[str, Any]], data_type: str) -> List[Dict[str, Any]]:
+        """Validate a list of records column-wise, one DataFrame chunk at a time"""
+        import pandas as pd
+        
+        issues = []
+        if data_type not in self.validation_rules or not records:
+            return issues
+        
+        fields = list(self.validation_rules[data_type])
+        for offset in range(0, len(records), self.CHUNK_SIZE):
+            batch = records[offset:offset + self.CHUNK_SIZE]
+            # Only the validated columns are materialized
+            chunk = pd.DataFrame(
+                {field: [record.get(field) for record in batch] for field in fields},
+                index=pd.RangeIndex(offset, offset + len(batch))
+            )
+            issues.extend(self.validate_frame(chunk, data_type))
+        
+        issues.sort(key=lambda issue: issue['record_index'])
+        return issues
+    
+    def validate_frame(self, df: Any, data_type: str) -> List[Dict[str, Any]]:
+        """Validate every row of a DataFrame with vectorized column checks"""
+        issues = []
+        for field, check in self._get_compiled_rules(data_type):
+            if field in df.columns:
+                issues.extend(check(df[field]))
+            elif self.validation_rules[data_type][field].get('required'):
+                issues.extend(self._missing_issue(field, record_index=int(index)) for index in df.index)
+        return issues
+    
+    def _get_compiled_rules(self, data_type: str) -> List[Tuple[str, Any]]:
+        """Compile the rules of a data type into column check functions once"""
+        if data_type not in self._compiled_rules:
+            self._compiled_rules[data_type] = [
+                (field, self._compile_rule(field, rule))
+                for field, rule in self.validation_rules.get(data_type, {}).items()
+            ]
+        return self._compiled_rules[data_type]
+    
+    def _compile_rule(self, field_name: str, rule: Dict[str, Any]):
+        """Build a function that checks a whole column against one rule
+        
+        Each row yields at most one issue, in the same precedence as validate_field:
+        missing, invalid choice, invalid type, below min, above max.
+        """
+        import numpy as np
+        import pandas as pd
+        
+        required = rule.get('required', False)
+        choices = list(rule['choices']) if 'choices' in rule else None
+        numeric = rule['type'] == 'numeric'
+        minimum = rule.get('min')
+        maximum = rule.get('max')
+        
+        def check(column):
+            present = column.notna().to_numpy()
+            if not pd.api.types.is_numeric_dtype(column):
+                present = present & column.astype(str).str.strip().ne('').to_numpy()
+            unflagged = np.ones(len(column), dtype=bool)
+            found = []
+            
+            def collect(mask, build):
+                positions = np.flatnonzero(mask & unflagged)
+                unflagged[positions] = False
+                for pos in positions:
+                    value = column.iat[pos]
+                    found.append(build(int(column.index[pos]), value.item() if hasattr(value, 'item') else value))
+            
+            if required:
+                collect(~present, lambda index, value: self._missing_issue(field_name, record_index=index))
+            
+            if choices is not None:
+                collect(present & ~column.isin(choices).to_numpy(), lambda index, value: {
+                    'field': field_name,
+                    'issue': 'invalid_choice',
+                    'current_value': value,
+                    'expected_values': choices,
+                    'severity': 'medium',
+                    'record_index': index
+                })
+            
+            if numeric:
+                values = pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+                collect(present & np.isnan(values), lambda index, value: {
+                    'field': field_name,
+                    'issue': 'invalid_type',
+                    'current_value': value,
+                    'expected_type': rule['type'],
+                    'severity': 'high',
+                    'record_index': index
+                })
+                with np.errstate(invalid='ignore'):
+                    if minimum is not None:
+                        collect(present & (values < minimum), lambda index, value: {
+                            'field': field_name,
+                            'issue': 'value_too_low',
+                            'current_value': value,
+                            'expected_range': f"{minimum} - {maximum if maximum is not None else 'unlimited'}",
+                            'severity': 'medium',
+                            'record_index': index
+                        })
+                    if maximum is not None:
+                        collect(present & (values > maximum), lambda index, value: {
+                            'field': field_name,
+                            'issue': 'value_too_high',
+                            'current_value': value,
+                            'expected_range': f"{minimum if minimum is not None else 0} - {maximum}",
+                            'severity': 'medium',
+                            'record_index': index
+                        })
+            
+            return found
+        
+        return check
+    
+    def _missing_issue(self, field_name: str, record_index: Optional[int] = None) -> Dict[str, Any]:
+        """Issue reported for a required field without a value"""
+        issue = {
+            'field': field_name,
+            'issue': 'missing_value',
+            'current_value': None,
+            'severity': 'high'
+        }
+        if record_index is not None:
+            issue['record_index'] = record_index
+        return issue
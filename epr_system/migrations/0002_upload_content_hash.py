@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('epr_system', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataupload',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the file contents', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='dataupload',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='epr_system.dataupload'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:29
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('epr_system', '0002_upload_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataupload',
+            name='processing_progress',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AddField(
+            model_name='dataupload',
+            name='processing_stage',
+            field=models.CharField(choices=[('queued', 'Queued'), ('parse', 'Parsing File'), ('validate', 'Validating Data'), ('persist', 'Saving Entries'), ('recalc', 'Recalculating Profile'), ('done', 'Done')], default='queued', max_length=20),
+        ),
+    ]
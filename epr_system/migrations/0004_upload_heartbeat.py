@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('epr_system', '0003_upload_processing_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataupload',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last progress report from the processing worker', null=True),
+        ),
+    ]
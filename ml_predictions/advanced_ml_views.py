@@ -24,14 +24,31 @@ from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 from sklearn.linear_model import LinearRegression, LogisticRegression
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
-import xgboost as xgb
-import lightgbm as lgb
 
 # Django Models
 from students.models import Student, User
 from assessments.models import AssessmentResult
 from data_analytics.models import StudentAnalytics
-from .models import MLPrediction, MLModel
+from .models import MLPrediction
+from .model_registry import FALLBACK_MODELS, get_model_registry, model_label
+from .feature_matrix import build_feature_frame, calculate_age, convert_grade
+from .batch_inference import serving_model, student_inputs
+from .latency import PredictionTimer, get_latency_metrics
+
+
+# Career -> (academic, psychological, physical) weights used for career matching
+CAREER_WEIGHTS = {
+    'Engineering': (0.7, 0.2, 0.1),
+    'Medicine': (0.6, 0.3, 0.1),
+    'Psychology': (0.3, 0.6, 0.1),
+    'Sports Science': (0.2, 0.3, 0.5),
+    'Business': (0.4, 0.4, 0.2),
+    'Arts': (0.3, 0.5, 0.2),
+    'Research': (0.8, 0.1, 0.1),
+    'Teaching': (0.5, 0.4, 0.1),
+}
+
+RISK_LABELS = ['Low Risk', 'Medium Risk', 'High Risk']
 
 
 class AdvancedMLPredictor:
@@ -40,84 +57,36 @@ class AdvancedMLPredictor:
     def __init__(self):
         self.models = {}
         self.scalers = {}
-        self.model_directory = 'ml_models/'
         
-    def load_or_train_models(self):
-        """Load existing models or train new ones with current data"""
-        try:
-            # Try to load existing models
-            model_files = {
-                'performance_predictor': 'performance_random_forest.pkl',
-                'risk_assessor': 'risk_xgboost.pkl',
-                'career_recommender': 'career_lightgbm.pkl'
-            }
-            
-            models_loaded = 0
-            for model_name, filename in model_files.items():
-                model_path = os.path.join(self.model_directory, filename)
-                if os.path.exists(model_path):
-                    try:
-                        self.models[model_name] = joblib.load(model_path)
-                        models_loaded += 1
-                    except:
-                        pass
-            
-            if models_loaded == 0:
-                # Train new models with current data
-                self.train_models_with_current_data()
-                
-        except Exception as e:
-            print(f"Model loading failed: {e}")
-            # Fallback to simplified training
-            self.train_simple_models()
+    def load_models(self):
+        """Use the trained models held by the process-wide registry; never trains"""
+        self.models = get_model_registry().models()
+        return self.models
+    
+    def save_models(self):
+        """Write the models trained in this instance to the registry's artifact files"""
+        registry = get_model_registry()
+        saved = []
+        for model_name, model_info in self.models.items():
+            if model_name in registry.artifacts and 'model' in model_info:
+                registry.save(model_name, model_info)
+                saved.append(model_name)
+        registry.refresh()
+        return saved
     
     def train_models_with_current_data(self):
         """Train ML models using current student data"""
         print("🤖 Training ML models with current student data...")
+        self.models = {}
         
-        # Get current student data
-        students = Student.objects.all()
-        if len(students) < 3:
-            print("⚠️ Not enough data for ML training. Using simplified models.")
-            self.train_simple_models()
-            return
-        
-        # Prepare dataset
-        data = []
-        for student in students:
-            assessments = AssessmentResult.objects.filter(student=student)
-            if assessments.exists():
-                academic_avg = assessments.filter(
-                    assessment__assessment_type='academic'
-                ).aggregate(avg=Avg('percentage'))['avg'] or 0
-                
-                psychological_avg = assessments.filter(
-                    assessment__assessment_type='psychological'
-                ).aggregate(avg=Avg('percentage'))['avg'] or 0
-                
-                physical_avg = assessments.filter(
-                    assessment__assessment_type='physical'
-                ).aggregate(avg=Avg('percentage'))['avg'] or 0
-                
-                # Calculate age
-                age = self._calculate_age(student.date_of_birth)
-                
-                data.append({
-                    'student_id': student.id,
-                    'age': age,
-                    'gender': 1 if student.gender == 'M' else 0,
-                    'grade': self._convert_grade(student.grade),
-                    'academic_score': academic_avg,
-                    'psychological_score': psychological_avg,
-                    'physical_score': physical_avg,
-                    'total_assessments': assessments.count(),
-                })
+        # One annotated query for every student's features; only assessed students train
+        df = build_feature_frame(Student.objects.all())
+        df = df[df['total_assessments'] > 0]
         
-        if len(data) < 3:
+        if len(df) < 3:
+            print("⚠️ Not enough data for ML training. Using simplified models.")
             self.train_simple_models()
             return
-            
-        df = pd.DataFrame(data)
         
         # Train Performance Predictor (Random Forest)
         try:
@@ -165,26 +134,13 @@ class AdvancedMLPredictor:
         """Train simple statistical models as fallback"""
         print("📊 Training simple statistical models...")
         
-        # Simple linear regression for performance
-        self.models['performance_predictor'] = {
-            'type': 'simple_regression',
-            'coefficients': [0.6, 0.3, 0.1]  # Academic, Psychological, Physical weights
-        }
-        
-        # Simple rule-based risk assessment
-        self.models['risk_assessor'] = {
-            'type': 'rule_based',
-            'thresholds': {'low': 75, 'medium': 50}
-        }
+        self.models.update(FALLBACK_MODELS)
         
         print("✅ Simple models ready")
     
     def predict_performance(self, student_data):
         """Predict academic performance using ML"""
-        if 'performance_predictor' not in self.models:
-            self.load_or_train_models()
-        
-        model_info = self.models.get('performance_predictor')
+        model_info = self.load_models().get('performance_predictor')
         if not model_info:
             return self._fallback_performance_prediction(student_data)
         
@@ -213,7 +169,7 @@ class AdvancedMLPredictor:
                 return {
                     'predicted_score': round(prediction, 2),
                     'confidence': round(confidence, 2),
-                    'model_type': 'Random Forest ML',
+                    'model_type': model_label(model_info),
                     'trend': 'stable' if prediction > 70 else 'improving',
                     'recommendations': self._generate_ml_recommendations(prediction)
                 }
@@ -226,10 +182,7 @@ class AdvancedMLPredictor:
     
     def assess_risk(self, student_data):
         """Assess student risk using ML"""
-        if 'risk_assessor' not in self.models:
-            self.load_or_train_models()
-        
-        model_info = self.models.get('risk_assessor')
+        model_info = self.load_models().get('risk_assessor')
         if not model_info:
             return self._fallback_risk_assessment(student_data)
         
@@ -249,14 +202,13 @@ class AdvancedMLPredictor:
                 risk_level = model.predict([input_data])[0]
                 risk_proba = model.predict_proba([input_data])[0]
                 
-                risk_labels = ['Low Risk', 'Medium Risk', 'High Risk']
                 confidence = max(risk_proba) * 100
                 
                 return {
-                    'risk_level': risk_labels[risk_level],
+                    'risk_level': RISK_LABELS[risk_level],
                     'risk_score': risk_level,
                     'confidence': round(confidence, 2),
-                    'model_type': 'Random Forest Classifier',
+                    'model_type': model_label(model_info),
                     'risk_factors': self._identify_risk_factors(student_data, risk_level)
                 }
             else:
@@ -275,14 +227,8 @@ class AdvancedMLPredictor:
         
         # ML-based career matching
         career_scores = {
-            'Engineering': self._calculate_career_score(academic * 0.7, psychological * 0.2, physical * 0.1),
-            'Medicine': self._calculate_career_score(academic * 0.6, psychological * 0.3, physical * 0.1),
-            'Psychology': self._calculate_career_score(academic * 0.3, psychological * 0.6, physical * 0.1),
-            'Sports Science': self._calculate_career_score(academic * 0.2, psychological * 0.3, physical * 0.5),
-            'Business': self._calculate_career_score(academic * 0.4, psychological * 0.4, physical * 0.2),
-            'Arts': self._calculate_career_score(academic * 0.3, psychological * 0.5, physical * 0.2),
-            'Research': self._calculate_career_score(academic * 0.8, psychological * 0.1, physical * 0.1),
-            'Teaching': self._calculate_career_score(academic * 0.5, psychological * 0.4, physical * 0.1),
+            career: self._calculate_career_score(academic * weights[0], psychological * weights[1], physical * weights[2])
+            for career, weights in CAREER_WEIGHTS.items()
         }
         
         # Sort careers by score
@@ -304,17 +250,100 @@ class AdvancedMLPredictor:
             'based_on': ['Academic Performance', 'Psychological Profile', 'Physical Aptitude']
         }
     
+    # Batch inference: one model call for a whole feature frame (see feature_matrix)
+    def predict_performance_batch(self, frame):
+        """predict_performance for every row of a feature frame"""
+        model_info = self.load_models().get('performance_predictor')
+        n = len(frame)
+        predictions = None
+        
+        if model_info and model_info['type'] == 'regression':
+            try:
+                predictions = model_info['model'].predict(frame[model_info['features']])
+                confidences = np.clip(85 + np.random.normal(0, 5, n), 75, 95)
+                trends = np.where(predictions > 70, 'stable', 'improving')
+                model_type = model_label(model_info)
+            except Exception as e:
+                print(f"ML batch prediction error: {e}")
+                predictions = None
+        
+        if predictions is None:
+            scores = frame[['academic_score', 'psychological_score', 'physical_score']].to_numpy(dtype=float)
+            predictions = scores.mean(axis=1) + np.random.normal(0, 3, n)
+            confidences = np.full(n, 78.5)
+            trends = np.full(n, 'stable')
+            model_type = 'Statistical Model'
+        
+        return [
+            {
+                'predicted_score': round(float(prediction), 2),
+                'confidence': round(float(confidence), 2),
+                'model_type': model_type,
+                'trend': str(trend),
+                'recommendations': self._generate_ml_recommendations(prediction)
+            }
+            for prediction, confidence, trend in zip(predictions, confidences, trends)
+        ]
+    
+    def assess_risk_batch(self, frame):
+        """assess_risk for every row of a feature frame"""
+        model_info = self.load_models().get('risk_assessor')
+        records = frame[['academic_score', 'psychological_score', 'physical_score']].to_dict('records')
+        
+        if model_info and model_info['type'] == 'classification':
+            try:
+                X = frame[model_info['features']]
+                risk_levels = model_info['model'].predict(X)
+                confidences = model_info['model'].predict_proba(X).max(axis=1) * 100
+                return [
+                    {
+                        'risk_level': RISK_LABELS[int(risk_level)],
+                        'risk_score': int(risk_level),
+                        'confidence': round(float(confidence), 2),
+                        'model_type': model_label(model_info),
+                        'risk_factors': self._identify_risk_factors(record, int(risk_level))
+                    }
+                    for record, risk_level, confidence in zip(records, risk_levels, confidences)
+                ]
+            except Exception as e:
+                print(f"Risk batch assessment error: {e}")
+        
+        return [self._fallback_risk_assessment(record) for record in records]
+    
+    def recommend_career_batch(self, frame):
+        """recommend_career for every row of a feature frame, scored as one matrix product"""
+        careers = list(CAREER_WEIGHTS)
+        weights = np.array([CAREER_WEIGHTS[career] for career in careers])
+        scores = frame[['academic_score', 'psychological_score', 'physical_score']].to_numpy(dtype=float)
+        
+        career_scores = np.minimum(100, scores @ weights.T + np.random.normal(0, 5, (len(frame), len(careers))))
+        top = np.argsort(-career_scores, axis=1, kind='stable')[:, :5]
+        
+        return [
+            {
+                'recommendations': [
+                    {
+                        'career': careers[index],
+                        'match_percentage': round(float(row_scores[index]), 1),
+                        'description': self._get_career_description(careers[index]),
+                        'requirements': self._get_career_requirements(careers[index])
+                    }
+                    for index in row_top
+                ],
+                'model_type': 'Advanced ML Career Matching',
+                'confidence': 88.5,
+                'based_on': ['Academic Performance', 'Psychological Profile', 'Physical Aptitude']
+            }
+            for row_scores, row_top in zip(career_scores, top)
+        ]
+    
     # Helper methods
     def _calculate_age(self, birth_date):
-        today = datetime.now().date()
-        return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+        return calculate_age(birth_date)
     
     def _convert_grade(self, grade_str):
-        grade_mapping = {
-            'Nursery': 0, 'KG': 1, '1': 3, '2': 4, '3': 5, '4': 6, '5': 7, '6': 8,
-            '7': 9, '8': 10, '9': 11, '10': 12, '11': 13, '12': 14
-        }
-        return grade_mapping.get(str(grade_str), 8)
+        # Shared with the training feature matrix so serving sees the same encoding
+        return convert_grade(grade_str)
     
     def _calculate_career_score(self, academic_weight, psych_weight, physical_weight):
         return min(100, academic_weight + psych_weight + physical_weight + np.random.normal(0, 5))
@@ -414,55 +443,41 @@ def advanced_ml_prediction(request, student_id):
     
     if request.method == 'POST':
         prediction_type = request.POST.get('prediction_type')
+        timer = PredictionTimer()
         
         # Prepare student data
-        assessments = AssessmentResult.objects.filter(student=student)
-        student_data = {
-            'age': ml_predictor._calculate_age(student.date_of_birth),
-            'gender': 1 if student.gender == 'M' else 0,
-            'grade': ml_predictor._convert_grade(student.grade),
-            'academic_score': assessments.filter(
-                assessment__assessment_type='academic'
-            ).aggregate(avg=Avg('percentage'))['avg'] or 75,
-            'psychological_score': assessments.filter(
-                assessment__assessment_type='psychological'
-            ).aggregate(avg=Avg('percentage'))['avg'] or 75,
-            'physical_score': assessments.filter(
-                assessment__assessment_type='physical'
-            ).aggregate(avg=Avg('percentage'))['avg'] or 75,
-        }
+        with timer.stage('features'):
+            student_data = student_inputs(student)[1]
         
-        # Generate prediction based on type
-        if prediction_type == 'performance_forecast':
-            prediction_data = ml_predictor.predict_performance(student_data)
-        elif prediction_type == 'risk_assessment':
-            prediction_data = ml_predictor.assess_risk(student_data)
-        elif prediction_type == 'career_recommendation':
-            prediction_data = ml_predictor.recommend_career(student_data)
-        else:
-            prediction_data = {'error': 'Unknown prediction type'}
+        with timer.stage('model_load'):
+            ml_predictor.load_models()
+            ml_model = serving_model(prediction_type)
         
-        # Save prediction to database
-        model_obj, _ = MLModel.objects.get_or_create(
-            name=f"Advanced {prediction_type.replace('_', ' ').title()} Model",
-            version='2.0',
-            defaults={
-                'model_type': 'advanced_ml',
-                'file_path': f'/ml_models/{prediction_type}_model.pkl',
-                'accuracy_score': prediction_data.get('confidence', 85) / 100,
-                'is_active': True
-            }
-        )
+        # Generate prediction based on type
+        with timer.stage('inference'):
+            if prediction_type == 'performance_forecast':
+                prediction_data = ml_predictor.predict_performance(student_data)
+            elif prediction_type == 'risk_assessment':
+                prediction_data = ml_predictor.assess_risk(student_data)
+            elif prediction_type == 'career_recommendation':
+                prediction_data = ml_predictor.recommend_career(student_data)
+            else:
+                prediction_data = {'error': 'Unknown prediction type'}
         
-        prediction = MLPrediction.objects.create(
-            student=student,
-            prediction_type=prediction_type,
-            input_data=student_data,
-            prediction_result=prediction_data,
-            confidence_score=prediction_data.get('confidence', 85),
-            model_version='2.0',
-            processing_time_ms=np.random.randint(50, 200)
-        )
+        # Save prediction to database; its timing covers everything up to the write
+        with timer.stage('persist'):
+            prediction = MLPrediction.objects.create(
+                student=student,
+                prediction_type=prediction_type,
+                input_data=student_data,
+                prediction_result=prediction_data,
+                confidence_score=prediction_data.get('confidence', 85),
+                model_version=ml_model.version,
+                ml_model=ml_model,
+                processing_time_ms=round(timer.elapsed_ms),
+                stage_timings=timer.as_dict()
+            )
+        get_latency_metrics().observe(f'{prediction_type}:{ml_model.version}', timer.elapsed_ms, timer.stages)
         
         messages.success(request, f'Advanced ML {prediction_type.replace("_", " ").title()} generated successfully!')
         return JsonResponse({
@@ -482,8 +497,7 @@ def ml_dashboard_advanced(request):
         messages.error(request, 'Access denied.')
         return redirect('dashboard')
     
-    # Initialize ML predictor
-    ml_predictor.load_or_train_models()
+    ml_predictor.load_models()
     
     # Get ML statistics
     total_predictions = MLPrediction.objects.count()
@@ -527,8 +541,7 @@ def ml_api_advanced(request):
     if not request.user.is_staff:
         return JsonResponse({'error': 'Access denied'}, status=403)
     
-    # Initialize ML predictor if needed
-    ml_predictor.load_or_train_models()
+    ml_predictor.load_models()
     
     return JsonResponse({
         'ml_engine': 'Advanced ML Engine v2.0',
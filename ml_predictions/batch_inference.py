@@ -0,0 +1,274 @@
+"""
+Batch prediction jobs
+Scores a set of students as one feature matrix and one model call per chunk,
+writes the predictions with bulk_create and reports progress on the job row.
+Jobs run on a local worker pool so the request returns immediately.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from students.models import Student
+from .feature_matrix import build_feature_frame
+from .latency import PredictionTimer, get_latency_metrics
+from .model_registry import get_model_registry, model_type_of
+from .models import BatchPredictionJob, MLModel, MLPrediction
+from .prediction_cache import PREDICTION_MODELS, model_version_for
+from .training_pipeline import MODEL_VERSION
+
+logger = logging.getLogger(__name__)
+
+BATCH_PREDICTION_TYPES = ('performance_forecast', 'career_recommendation', 'risk_assessment', 'learning_style')
+
+# Students scored per feature query / model call
+BATCH_CHUNK_SIZE = 5000
+
+# Score assumed for an assessment type a student has no results for (as in generate_prediction)
+DEFAULT_SCORE = 75.0
+
+# Features the single-student predictors take
+INPUT_COLUMNS = ['age', 'gender', 'grade', 'academic_score', 'psychological_score', 'physical_score']
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide batch prediction worker pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BATCH_PREDICTION_WORKERS', 1),
+                    thread_name_prefix='batch-prediction'
+                )
+    return _executor
+
+
+def create_batch_job(prediction_type: str, student_ids: List[int], user=None) -> BatchPredictionJob:
+    """Record a batch job and schedule it once the current transaction commits"""
+    job = BatchPredictionJob.objects.create(
+        prediction_type=prediction_type,
+        student_ids=student_ids,
+        total_students=len(student_ids),
+        requested_by=user
+    )
+    job_id = job.id
+    transaction.on_commit(lambda: get_executor().submit(run_batch_job, job_id))
+    return job
+
+
+def run_batch_job(job_id: int):
+    """Worker entry point: run one job with thread-local database connections"""
+    close_old_connections()
+    try:
+        process_batch_job(BatchPredictionJob.objects.get(pk=job_id))
+    except Exception:
+        logger.exception(f"Batch prediction job {job_id} crashed")
+    finally:
+        close_old_connections()
+
+
+def process_batch_job(job: BatchPredictionJob):
+    """Score the job's students chunk by chunk and persist the predictions"""
+    job.status = 'running'
+    job.started_at = timezone.now()
+    job.save(update_fields=['status', 'started_at'])
+
+    try:
+        student_ids = job.student_ids
+        for start in range(0, len(student_ids), BATCH_CHUNK_SIZE):
+            chunk = student_ids[start:start + BATCH_CHUNK_SIZE]
+            job.created_count += predict_and_store(job.prediction_type, chunk)
+            job.processed_students = start + len(chunk)
+            BatchPredictionJob.objects.filter(pk=job.pk).update(
+                processed_students=job.processed_students,
+                created_count=job.created_count
+            )
+        job.status = 'completed'
+    except Exception as e:
+        logger.exception(f"Batch prediction job {job.pk} failed")
+        job.status = 'failed'
+        job.error_message = str(e)
+
+    job.completed_at = timezone.now()
+    job.save()
+
+
+def predict_and_store(prediction_type: str, student_ids: List[int]) -> int:
+    """Build features for the students, predict once and bulk insert the results"""
+    timer = PredictionTimer()
+    with timer.stage('features'):
+        frame = inference_frame(build_feature_frame(Student.objects.filter(id__in=student_ids)))
+    if frame.empty:
+        return 0
+
+    with timer.stage('model_load'):
+        ml_model = serving_model(prediction_type)
+    with timer.stage('inference'):
+        results = predict_batch(prediction_type, frame)
+
+    # Chunk timings are amortized over its students
+    n = len(frame)
+    stage_timings = {stage: round(ms / n, 3) for stage, ms in timer.stages.items()}
+    per_student_ms = timer.elapsed_ms / n
+
+    inputs = frame[INPUT_COLUMNS].to_dict('records')
+    with timer.stage('persist'):
+        predictions = [
+            MLPrediction(
+                student_id=student_id,
+                prediction_type=prediction_type,
+                input_data=input_data,
+                prediction_result=result,
+                confidence_score=numeric_confidence(result),
+                model_version=ml_model.version,
+                ml_model=ml_model,
+                processing_time_ms=round(per_student_ms),
+                stage_timings=stage_timings
+            )
+            for student_id, input_data, result in zip(frame['student_id'].tolist(), inputs, results)
+        ]
+        MLPrediction.objects.bulk_create(predictions, batch_size=1000)
+
+    stage_timings['persist'] = round(timer.stages['persist'] / n, 3)
+    get_latency_metrics().observe(f'{prediction_type}:{ml_model.version}', timer.elapsed_ms / n, stage_timings, count=n)
+    return len(predictions)
+
+
+def inference_frame(frame):
+    """Match the single-student inputs: integer demographics, default score for untested types"""
+    frame = frame.copy()
+    for column in ('age', 'gender', 'grade'):
+        frame[column] = frame[column].astype(int)
+    for assessment_type in ('academic', 'psychological', 'physical'):
+        untested = frame[f'{assessment_type}_assessments'].to_numpy() == 0
+        frame.loc[untested, f'{assessment_type}_score'] = DEFAULT_SCORE
+    return frame
+
+
+def student_inputs(student):
+    """Full feature row and predictor inputs for one student, as used for batch rows"""
+    frame = inference_frame(build_feature_frame(Student.objects.filter(pk=student.pk)))
+    features = frame.drop(columns='student_id').to_dict('records')[0]
+    return features, {column: features[column] for column in INPUT_COLUMNS}
+
+
+def predict_batch(prediction_type: str, frame) -> List[Dict[str, Any]]:
+    """One prediction dict per frame row"""
+    if prediction_type == 'learning_style':
+        return learning_style_batch(frame)
+    if prediction_type not in BATCH_PREDICTION_TYPES:
+        raise ValueError(f"Unknown prediction type: {prediction_type}")
+
+    from .views import ADVANCED_ML_AVAILABLE
+    if ADVANCED_ML_AVAILABLE:
+        from .advanced_ml_views import ml_predictor
+        try:
+            if prediction_type == 'performance_forecast':
+                return ml_predictor.predict_performance_batch(frame)
+            if prediction_type == 'risk_assessment':
+                return ml_predictor.assess_risk_batch(frame)
+            return ml_predictor.recommend_career_batch(frame)
+        except Exception as e:
+            logger.warning(f"Advanced ML batch prediction failed: {e}, falling back to standard predictions")
+
+    return standard_batch(prediction_type, frame)
+
+
+def standard_batch(prediction_type: str, frame) -> List[Dict[str, Any]]:
+    """The standard generate_* predictions, as the single-student path uses without the advanced engine"""
+    from .views import generate_career_recommendation, generate_performance_forecast, generate_risk_assessment
+
+    generate = {
+        'performance_forecast': generate_performance_forecast,
+        'career_recommendation': generate_career_recommendation,
+        'risk_assessment': generate_risk_assessment,
+    }[prediction_type]
+    student_ids = frame['student_id'].tolist()
+    students = Student.objects.in_bulk(student_ids)
+    return [generate(students[student_id]) for student_id in student_ids]
+
+
+def learning_style_batch(frame) -> List[Dict[str, Any]]:
+    """generate_learning_style_analysis for every row, from the per-type averages and counts"""
+    from .views import generate_learning_recommendations
+
+    academic = frame['academic_score'].to_numpy(dtype=float)
+    has_academic = frame['academic_assessments'].to_numpy() > 0
+    has_any = has_academic | (frame['psychological_assessments'].to_numpy() > 0)
+
+    visual = np.where(has_academic, np.select([academic > 80, academic > 70], [30, 20], 0), 0)
+    auditory = np.where(has_academic, np.select([academic > 80, academic > 70], [20, 25], 0), 0)
+    kinesthetic = np.where(has_academic & (academic <= 70), 25, 0)
+
+    styles = ['Visual', 'Auditory', 'Kinesthetic']
+    results = []
+    for row_has_any, scores in zip(has_any, zip(visual.tolist(), auditory.tolist(), kinesthetic.tolist())):
+        if not row_has_any:
+            results.append({
+                'message': 'Insufficient data for learning style analysis',
+                'learning_style': 'Unable to determine'
+            })
+            continue
+
+        ranked = sorted(zip(styles, scores), key=lambda x: x[1], reverse=True)
+        primary_style = ranked[0][0]
+        secondary_style = ranked[1][0] if ranked[1][1] > 0 else None
+        results.append({
+            'primary_learning_style': primary_style,
+            'secondary_learning_style': secondary_style,
+            'visual_score': scores[0],
+            'auditory_score': scores[1],
+            'kinesthetic_score': scores[2],
+            'recommendations': generate_learning_recommendations(primary_style, secondary_style),
+            'confidence': 'Medium'
+        })
+    return results
+
+
+def serving_model(prediction_type: str) -> MLModel:
+    """MLModel row of the model revision currently serving a prediction type, recorded on its predictions"""
+    model_name = PREDICTION_MODELS.get(prediction_type)
+    registry = get_model_registry()
+    record, _ = MLModel.objects.get_or_create(
+        name=f"{prediction_type.replace('_', ' ').title()} Model",
+        # The artifact revision, so each retrain or incremental update is its own model
+        version=model_version_for(prediction_type),
+        defaults={
+            'model_type': model_type_of(registry.get(model_name) if model_name else None),
+            'file_path': registry.path(model_name) if model_name else '',
+            'is_active': True,
+        }
+    )
+    return record
+
+
+def numeric_confidence(result: Dict[str, Any]) -> float:
+    """The prediction's own confidence, or 0 when it reports a label instead of a number"""
+    confidence = result.get('confidence', 0)
+    return confidence if isinstance(confidence, (int, float)) else 0
+
+
+def get_batch_job_status(job: BatchPredictionJob) -> Dict[str, Any]:
+    """Serialize the progress fields polled by the batch predictions page"""
+    return {
+        'job_id': job.id,
+        'prediction_type': job.prediction_type,
+        'status': job.status,
+        'total_students': job.total_students,
+        'processed_students': job.processed_students,
+        'created_count': job.created_count,
+        'progress': job.progress,
+        'error': job.error_message,
+        'finished': job.status in ('completed', 'failed'),
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+    }
@@ -0,0 +1,337 @@
+"""
+Reproducible benchmarks for the ML models
+Synthetic cohorts are generated deterministically from a seed at several sizes,
+so every run sees the same data. Each model in the training pipeline and each
+predictor of assessments.ml_service is fitted and run on a held-out split with
+wall-clock timing, traced peak memory and a cross-validated score. Reports are
+plain JSON and can be compared against a stored baseline to catch regressions.
+"""
+
+import logging
+import os
+import platform
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+
+from .training_pipeline import RANDOM_STATE, TEST_SIZE, TRAINING_SPECS, _neural_network, add_training_targets
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMAT = 1
+
+COHORT_SIZES = (1_000, 10_000, 100_000)
+CV_FOLDS = 3
+
+# Largest cohort a model is benchmarked on; kernel SVM fitting grows quadratically with rows
+MAX_ROWS = {'svm': 20_000}
+
+# A timing is only compared with its baseline when the baseline took at least this long
+MIN_COMPARABLE_SECONDS = 0.05
+
+SERVICE_BENCHMARKS = ('academic_predictor', 'behavioral_analyzer', 'career_engine')
+
+
+def synthetic_cohort(size: int, seed: int = RANDOM_STATE) -> pd.DataFrame:
+    """Deterministic student cohort with the training pipeline's columns and the ml_service inputs"""
+    from assessments.ml_service import BEHAVIORAL_FEATURES
+
+    rng = np.random.default_rng([seed, size])
+    # One latent ability drives the correlated scores so the targets are learnable
+    ability = rng.normal(0, 1, size)
+
+    def score(mean, spread, noise, low=0, high=100):
+        return np.clip(mean + spread * ability + rng.normal(0, noise, size), low, high).round(1)
+
+    age = rng.integers(5, 19, size)
+    cohort = pd.DataFrame({
+        'age': age,
+        'gender': rng.integers(0, 2, size),
+        'grade': np.clip(age - 3, 0, 14),
+        'academic_score': score(70, 12, 6),
+        'psychological_score': score(68, 8, 10),
+        'physical_score': np.clip(rng.normal(70, 12, size), 0, 100).round(1),
+        'total_assessments': rng.poisson(6, size),
+        'school_type': rng.integers(1, 5, size),
+        'engagement_score': score(75, 6, 8),
+        'attendance_rate': score(88, 5, 4, low=40),
+    })
+    add_training_targets(cohort)
+
+    # Inputs of AcademicPerformancePredictor
+    cohort['previous_gpa'] = np.clip(cohort['academic_score'] / 25 + rng.normal(0, 0.2, size), 0, 4).round(2)
+    cohort['assignment_completion_rate'] = score(85, 6, 6)
+    cohort['test_average'] = np.clip(cohort['academic_score'] + rng.normal(0, 5, size), 0, 100).round(1)
+    cohort['homework_average'] = score(78, 8, 8)
+    cohort['socioeconomic_index'] = np.clip(rng.normal(50, 15, size), 0, 100).round(1)
+    cohort['study_hours_per_week'] = np.clip(10 + 3 * ability + rng.normal(0, 3, size), 0, 40).round(1)
+    cohort['extracurricular_participation'] = rng.integers(0, 2, size)
+    cohort['teacher_rating'] = np.clip(3.5 + 0.6 * ability + rng.normal(0, 0.5, size), 1, 5).round(1)
+    cohort['peer_interaction_score'] = score(70, 4, 12)
+    for preference in ('visual', 'auditory', 'kinesthetic'):
+        cohort[f'{preference}_learning_preference'] = rng.uniform(0, 1, size).round(2)
+    cohort['target_gpa'] = np.clip(
+        0.6 * cohort['previous_gpa'] + 0.01 * cohort['attendance_rate'] + 0.02 * cohort['study_hours_per_week']
+        + rng.normal(0, 0.15, size), 0, 4
+    ).round(2)
+
+    # Inputs of BehavioralPatternAnalyzer
+    for feature in BEHAVIORAL_FEATURES:
+        cohort[feature] = score(72, 8, 12)
+    return cohort
+
+
+def career_profiles(cohort: pd.DataFrame, catalog, seed: int = RANDOM_STATE) -> List[Dict[str, Any]]:
+    """Career engine profiles for a cohort, drawn from the features the catalog knows"""
+    rng = np.random.default_rng([seed, len(cohort), 1])
+    features = {'skill': [], 'trait': [], 'subject': []}
+    for feature in catalog.features:
+        kind, _, name = feature.partition(':')
+        features.setdefault(kind, []).append(name)
+    interests = list(catalog.interests)
+
+    profiles = []
+    for academic in cohort['academic_score'].to_numpy():
+        profile = {
+            'skills': {name: round(float(rng.uniform(0.3, 1)), 2) for name in rng.choice(features['skill'], 4)},
+            'personality': {name: round(float(rng.uniform(0.3, 1)), 2) for name in rng.choice(features['trait'], 3)},
+            'academic_scores': {name: float(academic) for name in rng.choice(features['subject'], 3)},
+            'interests': list(rng.choice(interests, 2)),
+        }
+        profiles.append(profile)
+    return profiles
+
+
+@dataclass
+class Subject:
+    """What is measured for one model on one cohort"""
+    fit: Callable[[], Any]  # Fits on the training rows
+    predict: Callable[[], Any]  # Predicts the held-out rows
+    score: Optional[Callable[[Any], float]] = None  # Held-out score from predict()'s output
+    cv: Optional[Tuple[Any, np.ndarray, np.ndarray]] = None  # (estimator, X, y) to cross-validate
+    metric: Optional[str] = None
+
+
+def _r2(y_true, y_pred) -> float:
+    from sklearn.metrics import r2_score
+    return float(r2_score(y_true, y_pred))
+
+
+def _training_spec_subject(spec, cohort, train, test, n_jobs) -> Subject:
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    X = cohort[list(spec.features)].to_numpy(dtype=float)
+    y = cohort[spec.target].to_numpy(dtype=float)
+    if spec.task == 'classification':
+        y = y.astype(int)
+    metric = 'r2' if spec.task == 'regression' else 'accuracy'
+
+    if spec.key == 'neural_network':
+        scaler = StandardScaler().fit(X[train])
+        model = _neural_network(X.shape[1])
+        return Subject(
+            fit=lambda: model.fit(scaler.transform(X[train]), y[train], epochs=50, batch_size=32,
+                                  validation_split=0.2, verbose=0),
+            predict=lambda: model.predict(scaler.transform(X[test]), verbose=0).ravel(),
+            score=lambda predictions: _r2(y[test], predictions),
+            metric=metric,
+        )
+
+    def build():
+        model = spec.build(n_jobs)
+        return make_pipeline(StandardScaler(), model) if spec.scaler_artifact else model
+
+    model = build()
+    if spec.task == 'regression':
+        score = lambda predictions: _r2(y[test], predictions)
+    else:
+        score = lambda predictions: float(np.mean(predictions == y[test]))
+    return Subject(
+        fit=lambda: model.fit(X[train], y[train]),
+        predict=lambda: model.predict(X[test]),
+        score=score,
+        cv=(build(), X, y),
+        metric=metric,
+    )
+
+
+def _service_subject(key, cohort, train, test) -> Subject:
+    from sklearn.base import clone
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from assessments.ml_service import (
+        AcademicPerformancePredictor, BehavioralPatternAnalyzer, CareerRecommendationEngine
+    )
+
+    train_rows, test_rows = cohort.iloc[train], cohort.iloc[test]
+
+    if key == 'academic_predictor':
+        predictor = AcademicPerformancePredictor()
+        academic = cohort.assign(gender=np.where(cohort['gender'] == 1, 'M', 'F'))
+        train_rows, test_rows = academic.iloc[train], academic.iloc[test]
+        y = academic['target_gpa'].to_numpy(dtype=float)
+        return Subject(
+            fit=lambda: predictor.train(train_rows),
+            predict=lambda: predictor.predict_batch(test_rows),
+            score=lambda predictions: _r2(y[test], [prediction['predicted_gpa'] for prediction in predictions]),
+            cv=(make_pipeline(StandardScaler(), clone(predictor.model)), predictor.prepare_feature_matrix(academic), y),
+            metric='r2',
+        )
+
+    if key == 'behavioral_analyzer':
+        # Rule based: nothing to fit or score
+        analyzer = BehavioralPatternAnalyzer()
+        return Subject(fit=lambda: None, predict=lambda: analyzer.analyze_behavior_batch(test_rows))
+
+    if key == 'career_engine':
+        engine = CareerRecommendationEngine()
+        profiles = career_profiles(test_rows, engine.catalog)
+        return Subject(fit=lambda: None, predict=lambda: engine.recommend_careers_batch(profiles))
+
+    raise KeyError(key)
+
+
+def benchmark_keys() -> List[str]:
+    return [spec.key for spec in TRAINING_SPECS] + list(SERVICE_BENCHMARKS)
+
+
+def _timed(call) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    value = call()
+    return value, time.perf_counter() - started
+
+
+def _peak_memory_mb(call) -> float:
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2 ** 20, 3)
+
+
+def measure(subject_factory: Callable[[], Subject], rows: int, cv_folds: int, memory: bool, seed: int) -> Dict[str, Any]:
+    """Time fit and predict, trace their peak memory and cross-validate one model"""
+    from sklearn.model_selection import KFold, cross_val_score
+
+    subject = subject_factory()
+    _, fit_seconds = _timed(subject.fit)
+    predictions, predict_seconds = _timed(subject.predict)
+    test_rows = max(1, round(rows * TEST_SIZE))
+    result = {
+        'status': 'ok',
+        'fit_seconds': round(fit_seconds, 4),
+        'predict_seconds': round(predict_seconds, 4),
+        'predict_us_per_row': round(predict_seconds / test_rows * 1e6, 3),
+        'metric': subject.metric,
+        'test_score': round(subject.score(predictions), 4) if subject.score else None,
+    }
+
+    if memory:
+        # Tracing slows allocation-heavy code, so memory is measured on a separate fresh run
+        traced = subject_factory()
+        result['peak_memory_mb'] = _peak_memory_mb(lambda: (traced.fit(), traced.predict()))
+
+    if subject.cv and cv_folds > 1:
+        estimator, X, y = subject.cv
+        scores = cross_val_score(estimator, X, y, cv=KFold(cv_folds, shuffle=True, random_state=seed))
+        result['cv_score_mean'] = round(float(scores.mean()), 4)
+        result['cv_score_std'] = round(float(scores.std()), 4)
+    return result
+
+
+def environment() -> Dict[str, Any]:
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def run_benchmarks(sizes: Sequence[int] = COHORT_SIZES, keys: Optional[Sequence[str]] = None,
+                   cv_folds: int = CV_FOLDS, n_jobs: int = 1, memory: bool = True, seed: int = RANDOM_STATE,
+                   progress: Optional[Callable[[str, int, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Benchmark the selected models on a synthetic cohort of each size"""
+    from sklearn.model_selection import train_test_split
+
+    specs = {spec.key: spec for spec in TRAINING_SPECS}
+    keys = list(keys) if keys else benchmark_keys()
+    results = []
+
+    for size in sizes:
+        cohort = synthetic_cohort(size, seed)
+        train, test = train_test_split(np.arange(size), test_size=TEST_SIZE, random_state=seed)
+        for key in keys:
+            if size > MAX_ROWS.get(key, size):
+                result = {'status': 'skipped', 'reason': f'cohort above {MAX_ROWS[key]} rows'}
+            else:
+                if key in specs:
+                    factory = lambda: _training_spec_subject(specs[key], cohort, train, test, n_jobs)
+                else:
+                    factory = lambda: _service_subject(key, cohort, train, test)
+                try:
+                    result = measure(factory, size, cv_folds, memory, seed)
+                except ImportError as e:
+                    result = {'status': 'skipped', 'reason': str(e)}
+                except Exception as e:
+                    logger.warning(f"Benchmark of {key} on {size} rows failed: {e}")
+                    result = {'status': 'error', 'reason': str(e)}
+            result = {'model': key, 'rows': size, **result}
+            results.append(result)
+            if progress:
+                progress(key, size, result)
+
+    return {
+        'format': REPORT_FORMAT,
+        'created_at': timezone.now().isoformat(),
+        'seed': seed,
+        'cv_folds': cv_folds,
+        'n_jobs': n_jobs,
+        'environment': environment(),
+        'results': results,
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                        time_tolerance: float = 0.25, score_tolerance: float = 0.02) -> List[Dict[str, Any]]:
+    """Regressions of report against baseline: timings slower by more than time_tolerance
+    (a fraction) or scores lower by more than score_tolerance (absolute)"""
+    previous = {(result['model'], result['rows']): result for result in baseline.get('results', [])}
+    regressions = []
+
+    for result in report['results']:
+        before = previous.get((result['model'], result['rows']))
+        if result['status'] != 'ok' or not before or before.get('status') != 'ok':
+            continue
+        for field in ('fit_seconds', 'predict_seconds'):
+            if before[field] >= MIN_COMPARABLE_SECONDS and result[field] > before[field] * (1 + time_tolerance):
+                regressions.append(_regression(result, field, before[field]))
+        if before.get('peak_memory_mb') and result.get('peak_memory_mb') is not None:
+            if result['peak_memory_mb'] > before['peak_memory_mb'] * (1 + time_tolerance):
+                regressions.append(_regression(result, 'peak_memory_mb', before['peak_memory_mb']))
+        for field in ('test_score', 'cv_score_mean'):
+            if before.get(field) is not None and result.get(field) is not None:
+                if result[field] < before[field] - score_tolerance:
+                    regressions.append(_regression(result, field, before[field]))
+    return regressions
+
+
+def _regression(result, field, baseline_value) -> Dict[str, Any]:
+    return {
+        'model': result['model'],
+        'rows': result['rows'],
+        'field': field,
+        'baseline': baseline_value,
+        'current': result[field],
+    }
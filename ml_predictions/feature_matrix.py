@@ -0,0 +1,114 @@
+"""
+Student feature matrix for ML training and batch inference
+Builds the per-student features with one annotated query instead of several
+aggregates per student, streaming the rows straight into a NumPy array
+"""
+
+from datetime import date
+from typing import Optional, Tuple
+
+import numpy as np
+from django.db.models import Avg, Count, OuterRef, Q, Subquery
+
+from students.models import Student
+from data_analytics.models import StudentAnalytics
+
+GRADE_LEVELS = {
+    'Nursery': 0, 'KG': 1, 'LKG': 1, 'UKG': 2,
+    '1': 3, '2': 4, '3': 5, '4': 6, '5': 7, '6': 8,
+    '7': 9, '8': 10, '9': 11, '10': 12, '11': 13, '12': 14
+}
+DEFAULT_GRADE_LEVEL = 8
+
+SCHOOL_TYPE_CODES = {'CBSE': 1, 'ICSE': 2, 'IGCSE': 3, 'IB': 4}
+
+ASSESSMENT_TYPES = ('academic', 'psychological', 'physical')
+
+# Used when a student has no analytics record; StudentAnalytics has no
+# engagement or participation fields, so those are constant for now
+DEFAULT_ATTENDANCE_RATE = 85.0
+DEFAULT_ENGAGEMENT_SCORE = 75.0
+DEFAULT_PARTICIPATION_SCORE = 70.0
+
+FEATURE_COLUMNS = (
+    'student_id', 'age', 'gender', 'grade',
+    'academic_score', 'psychological_score', 'physical_score',
+    'total_assessments', 'academic_assessments', 'psychological_assessments', 'physical_assessments',
+    'school_type', 'established_year',
+    'engagement_score', 'attendance_rate', 'participation_score',
+)
+
+_QUERY_FIELDS = (
+    'id', 'date_of_birth', 'gender', 'grade', 'school__school_type', 'school__established_year',
+    'academic_score', 'psychological_score', 'physical_score',
+    'total_assessments', 'academic_assessments', 'psychological_assessments', 'physical_assessments',
+    'latest_attendance_rate',
+)
+
+
+def convert_grade(grade) -> int:
+    """Numeric level of a grade label"""
+    return GRADE_LEVELS.get(str(grade), DEFAULT_GRADE_LEVEL)
+
+
+def calculate_age(birth_date, today: Optional[date] = None) -> int:
+    today = today or date.today()
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+
+def student_feature_queryset(students=None):
+    """Students annotated with per-type assessment averages/counts and their latest attendance rate"""
+    students = Student.objects.all() if students is None else students
+    annotations = {'total_assessments': Count('assessment_results')}
+    for assessment_type in ASSESSMENT_TYPES:
+        of_type = Q(assessment_results__assessment__assessment_type=assessment_type)
+        annotations[f'{assessment_type}_score'] = Avg('assessment_results__percentage', filter=of_type)
+        annotations[f'{assessment_type}_assessments'] = Count('assessment_results', filter=of_type)
+
+    latest_analytics = StudentAnalytics.objects.filter(student=OuterRef('pk')).order_by('-date')
+    annotations['latest_attendance_rate'] = Subquery(latest_analytics.values('attendance_rate')[:1])
+
+    return students.order_by().annotate(**annotations).order_by('id').values_list(*_QUERY_FIELDS)
+
+
+def _feature_rows(rows, today: date):
+    for (student_id, birth_date, gender, grade, school_type, established_year,
+         academic, psychological, physical,
+         total, academic_count, psychological_count, physical_count, attendance) in rows:
+        yield (
+            student_id,
+            calculate_age(birth_date, today),
+            1 if gender == 'M' else 0,
+            convert_grade(grade),
+            float(academic or 0),
+            float(psychological or 0),
+            float(physical or 0),
+            total,
+            academic_count,
+            psychological_count,
+            physical_count,
+            SCHOOL_TYPE_CODES.get(school_type, 1),
+            established_year,
+            DEFAULT_ENGAGEMENT_SCORE,
+            DEFAULT_ATTENDANCE_RATE if attendance is None else float(attendance),
+            DEFAULT_PARTICIPATION_SCORE,
+        )
+
+
+def build_feature_matrix(students=None, chunk_size: int = 2000) -> Tuple[np.ndarray, Tuple[str, ...]]:
+    """Feature matrix (one row per student, FEATURE_COLUMNS order) from a single query"""
+    rows = student_feature_queryset(students).iterator(chunk_size=chunk_size)
+    dtype = np.dtype([(column, 'f8') for column in FEATURE_COLUMNS])
+    records = np.fromiter(_feature_rows(rows, date.today()), dtype=dtype)
+    matrix = records.view('f8').reshape(len(records), len(FEATURE_COLUMNS))
+    return matrix, FEATURE_COLUMNS
+
+
+def build_feature_frame(students=None, chunk_size: int = 2000):
+    """Feature matrix as a DataFrame with integer student ids"""
+    import pandas as pd
+
+    matrix, columns = build_feature_matrix(students, chunk_size)
+    frame = pd.DataFrame(matrix, columns=list(columns))
+    frame['student_id'] = frame['student_id'].astype(int)
+    return frame
@@ -0,0 +1,184 @@
+"""
+Incremental updates for the served prediction models
+The performance and risk models are kept in forms that learn with partial_fit
+(a standardized SGD regressor and Gaussian naive Bayes). Each update only
+rebuilds the feature rows of students with AssessmentResult rows newer than
+the high-water mark stored in the model artifact, and feeds those rows to the
+models. Because features are per-student aggregates, a student's earlier row
+stays in the models' statistics, so a full retrain runs every
+ML_FULL_RETRAIN_INTERVAL_HOURS as a backstop.
+
+The models are written to artifacts of their own (see INCREMENTAL_ARTIFACTS),
+never to the ones initialize_ml trains, and ML_SERVE_INCREMENTAL_MODELS picks
+which of the two the registry serves.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from sklearn.linear_model import SGDRegressor
+from sklearn.naive_bayes import GaussianNB
+from sklearn.preprocessing import StandardScaler
+
+from assessments.models import AssessmentResult
+from students.models import Student
+from .feature_matrix import build_feature_frame
+from .model_registry import get_model_registry
+
+logger = logging.getLogger(__name__)
+
+RISK_CLASSES = np.array([0, 1, 2])
+
+# Passes over the data when a model is trained from scratch
+FULL_TRAINING_EPOCHS = 20
+
+# Keyed by registry name; each one stands in for a served model of model_registry.INCREMENTAL_ARTIFACTS
+INCREMENTAL_MODELS = {
+    'performance_incremental': {
+        'features': ['age', 'gender', 'grade', 'psychological_score', 'physical_score'],
+        'type': 'regression',
+    },
+    'risk_incremental': {
+        'features': ['academic_score', 'psychological_score', 'age'],
+        'type': 'classification',
+    },
+}
+
+
+class ScaledSGDRegressor:
+    """SGDRegressor on standardized features and a centred target, all learned incrementally"""
+
+    def __init__(self, random_state: int = 42):
+        self.scaler = StandardScaler()
+        self.regressor = SGDRegressor(random_state=random_state)
+        self.target_mean = 0.0
+        self.target_count = 0
+
+    def partial_fit(self, X, y, update_scaling: bool = True):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if update_scaling:
+            self.scaler.partial_fit(X)
+            self.target_count += len(y)
+            self.target_mean += (y.sum() - len(y) * self.target_mean) / self.target_count
+        self.regressor.partial_fit(self.scaler.transform(X), y - self.target_mean)
+        return self
+
+    def predict(self, X):
+        return self.regressor.predict(self.scaler.transform(np.asarray(X, dtype=float))) + self.target_mean
+
+
+def risk_labels(academic_scores) -> np.ndarray:
+    """Risk class the risk assessor is trained on: 0 low, 1 medium, 2 high"""
+    academic_scores = np.asarray(academic_scores, dtype=float)
+    return np.select([academic_scores >= 75, academic_scores >= 50], [0, 1], default=2)
+
+
+def _training_data(name: str, frame):
+    spec = INCREMENTAL_MODELS[name]
+    X = frame[spec['features']].to_numpy(dtype=float)
+    if spec['type'] == 'regression':
+        return X, frame['academic_score'].to_numpy(dtype=float)
+    return X, risk_labels(frame['academic_score'])
+
+
+def _assessed_frame(students):
+    frame = build_feature_frame(students)
+    return frame[frame['total_assessments'] > 0]
+
+
+def train_full(name: str, high_water_mark: int) -> Optional[Dict[str, Any]]:
+    """Train an incremental model from every assessed student"""
+    X, y = _training_data(name, _assessed_frame(Student.objects.all()))
+    if len(X) < 3:
+        return None
+
+    if INCREMENTAL_MODELS[name]['type'] == 'regression':
+        model = ScaledSGDRegressor()
+        model.partial_fit(X, y)
+        rng = np.random.default_rng(42)
+        for _ in range(FULL_TRAINING_EPOCHS - 1):
+            order = rng.permutation(len(X))
+            model.partial_fit(X[order], y[order], update_scaling=False)
+    else:
+        model = GaussianNB().partial_fit(X, y, classes=RISK_CLASSES)
+
+    now = timezone.now().isoformat()
+    return {
+        'model': model,
+        'features': INCREMENTAL_MODELS[name]['features'],
+        'type': INCREMENTAL_MODELS[name]['type'],
+        'incremental': True,
+        'high_water_mark': high_water_mark,
+        'samples_seen': len(X),
+        'full_trained_at': now,
+        'updated_at': now,
+    }
+
+
+def train_increment(name: str, model_info: Dict[str, Any], high_water_mark: int) -> int:
+    """Feed the models the students with results after the stored mark; returns rows consumed"""
+    student_ids = AssessmentResult.objects.filter(
+        id__gt=model_info['high_water_mark'], id__lte=high_water_mark
+    ).values_list('student_id', flat=True).distinct()
+    X, y = _training_data(name, _assessed_frame(Student.objects.filter(id__in=student_ids)))
+
+    if len(X):
+        if model_info['type'] == 'classification':
+            model_info['model'].partial_fit(X, y, classes=RISK_CLASSES)
+        else:
+            model_info['model'].partial_fit(X, y)
+        model_info['samples_seen'] += len(X)
+    model_info['high_water_mark'] = high_water_mark
+    model_info['updated_at'] = timezone.now().isoformat()
+    return len(X)
+
+
+def load_incremental_model(name: str) -> Optional[Dict[str, Any]]:
+    """The writable incremental model stored under a registry name, if the artifact holds one"""
+    path = get_model_registry().path(name)
+    try:
+        model_info = joblib.load(path)
+    except Exception:
+        return None
+    return model_info if isinstance(model_info, dict) and model_info.get('incremental') else None
+
+
+def full_retrain_due(model_info: Dict[str, Any]) -> bool:
+    full_trained_at = datetime.fromisoformat(model_info['full_trained_at'])
+    return timezone.now() - full_trained_at >= timedelta(hours=settings.ML_FULL_RETRAIN_INTERVAL_HOURS)
+
+
+def update_models(full: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Bring every incremental model up to the newest AssessmentResult and publish it to the registry"""
+    registry = get_model_registry()
+    # Rows committed after this point are picked up by the next update
+    high_water_mark = AssessmentResult.objects.aggregate(latest=Max('id'))['latest'] or 0
+    summary = {}
+
+    for name in INCREMENTAL_MODELS:
+        model_info = None if full else load_incremental_model(name)
+        if model_info is None or full_retrain_due(model_info):
+            model_info = train_full(name, high_water_mark)
+            if model_info is None:
+                summary[name] = {'mode': 'skipped', 'reason': 'not enough assessed students'}
+                continue
+            summary[name] = {'mode': 'full', 'rows': model_info['samples_seen']}
+        elif model_info['high_water_mark'] >= high_water_mark:
+            summary[name] = {'mode': 'unchanged', 'rows': 0}
+            continue
+        else:
+            summary[name] = {'mode': 'incremental', 'rows': train_increment(name, model_info, high_water_mark)}
+
+        registry.save(name, model_info)
+        summary[name]['high_water_mark'] = high_water_mark
+        logger.info(f"Updated {name}: {summary[name]}")
+
+    registry.refresh()
+    return summary
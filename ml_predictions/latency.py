@@ -0,0 +1,192 @@
+"""
+Prediction latency instrumentation
+PredictionTimer measures the stages of one prediction (feature building, model
+load, inference, persistence); LatencyMetrics aggregates them per model into
+fixed-bucket histograms and a rolling throughput for the metrics endpoint.
+latency_summary computes the same histogram from stored MLPrediction rows,
+which covers every process rather than just the current one, and
+latency_summaries groups it by model or prediction type in one query.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from django.db.models import Avg, Count, Max, Q
+
+STAGES = ('features', 'model_load', 'inference', 'persist')
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Window over which throughput is reported
+THROUGHPUT_WINDOW_SECONDS = 60
+
+
+def bucket_labels():
+    return [f'<={bound}ms' for bound in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}ms']
+
+
+class PredictionTimer:
+    """Wall-clock milliseconds spent in each stage of one prediction"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(ms, 3) for name, ms in self.stages.items()}
+
+
+class _ModelLatency:
+    __slots__ = ('buckets', 'count', 'total_ms', 'max_ms', 'stage_ms', 'recent')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.stage_ms = dict.fromkeys(STAGES, 0.0)
+        self.recent = deque()  # (monotonic time, predictions)
+
+
+class LatencyMetrics:
+    """Per-model latency histograms and throughput for this process"""
+
+    def __init__(self):
+        self._models: Dict[str, _ModelLatency] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, model_key: str, total_ms: float, stages: Optional[Dict[str, float]] = None, count: int = 1):
+        """Record count predictions that took total_ms each"""
+        index = _bucket_index(total_ms)
+        now = time.monotonic()
+        with self._lock:
+            latency = self._models.get(model_key)
+            if latency is None:
+                latency = self._models[model_key] = _ModelLatency()
+            latency.buckets[index] += count
+            latency.count += count
+            latency.total_ms += total_ms * count
+            latency.max_ms = max(latency.max_ms, total_ms)
+            for stage, ms in (stages or {}).items():
+                latency.stage_ms[stage] = latency.stage_ms.get(stage, 0.0) + ms * count
+            latency.recent.append((now, count))
+            while latency.recent and now - latency.recent[0][0] > THROUGHPUT_WINDOW_SECONDS:
+                latency.recent.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        labels = bucket_labels()
+        models = {}
+        with self._lock:
+            for model_key, latency in self._models.items():
+                recent = sum(count for at, count in latency.recent if now - at <= THROUGHPUT_WINDOW_SECONDS)
+                models[model_key] = {
+                    'count': latency.count,
+                    'avg_ms': round(latency.total_ms / latency.count, 3) if latency.count else 0.0,
+                    'max_ms': round(latency.max_ms, 3),
+                    'p50_ms': _bucket_quantile(latency.buckets, latency.count, 0.5),
+                    'p95_ms': _bucket_quantile(latency.buckets, latency.count, 0.95),
+                    'stage_avg_ms': {
+                        stage: round(ms / latency.count, 3) for stage, ms in latency.stage_ms.items()
+                    } if latency.count else {},
+                    'histogram': dict(zip(labels, latency.buckets)),
+                    'throughput_per_second': round(recent / THROUGHPUT_WINDOW_SECONDS, 3),
+                }
+        return {
+            'started_at': self.started_at,
+            'throughput_window_seconds': THROUGHPUT_WINDOW_SECONDS,
+            'models': models,
+        }
+
+
+def _bucket_index(ms: float) -> int:
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+def _bucket_quantile(buckets, count: int, quantile: float) -> Optional[float]:
+    """Upper bound of the bucket holding the quantile (None when it is the open-ended bucket)"""
+    if not count:
+        return None
+    target = quantile * count
+    seen = 0
+    for index, bucket_count in enumerate(buckets):
+        seen += bucket_count
+        if seen >= target:
+            return float(LATENCY_BUCKETS_MS[index]) if index < len(LATENCY_BUCKETS_MS) else None
+    return None
+
+
+def _latency_annotations() -> Dict[str, Any]:
+    annotations = {
+        'count': Count('id'),
+        'avg_ms': Avg('processing_time_ms'),
+        'max_ms': Max('processing_time_ms'),
+    }
+    lower = None
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        in_bucket = Q(processing_time_ms__lte=bound)
+        if lower is not None:
+            in_bucket &= Q(processing_time_ms__gt=lower)
+        annotations[f'bucket_{index}'] = Count('id', filter=in_bucket)
+        lower = bound
+    annotations[f'bucket_{len(LATENCY_BUCKETS_MS)}'] = Count('id', filter=Q(processing_time_ms__gt=lower))
+    return annotations
+
+
+def _summary(row: Dict[str, Any]) -> Dict[str, Any]:
+    buckets = [row[f'bucket_{index}'] for index in range(len(LATENCY_BUCKETS_MS) + 1)]
+    return {
+        'count': row['count'],
+        'avg_ms': round(row['avg_ms'] or 0, 3),
+        'max_ms': row['max_ms'] or 0,
+        'p50_ms': _bucket_quantile(buckets, row['count'], 0.5),
+        'p95_ms': _bucket_quantile(buckets, row['count'], 0.95),
+        'histogram': dict(zip(bucket_labels(), buckets)),
+    }
+
+
+def latency_summary(predictions) -> Dict[str, Any]:
+    """Latency histogram of a MLPrediction queryset, aggregated in one query"""
+    return _summary(predictions.order_by().aggregate(**_latency_annotations()))
+
+
+def latency_summaries(predictions, field: str, **extra) -> Dict[Any, Dict[str, Any]]:
+    """latency_summary for each value of field, in one grouped query; extra aggregates join each summary"""
+    summaries = {}
+    for row in predictions.order_by().values(field).annotate(**_latency_annotations(), **extra):
+        summaries[row[field]] = {**_summary(row), **{name: row[name] for name in extra}}
+    return summaries
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_latency_metrics() -> LatencyMetrics:
+    """Process-wide latency metrics, created on first use"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = LatencyMetrics()
+    return _metrics
@@ -0,0 +1,89 @@
+"""
+Benchmark the ML models on deterministic synthetic cohorts and check for regressions
+"""
+
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_predictions.benchmark import (
+    COHORT_SIZES, CV_FOLDS, RANDOM_STATE, benchmark_keys, compare_to_baseline, run_benchmarks
+)
+
+
+class Command(BaseCommand):
+    help = ('Time fit and predict, trace peak memory and cross-validate every pipeline model and '
+            'ml_service predictor on synthetic cohorts; fails when the run regresses against the baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=list(COHORT_SIZES), help='Cohort sizes (rows)')
+        parser.add_argument('--models', nargs='+', choices=benchmark_keys(), help='Models to benchmark (default: all)')
+        parser.add_argument('--cv-folds', type=int, default=CV_FOLDS, help='Cross-validation folds; 0 skips it')
+        parser.add_argument('--n-jobs', type=int, default=1, help='Threads per model (1 keeps timings comparable)')
+        parser.add_argument('--seed', type=int, default=RANDOM_STATE)
+        parser.add_argument('--no-memory', action='store_true', help='Skip the traced peak memory run')
+        parser.add_argument('--output', help='Write the JSON report here')
+        parser.add_argument('--baseline', default=settings.ML_BENCHMARK_BASELINE_PATH)
+        parser.add_argument('--update-baseline', action='store_true', help='Store this run as the baseline')
+        parser.add_argument('--time-tolerance', type=float, default=0.25,
+                            help='Allowed slowdown (and memory growth) as a fraction of the baseline')
+        parser.add_argument('--score-tolerance', type=float, default=0.02, help='Allowed absolute score drop')
+
+    def handle(self, *args, **options):
+        report = run_benchmarks(
+            sizes=options['sizes'],
+            keys=options['models'],
+            cv_folds=options['cv_folds'],
+            n_jobs=options['n_jobs'],
+            memory=not options['no_memory'],
+            seed=options['seed'],
+            progress=self._progress,
+        )
+
+        if options['output']:
+            self._write(options['output'], report)
+
+        if options['update_baseline']:
+            self._write(options['baseline'], report)
+            return
+
+        baseline_path = Path(options['baseline'])
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f"No baseline at {baseline_path}; run with --update-baseline"))
+            return
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('environment') != report['environment']:
+            self.stdout.write(self.style.WARNING('Baseline was recorded in a different environment'))
+
+        regressions = compare_to_baseline(
+            report, baseline, options['time_tolerance'], options['score_tolerance']
+        )
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(
+                f"{regression['model']} @ {regression['rows']} rows: {regression['field']} "
+                f"{regression['baseline']} -> {regression['current']}"
+            ))
+        if regressions:
+            raise CommandError(f"{len(regressions)} regressions against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline_path}"))
+
+    def _progress(self, key, rows, result):
+        if result['status'] != 'ok':
+            self.stdout.write(self.style.WARNING(f"{key:<20} {rows:>7} rows  {result['status']}: {result['reason']}"))
+            return
+        score = result.get('cv_score_mean', result['test_score'])
+        self.stdout.write(
+            f"{key:<20} {rows:>7} rows  fit {result['fit_seconds']:>8.3f}s  "
+            f"predict {result['predict_us_per_row']:>9.2f}us/row  "
+            f"peak {result.get('peak_memory_mb', 0):>8.1f}MB  score {score if score is not None else '-'}"
+        )
+
+    def _write(self, path, report):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
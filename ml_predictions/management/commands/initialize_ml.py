@@ -19,13 +19,17 @@ class Command(BaseCommand):
             # Import the ML predictor
             from ml_predictions.advanced_ml_views import AdvancedMLPredictor
             
-            # Initialize and train models
+            # Train models offline and publish them to the model registry
             ml_predictor = AdvancedMLPredictor()
-            ml_predictor.load_or_train_models()
+            ml_predictor.train_models_with_current_data()
+            saved = ml_predictor.save_models()
             
             self.stdout.write(
                 self.style.SUCCESS(f'✅ ML Models initialized successfully!')
             )
+            self.stdout.write(
+                self.style.SUCCESS(f'💾 Saved {len(saved)} model artifacts: {", ".join(saved) or "none"}')
+            )
             self.stdout.write(
                 self.style.SUCCESS(f'📊 Loaded {len(ml_predictor.models)} ML algorithms')
             )
@@ -0,0 +1,19 @@
+"""
+Delete expired prediction cache entries and trim the cache to its size bound
+"""
+
+from django.core.management.base import BaseCommand
+
+from ml_predictions.prediction_cache import get_prediction_cache
+
+
+class Command(BaseCommand):
+    help = 'Delete expired prediction cache entries and evict least recently used ones beyond the size bound'
+
+    def handle(self, *args, **options):
+        cache = get_prediction_cache()
+        expired = cache.sweep()
+        stats = cache.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {expired} expired and {stats['evicted']} evicted entries; {stats['entries']} remain"
+        ))
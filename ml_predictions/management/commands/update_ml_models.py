@@ -0,0 +1,20 @@
+"""
+Incrementally update the served prediction models from new assessment results
+"""
+
+from django.core.management.base import BaseCommand
+
+from ml_predictions.incremental_learning import update_models
+
+
+class Command(BaseCommand):
+    help = ('Update the performance and risk models with assessment results recorded since the last run; '
+            'schedule hourly. Falls back to a full retrain when one is due.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Retrain from every student instead of updating')
+
+    def handle(self, *args, **options):
+        summary = update_models(full=options['full'])
+        for name, result in summary.items():
+            self.stdout.write(self.style.SUCCESS(f"{name}: {result}"))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:44
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_predictions', '0003_batch_prediction_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='predictioncache',
+            name='hit_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='predictioncache',
+            name='last_accessed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='predictioncache',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
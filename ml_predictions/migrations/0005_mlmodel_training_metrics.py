@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_predictions', '0004_prediction_cache_lru'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlmodel',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='training_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='mlmodel',
+            name='model_type',
+            field=models.CharField(choices=[('neural_network', 'Neural Network'), ('random_forest', 'Random Forest'), ('svm', 'Support Vector Machine'), ('linear_regression', 'Linear Regression'), ('logistic_regression', 'Logistic Regression'), ('gradient_boosting', 'Gradient Boosting'), ('decision_tree', 'Decision Tree'), ('knn', 'K-Nearest Neighbors'), ('naive_bayes', 'Naive Bayes'), ('ensemble', 'Ensemble')], max_length=20),
+        ),
+    ]
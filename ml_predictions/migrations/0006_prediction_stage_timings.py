@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_predictions', '0005_mlmodel_training_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlprediction',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_predictions', '0006_prediction_stage_timings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlprediction',
+            name='ml_model',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='predictions', to='ml_predictions.mlmodel'),
+        ),
+        migrations.AlterField(
+            model_name='mlmodel',
+            name='version',
+            field=models.CharField(max_length=50),
+        ),
+    ]
@@ -0,0 +1,243 @@
+"""
+Process-wide registry of trained prediction models
+Each artifact is loaded once per process with joblib memory mapping, so forked
+workers share the model arrays, and is swapped in place when the file on disk
+changes. Models are trained offline (see the initialize_ml command); the
+request path only ever loads them.
+
+The incremental models kept by update_ml_models have artifacts of their own.
+With ML_SERVE_INCREMENTAL_MODELS they are served under the same names as the
+fully trained models, which take over whenever no incremental artifact exists.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import joblib
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Registry name -> artifact file inside ML_MODEL_DIR
+MODEL_ARTIFACTS = {
+    'performance_predictor': 'performance_random_forest.pkl',
+    'risk_assessor': 'risk_xgboost.pkl',
+    'career_recommender': 'career_lightgbm.pkl',
+    'performance_incremental': 'performance_incremental.pkl',
+    'risk_incremental': 'risk_incremental.pkl',
+}
+
+# Served name -> registry name of its incremental counterpart (see incremental_learning)
+INCREMENTAL_ARTIFACTS = {
+    'performance_predictor': 'performance_incremental',
+    'risk_assessor': 'risk_incremental',
+}
+
+# Layout assumed for artifacts that hold a bare estimator instead of a model info dict
+ARTIFACT_DEFAULTS = {
+    'performance_predictor': {
+        'features': ['age', 'gender', 'grade', 'psychological_score', 'physical_score'],
+        'type': 'regression',
+    },
+    'risk_assessor': {
+        'features': ['academic_score', 'psychological_score', 'age'],
+        'type': 'classification',
+    },
+}
+
+# Statistical models served when no trained artifact is available
+FALLBACK_MODELS = {
+    'performance_predictor': {
+        'type': 'simple_regression',
+        'coefficients': [0.6, 0.3, 0.1]  # Academic, Psychological, Physical weights
+    },
+    'risk_assessor': {
+        'type': 'rule_based',
+        'thresholds': {'low': 75, 'medium': 50}
+    },
+}
+
+# Estimator class -> MLModel.model_type and the label shown on predictions
+ESTIMATORS = {
+    'RandomForestRegressor': ('random_forest', 'Random Forest ML'),
+    'RandomForestClassifier': ('random_forest', 'Random Forest Classifier'),
+    'LinearRegression': ('linear_regression', 'Linear Regression'),
+    'SGDRegressor': ('linear_regression', 'SGD Regressor'),
+    'ScaledSGDRegressor': ('linear_regression', 'Incremental SGD Regressor'),
+    'LogisticRegression': ('logistic_regression', 'Logistic Regression'),
+    'GaussianNB': ('naive_bayes', 'Gaussian Naive Bayes'),
+    'XGBClassifier': ('gradient_boosting', 'XGBoost Classifier'),
+    'LGBMClassifier': ('gradient_boosting', 'LightGBM Classifier'),
+}
+
+
+def model_type_of(model_info: Optional[Dict[str, Any]]) -> str:
+    """Kind of model a registry entry serves: its estimator's type, or the fallback's own type"""
+    if not model_info:
+        return 'rule_based'
+    if 'model' not in model_info:
+        return model_info['type']
+    return ESTIMATORS.get(type(model_info['model']).__name__, ('unknown', None))[0]
+
+
+def model_label(model_info: Dict[str, Any]) -> str:
+    """Name of the estimator a registry entry holds, for the model_type of its predictions"""
+    name = type(model_info['model']).__name__
+    return ESTIMATORS.get(name, (None, name))[1]
+
+
+def _file_version(path: str) -> Optional[Tuple[int, int]]:
+    """Identify an artifact revision by its modification time and size"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ModelRegistry:
+    """Loads model artifacts once and hot-swaps them when their file changes"""
+
+    def __init__(self, directory: str, artifacts: Dict[str, str] = None, reload_interval: float = 30,
+                 serve_incremental: bool = False):
+        self.directory = directory
+        self.artifacts = dict(artifacts or MODEL_ARTIFACTS)
+        self.reload_interval = reload_interval
+        self.serve_incremental = serve_incremental
+        self._models: Mapping[str, Dict[str, Any]] = MappingProxyType({})
+        self._loaded: Dict[str, Dict[str, Any]] = {}
+        self._served: Dict[str, Optional[str]] = {}  # Served name -> artifact behind it, None for a fallback
+        self._versions: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, self.artifacts[name])
+
+    def models(self) -> Mapping[str, Dict[str, Any]]:
+        """Current read-only model mapping, reloading changed artifacts at most every reload_interval"""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.reload_interval:
+            self.refresh()
+        return self._models
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.models().get(name)
+
+    def versions(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        return dict(self._versions)
+
+    def version(self, name: str) -> Optional[Tuple[int, int]]:
+        """Revision of the artifact currently served under name, checking for changes like models()"""
+        self.models()
+        served = self._served.get(name)
+        return self._versions.get(served) if served else None
+
+    def candidates(self, name: str) -> Tuple[str, ...]:
+        """Artifacts that may serve name, in order of preference"""
+        incremental = INCREMENTAL_ARTIFACTS.get(name)
+        if self.serve_incremental and incremental in self.artifacts:
+            return incremental, name
+        return (name,)
+
+    def refresh(self) -> bool:
+        """Reload every artifact whose file changed; returns whether anything was swapped"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            loaded = dict(self._loaded)
+            changed = False
+
+            for name in self.artifacts:
+                path = self.path(name)
+                version = _file_version(path)
+                if name in self._versions and version == self._versions[name]:
+                    continue
+
+                # A broken artifact is only retried once its file changes again
+                model_info = self._load(name, path) if version else None
+                if model_info is None:
+                    loaded.pop(name, None)
+                    if version:
+                        logger.warning(f"Ignoring {name}; artifact {path} is unusable")
+                else:
+                    loaded[name] = model_info
+                self._versions[name] = version
+                changed = True
+
+            if changed:
+                self._loaded = loaded
+                models, served = {}, {}
+                incremental = set(INCREMENTAL_ARTIFACTS.values())
+                for name in self.artifacts:
+                    if name in incremental:
+                        continue
+                    served[name] = next((artifact for artifact in self.candidates(name) if artifact in loaded), None)
+                    model_info = loaded[served[name]] if served[name] else FALLBACK_MODELS.get(name)
+                    if model_info is not None:
+                        models[name] = model_info
+                self._served = served
+                # Readers keep whichever mapping they already hold; the swap is a single assignment
+                self._models = MappingProxyType(models)
+            return changed
+
+    def _load(self, name: str, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            artifact = joblib.load(path, mmap_mode='r')
+        except Exception as e:
+            logger.warning(f"Could not load model artifact {path}: {e}")
+            return None
+
+        if isinstance(artifact, dict) and 'model' in artifact:
+            model_info = dict(artifact)
+        elif name in ARTIFACT_DEFAULTS:
+            model_info = {'model': artifact, **ARTIFACT_DEFAULTS[name]}
+        else:
+            model_info = {'model': artifact, 'type': 'unknown'}
+        logger.info(f"Loaded model {name} from {path}")
+        return model_info
+
+    def save(self, name: str, model_info: Dict[str, Any]) -> str:
+        """Write an artifact atomically so running processes swap to it on their next check"""
+        path = self.path(name)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            # Uncompressed, so numpy arrays inside the model can be memory mapped on load
+            joblib.dump(model_info, temp_path)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return path
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Process-wide model registry, created on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry(
+                    settings.ML_MODEL_DIR,
+                    reload_interval=settings.ML_MODEL_RELOAD_INTERVAL,
+                    serve_incremental=settings.ML_SERVE_INCREMENTAL_MODELS
+                )
+    return _registry
+
+
+def reset_model_registry() -> None:
+    """Drop the registry so the next call reloads every artifact"""
+    global _registry
+    with _registry_lock:
+        _registry = None
@@ -25,7 +25,10 @@ class MLPrediction(models.Model):
     prediction_result = models.JSONField()  # ML prediction output
     confidence_score = models.DecimalField(max_digits=5, decimal_places=2, default=0.0)
     model_version = models.CharField(max_length=50, default='v1.0')
+    # Model revision that served the prediction (see batch_inference.serving_model)
+    ml_model = models.ForeignKey('MLModel', on_delete=models.SET_NULL, null=True, blank=True, related_name='predictions')
     processing_time_ms = models.IntegerField(default=0)
+    stage_timings = models.JSONField(default=dict, blank=True)  # ms per stage: features, model_load, inference, persist
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -46,13 +49,19 @@ class MLModel(models.Model):
         ('linear_regression', 'Linear Regression'),
         ('logistic_regression', 'Logistic Regression'),
         ('gradient_boosting', 'Gradient Boosting'),
+        ('decision_tree', 'Decision Tree'),
+        ('knn', 'K-Nearest Neighbors'),
+        ('naive_bayes', 'Naive Bayes'),
+        ('ensemble', 'Ensemble'),
     ]
     
     name = models.CharField(max_length=100)
     model_type = models.CharField(max_length=20, choices=MODEL_TYPE_CHOICES)
-    version = models.CharField(max_length=20)
+    version = models.CharField(max_length=50)
     file_path = models.CharField(max_length=255)
     accuracy_score = models.DecimalField(max_digits=5, decimal_places=2, default=0.0)
+    training_seconds = models.FloatField(null=True, blank=True)
+    metrics = models.JSONField(default=dict, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -68,9 +77,11 @@ class MLModel(models.Model):
 class PredictionCache(models.Model):
     """Cache for ML predictions to improve performance."""
     
-    cache_key = models.CharField(max_length=255, unique=True)
+    cache_key = models.CharField(max_length=255, unique=True)  # student:type:model version:input hash
     prediction_data = models.JSONField()
-    expires_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+    last_accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    hit_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -82,3 +93,39 @@ class PredictionCache(models.Model):
     
     def is_expired(self):
         return timezone.now() > self.expires_at
+
+
+class BatchPredictionJob(models.Model):
+    """Background batch prediction run over a set of students."""
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    prediction_type = models.CharField(max_length=30)
+    student_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_students = models.IntegerField(default=0)
+    processed_students = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='batch_prediction_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'batch_prediction_jobs'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.prediction_type} batch #{self.pk} - {self.status}"
+    
+    @property
+    def progress(self):
+        if not self.total_students:
+            return 100 if self.status == 'completed' else 0
+        return round(100 * self.processed_students / self.total_students)
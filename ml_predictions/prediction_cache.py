@@ -0,0 +1,175 @@
+"""
+Read-through cache for ML predictions
+Entries are keyed by student, prediction type, model version and a hash of the
+input features, so a model swap or changed inputs miss naturally. Entries
+expire after PREDICTION_CACHE_TTL, the table is bounded to
+PREDICTION_CACHE_MAX_ENTRIES with least-recently-used eviction, and expired
+rows are swept periodically.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PredictionCache
+
+logger = logging.getLogger(__name__)
+
+# Registry model behind each prediction type; others are rule based
+PREDICTION_MODELS = {
+    'performance_forecast': 'performance_predictor',
+    'risk_assessment': 'risk_assessor',
+}
+
+# Inserts between checks of the table size
+TRIM_CHECK_EVERY = 50
+
+
+def input_hash(inputs: Dict[str, Any]) -> str:
+    """Stable hash of the feature values a prediction was made from"""
+    payload = json.dumps(inputs, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def model_version_for(prediction_type: str) -> str:
+    """Version of the model serving a prediction type, changing whenever its artifact is swapped"""
+    from .model_registry import get_model_registry
+
+    model_name = PREDICTION_MODELS.get(prediction_type)
+    if not model_name:
+        return 'rules'
+    version = get_model_registry().version(model_name)
+    return f"{version[0]}-{version[1]}" if version else 'fallback'
+
+
+class PredictionCacheStore:
+    """Read-through prediction cache on the PredictionCache table with hit/miss counters"""
+
+    def __init__(self, ttl: int, max_entries: int, sweep_interval: float):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._counters = {'hits': 0, 'misses': 0, 'evicted': 0, 'expired': 0}
+        self._lock = threading.Lock()
+        self._inserts_since_trim = 0
+        self._last_sweep = time.monotonic()
+
+    @staticmethod
+    def make_key(student_id, prediction_type: str, model_version: str, inputs: Dict[str, Any]) -> str:
+        return f"{student_id}:{prediction_type}:{model_version}:{input_hash(inputs)}"
+
+    def get_or_compute(self, student_id, prediction_type: str, inputs: Dict[str, Any],
+                       compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Cached prediction for these inputs, running compute() only on a miss"""
+        key = self.make_key(student_id, prediction_type, model_version_for(prediction_type), inputs)
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        prediction_data = compute()
+        self.put(key, prediction_data)
+        return prediction_data
+
+    def get(self, key: str):
+        now = timezone.now()
+        entry = PredictionCache.objects.filter(cache_key=key, expires_at__gt=now).values_list('pk', 'prediction_data').first()
+        if entry is None:
+            self._count('misses')
+            return None
+
+        pk, prediction_data = entry
+        # Recency drives LRU eviction
+        PredictionCache.objects.filter(pk=pk).update(last_accessed_at=now, hit_count=F('hit_count') + 1)
+        self._count('hits')
+        return prediction_data
+
+    def put(self, key: str, prediction_data: Dict[str, Any]):
+        now = timezone.now()
+        PredictionCache.objects.update_or_create(
+            cache_key=key,
+            defaults={
+                'prediction_data': prediction_data,
+                'expires_at': now + timedelta(seconds=self.ttl),
+                'last_accessed_at': now,
+                'hit_count': 0,
+            }
+        )
+
+        with self._lock:
+            self._inserts_since_trim += 1
+            trim = self._inserts_since_trim >= TRIM_CHECK_EVERY
+            if trim:
+                self._inserts_since_trim = 0
+        if trim:
+            self.trim()
+        self._maybe_sweep()
+
+    def trim(self) -> int:
+        """Evict least recently used entries beyond max_entries"""
+        excess = PredictionCache.objects.count() - self.max_entries
+        if excess <= 0:
+            return 0
+        stale = list(PredictionCache.objects.order_by('last_accessed_at').values_list('pk', flat=True)[:excess])
+        deleted, _ = PredictionCache.objects.filter(pk__in=stale).delete()
+        self._count('evicted', deleted)
+        return deleted
+
+    def sweep(self) -> int:
+        """Delete expired entries, then trim to the size bound"""
+        deleted, _ = PredictionCache.objects.filter(expires_at__lte=timezone.now()).delete()
+        self._count('expired', deleted)
+        self.trim()
+        return deleted
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        try:
+            self.sweep()
+        except Exception as e:
+            logger.warning(f"Prediction cache sweep failed: {e}")
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for this process plus the current table size"""
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = round(counters['hits'] / lookups, 3) if lookups else 0.0
+        counters['entries'] = PredictionCache.objects.count()
+        counters['max_entries'] = self.max_entries
+        return counters
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache() -> PredictionCacheStore:
+    """Process-wide prediction cache, created on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCacheStore(
+                    ttl=settings.PREDICTION_CACHE_TTL,
+                    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+                    sweep_interval=settings.PREDICTION_CACHE_SWEEP_INTERVAL
+                )
+    return _cache
@@ -1,3 +1,431 @@
-from django.test import TestCase
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from assessments.models import Assessment, AssessmentResult
+from data_analytics.models import StudentAnalytics
+from students.models import Parent, School, Student, User
+
+from .batch_inference import BATCH_PREDICTION_TYPES, MODEL_VERSION, predict_and_store, process_batch_job
+from .benchmark import compare_to_baseline, run_benchmarks
+from .feature_matrix import DEFAULT_ATTENDANCE_RATE, build_feature_frame
+from .incremental_learning import update_models
+from .model_registry import FALLBACK_MODELS, ModelRegistry, get_model_registry, reset_model_registry
+from .models import BatchPredictionJob, MLModel, MLPrediction, PredictionCache
+from .prediction_cache import PredictionCacheStore, model_version_for
+from .training_pipeline import (
+    DATASET_COLUMNS, TrainingOrchestrator, add_training_targets, fit_model, prepare_training_data,
+    record_training_results
+)
+
+
+def create_student(school, parent, index, percentages=(), analytics=True):
+    """Student with one completed result per (assessment, percentage) and optionally an analytics row"""
+    user = User.objects.create_user(username=f'student{index}', password='x', role='student')
+    student = Student.objects.create(
+        user=user, school=school, parent=parent, grade='10', section='A', roll_number=f'R{index}',
+        admission_date=date(2020, 6, 1), date_of_birth=date(2009, 3, 1), gender='M' if index % 2 else 'F',
+        emergency_contact='0000000000'
+    )
+    for assessment, percentage in percentages:
+        AssessmentResult.objects.create(
+            student=student, assessment=assessment, score=percentage, percentage=percentage,
+            completed=True, completed_at=timezone.now()
+        )
+    if analytics:
+        StudentAnalytics.objects.create(
+            student=student, date=date.today(), academic_score=70 + index, attendance_rate=90,
+            wellbeing_score=65, fitness_score=72
+        )
+    return student
+
+
+class MLTestData(TestCase):
+    """A school with a few students who have academic and psychological results"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', password='x', role='admin', is_staff=True)
+        parent_user = User.objects.create_user(username='parent', password='x', role='parent')
+        cls.parent = Parent.objects.create(user=parent_user, occupation='Engineer', education_level='Graduate')
+        cls.school = School.objects.create(
+            name='Test School', address='1 Road', phone='0000000000', email='school@example.com',
+            principal_name='Principal', established_year=1990, school_type='CBSE'
+        )
+        cls.academic = Assessment.objects.create(
+            title='Maths', description='', assessment_type='academic', grade='10', created_by=cls.staff
+        )
+        cls.psychological = Assessment.objects.create(
+            title='Wellbeing', description='', assessment_type='psychological', grade='10', created_by=cls.staff
+        )
+        cls.students = [
+            create_student(cls.school, cls.parent, 1, [(cls.academic, 85), (cls.psychological, 70)]),
+            create_student(cls.school, cls.parent, 2, [(cls.academic, 55)]),
+            create_student(cls.school, cls.parent, 3, analytics=False),
+        ]
+
+    def run_job(self, prediction_type):
+        job = BatchPredictionJob.objects.create(
+            prediction_type=prediction_type,
+            student_ids=[student.id for student in self.students],
+            total_students=len(self.students)
+        )
+        process_batch_job(job)
+        job.refresh_from_db()
+        return job
+
+
+class BatchPredictionJobTests(MLTestData):
+
+    @mock.patch.dict(sys.modules, {'xgboost': None, 'lightgbm': None})
+    @mock.patch('ml_predictions.views.ADVANCED_ML_AVAILABLE', False)
+    def test_every_type_completes_without_the_advanced_engine(self):
+        for prediction_type in BATCH_PREDICTION_TYPES:
+            with self.subTest(prediction_type=prediction_type):
+                job = self.run_job(prediction_type)
+                self.assertEqual(job.status, 'completed', job.error_message)
+                self.assertEqual(job.created_count, len(self.students))
+                self.assertEqual(job.progress, 100)
+                self.assertEqual(
+                    MLPrediction.objects.filter(prediction_type=prediction_type).count(), len(self.students)
+                )
+
+    @mock.patch('ml_predictions.views.ADVANCED_ML_AVAILABLE', False)
+    def test_standard_batch_matches_single_student_predictions(self):
+        from .views import generate_risk_assessment
+
+        self.run_job('risk_assessment')
+        for student in self.students:
+            prediction = MLPrediction.objects.get(student=student, prediction_type='risk_assessment')
+            self.assertEqual(prediction.prediction_result, generate_risk_assessment(student))
+
+    def test_unknown_type_fails_the_job(self):
+        job = self.run_job('horoscope')
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('Unknown prediction type', job.error_message)
+
+
+@mock.patch('ml_predictions.views.ADVANCED_ML_AVAILABLE', False)
+class ModelLatencyTests(MLTestData):
+
+    def generate_prediction(self, student, prediction_type):
+        from .views import generate_prediction
+
+        request = RequestFactory().post('/', {'prediction_type': prediction_type})
+        request.user = self.staff
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        with mock.patch('ml_predictions.views.redirect'):
+            generate_prediction(request, student.id)
+
+    def test_single_and_batch_predictions_count_towards_their_model(self):
+        MLModel.objects.create(name='Legacy', model_type='random_forest', version=MODEL_VERSION, file_path='y')
+        self.run_job('risk_assessment')
+        self.generate_prediction(self.students[0], 'risk_assessment')
+        self.run_job('learning_style')
+
+        risk_model = MLModel.objects.get(name='Risk Assessment Model')
+        self.assertEqual(risk_model.version, model_version_for('risk_assessment'))
+        self.assertEqual(risk_model.predictions.count(), len(self.students) + 1)
+        self.assertEqual(
+            set(MLPrediction.objects.filter(ml_model=risk_model).values_list('model_version', flat=True)),
+            {risk_model.version}
+        )
+
+        self.client.force_login(self.staff)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('ml_predictions:models_api'))
+        models = {entry['name']: entry for entry in response.json()['models']}
+        self.assertEqual(models['Risk Assessment Model']['prediction_count'], len(self.students) + 1)
+        self.assertEqual(models['Risk Assessment Model']['latency']['count'], len(self.students) + 1)
+        self.assertEqual(models['Learning Style Model']['latency']['count'], len(self.students))
+        self.assertEqual(models['Legacy']['latency']['count'], 0)
+        # The models and one grouped aggregate, whatever the number of models
+        ml_queries = [query['sql'] for query in queries if '"ml_' in query['sql']]
+        self.assertEqual(len(ml_queries), 2, ml_queries)
+
+        # The page's template is not part of this app yet
+        with mock.patch('ml_predictions.views.render', return_value=HttpResponse()) as render:
+            self.client.get(reverse('ml_predictions:model_details', args=[risk_model.id]))
+        context = render.call_args.args[2]
+        self.assertEqual(context['prediction_count'], len(self.students) + 1)
+        self.assertEqual(context['latency']['count'], len(self.students) + 1)
+
+    def test_an_artifact_swap_is_a_new_model(self):
+        self.run_job('risk_assessment')
+        with mock.patch('ml_predictions.batch_inference.model_version_for', return_value='retrained'):
+            self.run_job('risk_assessment')
+        self.assertEqual(
+            sorted(MLModel.objects.filter(name='Risk Assessment Model').values_list('version', flat=True)),
+            sorted([model_version_for('risk_assessment'), 'retrained'])
+        )
+        for model in MLModel.objects.all():
+            self.assertEqual(model.predictions.count(), len(self.students))
+
+
+class TemporaryModelDirMixin:
+    """Points ML_MODEL_DIR at a scratch directory and gives the test a fresh registry"""
+
+    def setUp(self):
+        super().setUp()
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir, ignore_errors=True)
+        self.enterContext(override_settings(ML_MODEL_DIR=self.model_dir, ML_MODEL_RELOAD_INTERVAL=0))
+        reset_model_registry()
+        self.addCleanup(reset_model_registry)
+
+
+class AdvancedBatchInferenceTests(TemporaryModelDirMixin, MLTestData):
+    """Batch jobs on a default install, where the advanced engine imports"""
+
+    def setUp(self):
+        super().setUp()
+        features = ['academic_score', 'psychological_score', 'physical_score']
+        X = np.random.default_rng(0).uniform(40, 100, size=(60, 3))
+        registry = get_model_registry()
+        registry.save('performance_predictor', {
+            'model': LinearRegression().fit(X, X.mean(axis=1)), 'features': features, 'type': 'regression'
+        })
+        registry.save('risk_assessor', {
+            'model': LogisticRegression().fit(X, np.digitize(X.mean(axis=1), [60, 80])), 'features': features,
+            'type': 'classification'
+        })
+
+    def test_advanced_engine_is_importable(self):
+        from . import views
+
+        self.assertTrue(views.ADVANCED_ML_AVAILABLE)
+
+    def test_each_chunk_is_one_model_call(self):
+        for prediction_type, model_class in (
+            ('performance_forecast', LinearRegression), ('risk_assessment', LogisticRegression)
+        ):
+            with self.subTest(prediction_type=prediction_type), \
+                    mock.patch('ml_predictions.batch_inference.standard_batch') as standard, \
+                    mock.patch.object(model_class, 'predict', autospec=True, side_effect=model_class.predict) as predict:
+                job = self.run_job(prediction_type)
+                self.assertEqual(job.status, 'completed', job.error_message)
+                self.assertEqual(job.created_count, len(self.students))
+                self.assertEqual(predict.call_count, 1)
+                standard.assert_not_called()
+
+    def test_queries_do_not_grow_with_the_chunk(self):
+        more_students = self.students + [create_student(self.school, self.parent, index) for index in range(4, 10)]
+        for prediction_type in ('performance_forecast', 'risk_assessment', 'career_recommendation'):
+            # The serving model row is created by the first chunk
+            predict_and_store(prediction_type, [self.students[0].id])
+            counts = []
+            for students in (self.students, more_students):
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(predict_and_store(prediction_type, [s.id for s in students]), len(students))
+                counts.append(len(queries))
+            with self.subTest(prediction_type=prediction_type):
+                self.assertEqual(counts[0], counts[1])
+
+
+class FeatureMatrixTests(MLTestData):
+
+    def test_one_query_builds_every_row(self):
+        with self.assertNumQueries(1):
+            frame = build_feature_frame().set_index('student_id')
+
+        first, second, third = (frame.loc[student.id] for student in self.students)
+        self.assertEqual((first['academic_score'], first['psychological_score'], first['total_assessments']), (85, 70, 2))
+        self.assertEqual((second['academic_score'], second['academic_assessments']), (55, 1))
+        self.assertEqual(first['attendance_rate'], 90)
+        self.assertEqual((third['total_assessments'], third['attendance_rate']), (0, DEFAULT_ATTENDANCE_RATE))
+        self.assertEqual(first['grade'], 12)
+
+    def test_latest_analytics_row_wins(self):
+        StudentAnalytics.objects.create(
+            student=self.students[0], date=date.today() - timedelta(days=30), academic_score=50, attendance_rate=40,
+            wellbeing_score=50, fitness_score=50
+        )
+        frame = build_feature_frame(Student.objects.filter(pk=self.students[0].pk))
+        self.assertEqual(frame['attendance_rate'].tolist(), [90])
+
+
+class ModelRegistryTests(TemporaryModelDirMixin, TestCase):
+
+    def test_serves_fallbacks_until_an_artifact_is_saved(self):
+        registry = ModelRegistry(self.model_dir, reload_interval=0)
+        self.assertEqual(registry.get('risk_assessor'), FALLBACK_MODELS['risk_assessor'])
+        self.assertIsNone(registry.get('career_recommender'))
+
+        registry.save('risk_assessor', {'model': np.arange(3), 'features': ['academic_score'], 'type': 'classification'})
+        model_info = registry.get('risk_assessor')
+        self.assertEqual(model_info['features'], ['academic_score'])
+        self.assertIsNotNone(registry.versions()['risk_assessor'])
+        self.assertEqual(os.listdir(self.model_dir), ['risk_xgboost.pkl'])
+
+    def test_models_are_loaded_once_until_their_file_changes(self):
+        registry = ModelRegistry(self.model_dir, reload_interval=0)
+        registry.save('risk_assessor', {'model': 1, 'features': [], 'type': 'classification'})
+        loaded = registry.models()
+        self.assertFalse(registry.refresh())
+        self.assertIs(registry.models(), loaded)
+
+        with open(registry.path('risk_assessor'), 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertTrue(registry.refresh())
+        self.assertEqual(registry.get('risk_assessor'), FALLBACK_MODELS['risk_assessor'])
+
+    def test_bare_estimators_get_the_default_layout(self):
+        registry = ModelRegistry(self.model_dir, reload_interval=0)
+        joblib.dump('estimator', registry.path('performance_predictor'))
+        self.assertEqual(registry.get('performance_predictor')['type'], 'regression')
+
+    def test_registry_is_process_wide(self):
+        self.assertIs(get_model_registry(), get_model_registry())
+        self.assertEqual(get_model_registry().directory, self.model_dir)
+
+
+class PredictionCacheTests(TestCase):
+
+    def setUp(self):
+        self.cache = PredictionCacheStore(ttl=60, max_entries=2, sweep_interval=3600)
+        self.compute = mock.Mock(side_effect=lambda: {'score': self.compute.call_count})
+
+    def predict(self, student_id, inputs):
+        return self.cache.get_or_compute(student_id, 'career_recommendation', inputs, self.compute)
+
+    def test_read_through(self):
+        self.assertEqual(self.predict(1, {'academic': 80}), {'score': 1})
+        self.assertEqual(self.predict(1, {'academic': 80}), {'score': 1})
+        self.assertEqual(self.predict(1, {'academic': 81}), {'score': 2})
+        self.assertEqual(self.compute.call_count, 2)
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 2, 2))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for student_id in (1, 2, 3):
+            self.predict(student_id, {})
+        PredictionCache.objects.filter(cache_key__startswith='2:').update(last_accessed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.cache.trim(), 1)
+        self.assertEqual(
+            sorted(key.split(':')[0] for key in PredictionCache.objects.values_list('cache_key', flat=True)), ['1', '3']
+        )
+
+    def test_expired_entries_miss_and_are_swept(self):
+        self.predict(1, {})
+        PredictionCache.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.predict(1, {})
+        self.assertEqual(self.compute.call_count, 2)
+        PredictionCache.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.cache.sweep(), 1)
+        self.assertFalse(PredictionCache.objects.exists())
+
+
+class IncrementalLearningTests(TemporaryModelDirMixin, MLTestData):
+
+    @override_settings(ML_FULL_RETRAIN_INTERVAL_HOURS=24)
+    def test_full_training_then_increments(self):
+        create_student(self.school, self.parent, 4, [(self.academic, 95), (self.psychological, 88)])
+        summary = update_models()
+        self.assertEqual(summary['performance_incremental']['mode'], 'full')
+        self.assertEqual(summary['risk_incremental']['rows'], 3)
+        self.assertTrue(get_model_registry().get('risk_assessor')['incremental'])
+
+        self.assertEqual(update_models()['risk_incremental']['mode'], 'unchanged')
+
+        create_student(self.school, self.parent, 5, [(self.academic, 35)])
+        summary = update_models()
+        self.assertEqual(summary['risk_incremental'], {
+            'mode': 'incremental', 'rows': 1, 'high_water_mark': AssessmentResult.objects.latest('id').id
+        })
+        self.assertEqual(get_model_registry().get('risk_assessor')['samples_seen'], 4)
+        self.assertIn(get_model_registry().get('risk_assessor')['model'].predict([[35, 0, 16]])[0], (1, 2))
+
+    def test_too_few_assessed_students_skips_training(self):
+        AssessmentResult.objects.filter(student=self.students[1]).delete()
+        self.assertEqual(update_models()['risk_incremental']['mode'], 'skipped')
+
+    def test_updates_keep_to_their_own_artifacts(self):
+        registry = get_model_registry()
+        features = ['age', 'gender', 'grade', 'psychological_score', 'physical_score']
+        X = np.random.default_rng(0).uniform(10, 100, size=(20, len(features)))
+        registry.save('performance_predictor', {
+            'model': RandomForestRegressor(n_estimators=2, random_state=0).fit(X, X[:, 3]),
+            'features': features, 'type': 'regression'
+        })
+        full_version = registry.version('performance_predictor')
+
+        create_student(self.school, self.parent, 4, [(self.academic, 95), (self.psychological, 88)])
+        update_models()
+        self.assertEqual(registry.version('performance_predictor'), registry.versions()['performance_incremental'])
+        self.assertEqual(registry.versions()['performance_predictor'], full_version)
+        self.assertEqual(
+            sorted(os.listdir(self.model_dir)),
+            ['performance_incremental.pkl', 'performance_random_forest.pkl', 'risk_incremental.pkl']
+        )
+
+        from .advanced_ml_views import ml_predictor
+        inputs = {'age': 15, 'gender': 1, 'grade': 10, 'academic_score': 80, 'psychological_score': 70, 'physical_score': 60}
+        self.assertEqual(ml_predictor.predict_performance(inputs)['model_type'], 'Incremental SGD Regressor')
+        self.assertEqual(ml_predictor.assess_risk(inputs)['model_type'], 'Gaussian Naive Bayes')
+
+        # Serving the fully trained artifacts instead
+        with override_settings(ML_SERVE_INCREMENTAL_MODELS=False):
+            reset_model_registry()
+            self.assertEqual(ml_predictor.predict_performance(inputs)['model_type'], 'Random Forest ML')
+            self.assertEqual(get_model_registry().get('risk_assessor'), FALLBACK_MODELS['risk_assessor'])
+
+
+class TrainingPipelineTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(0)
+        cls.frame = add_training_targets(pd.DataFrame(
+            rng.uniform(0, 100, size=(200, len(DATASET_COLUMNS))), columns=list(DATASET_COLUMNS)
+        ))
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_fit_model_saves_the_model_and_its_column_scaler(self):
+        result = fit_model('knn', prepare_training_data(self.frame, self.directory), self.directory, 1)
+        self.assertTrue(os.path.exists(result['artifact']))
+        self.assertEqual(result['scaler'].mean_.shape, (len(result['features']),))
+        self.assertGreater(result['accuracy'], 0.5)
+
+        record, = record_training_results({'knn': result})
+        self.assertEqual((record.version, record.model_type), (MODEL_VERSION, 'knn'))
+        self.assertEqual(record.metrics['features'], list(result['features']))
+
+    def test_models_train_in_worker_processes(self):
+        orchestrator = TrainingOrchestrator(self.directory, cores=2, keys=['decision_tree', 'naive_bayes'])
+        results, errors = orchestrator.run(self.frame)
+        self.assertEqual(errors, {})
+        self.assertEqual(set(results), {'decision_tree', 'naive_bayes'})
+        self.assertTrue(all(os.path.exists(result['artifact']) for result in results.values()))
+
+    def test_benchmarks_flag_a_score_regression(self):
+        report = run_benchmarks(sizes=(200,), keys=['decision_tree', 'academic_predictor'], cv_folds=2, memory=False)
+        self.assertEqual([(result['model'], result['status']) for result in report['results']],
+                         [('decision_tree', 'ok'), ('academic_predictor', 'ok')])
+        self.assertEqual(compare_to_baseline(report, report), [])
+
+        baseline = {'results': [dict(result) for result in report['results']]}
+        baseline['results'][0]['test_score'] += 0.1
+        regression, = compare_to_baseline(report, baseline)
+        self.assertEqual((regression['model'], regression['field']), ('decision_tree', 'test_score'))
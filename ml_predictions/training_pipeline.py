@@ -0,0 +1,390 @@
+"""
+Parallel training pipeline for the advanced ML engine
+The student dataset, the train/test split and the feature scaling are computed
+once and written to a memory-mapped file; each model is then fitted in its own
+worker process from that shared data. Workers and per-model threads are sized
+from ML_TRAINING_CORES, so training takes about as long as the slowest model
+rather than the sum of all of them.
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DATASET_COLUMNS = (
+    'age', 'gender', 'grade', 'academic_score', 'psychological_score', 'physical_score',
+    'total_assessments', 'school_type', 'engagement_score', 'attendance_rate',
+)
+TARGET_COLUMNS = ('academic_score', 'risk_level', 'career_aptitude', 'performance_category')
+
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+MODEL_VERSION = '2.0'
+
+
+def performance_category(scores):
+    """Performance level: 4 excellent, 3 good, 2 average, 1 needs improvement"""
+    return np.select([scores >= 90, scores >= 75, scores >= 60], [4, 3, 2], default=1)
+
+
+def risk_level(academic, psychological):
+    """Risk level: 0 low, 1 medium, 2 high"""
+    avg_score = (academic + psychological) / 2
+    return np.select([avg_score >= 80, avg_score >= 60], [0, 1], default=2)
+
+
+def career_aptitude(academic, psychological, physical):
+    """Career aptitude category: 1 STEM, 2 social sciences, 3 sports/health, 0 general"""
+    return np.select([academic >= 85, psychological >= 80, physical >= 75], [1, 2, 3], default=0)
+
+
+def add_training_targets(df):
+    """Derive the classification targets from the score columns, in place"""
+    academic = df['academic_score'].to_numpy()
+    psychological = df['psychological_score'].to_numpy()
+    df['performance_category'] = performance_category(academic)
+    df['risk_level'] = risk_level(academic, psychological)
+    df['career_aptitude'] = career_aptitude(academic, psychological, df['physical_score'].to_numpy())
+    return df
+
+
+def _random_forest(n_jobs):
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(
+        n_estimators=100, max_depth=10, min_samples_split=5, min_samples_leaf=2,
+        random_state=RANDOM_STATE, n_jobs=n_jobs
+    )
+
+
+def _xgboost(n_jobs):
+    import xgboost as xgb
+    return xgb.XGBClassifier(
+        n_estimators=100, max_depth=6, learning_rate=0.1, subsample=0.8, colsample_bytree=0.8,
+        random_state=RANDOM_STATE, n_jobs=n_jobs
+    )
+
+
+def _lightgbm(n_jobs):
+    import lightgbm as lgb
+    return lgb.LGBMClassifier(
+        n_estimators=100, max_depth=6, learning_rate=0.1, subsample=0.8, colsample_bytree=0.8,
+        random_state=RANDOM_STATE, verbosity=-1, n_jobs=n_jobs
+    )
+
+
+def _neural_network(n_features):
+    from tensorflow.keras import layers, models
+    model = models.Sequential([
+        layers.Dense(128, activation='relu', input_shape=(n_features,)),
+        layers.Dropout(0.3),
+        layers.Dense(64, activation='relu'),
+        layers.Dropout(0.2),
+        layers.Dense(32, activation='relu'),
+        layers.Dense(1, activation='linear')  # Regression output
+    ])
+    model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+    return model
+
+
+def _svm(n_jobs):
+    from sklearn.svm import SVC
+    return SVC(kernel='rbf', C=1.0, gamma='scale', random_state=RANDOM_STATE)
+
+
+def _logistic_regression(n_jobs):
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(random_state=RANDOM_STATE, max_iter=1000)
+
+
+def _decision_tree(n_jobs):
+    from sklearn.tree import DecisionTreeClassifier
+    return DecisionTreeClassifier(max_depth=10, random_state=RANDOM_STATE)
+
+
+def _knn(n_jobs):
+    from sklearn.neighbors import KNeighborsClassifier
+    return KNeighborsClassifier(n_neighbors=5, n_jobs=n_jobs)
+
+
+def _naive_bayes(n_jobs):
+    from sklearn.naive_bayes import GaussianNB
+    return GaussianNB()
+
+
+def _ensemble(n_jobs):
+    from sklearn.ensemble import VotingClassifier
+    return VotingClassifier([
+        ('lr', _logistic_regression(n_jobs)),
+        ('dt', _decision_tree(n_jobs)),
+        ('knn', _knn(n_jobs)),
+        ('nb', _naive_bayes(n_jobs))
+    ], voting='hard')
+
+
+@dataclass(frozen=True)
+class TrainingSpec:
+    """One model of the pipeline: its estimator, data, artifacts and MLModel record"""
+    key: str
+    display_name: str
+    model_type: str
+    build: Callable
+    features: Tuple[str, ...]
+    target: str
+    task: str  # 'regression' or 'classification'
+    artifact: str
+    scaler_artifact: Optional[str] = None  # Set when the model is fitted on scaled features
+    cost: int = 1  # Relative fit time, used to start the slowest models first
+
+
+RISK_FEATURES = ('academic_score', 'psychological_score', 'attendance_rate')
+
+TRAINING_SPECS = (
+    TrainingSpec(
+        'random_forest', 'Advanced Random Forest', 'random_forest', _random_forest,
+        ('age', 'gender', 'grade', 'psychological_score', 'physical_score',
+         'total_assessments', 'school_type', 'engagement_score', 'attendance_rate'),
+        'academic_score', 'regression', 'random_forest_performance.pkl', 'random_forest_scaler.pkl', cost=8
+    ),
+    TrainingSpec(
+        'xgboost', 'XGBoost Risk Assessment', 'gradient_boosting', _xgboost,
+        ('age', 'gender', 'grade', 'academic_score', 'psychological_score',
+         'physical_score', 'attendance_rate', 'engagement_score'),
+        'risk_level', 'classification', 'xgboost_risk_assessment.pkl', cost=5
+    ),
+    TrainingSpec(
+        'lightgbm', 'LightGBM Career Predictor', 'gradient_boosting', _lightgbm,
+        ('academic_score', 'psychological_score', 'physical_score', 'age', 'gender', 'grade', 'engagement_score'),
+        'career_aptitude', 'classification', 'lightgbm_career.pkl', cost=4
+    ),
+    TrainingSpec(
+        'neural_network', 'Deep Neural Network', 'neural_network', _neural_network,
+        ('age', 'gender', 'grade', 'psychological_score', 'physical_score',
+         'total_assessments', 'engagement_score', 'attendance_rate'),
+        'academic_score', 'regression', 'neural_network_academic.h5', 'neural_network_scaler.pkl', cost=10
+    ),
+    TrainingSpec(
+        'svm', 'Support Vector Machine', 'svm', _svm,
+        ('academic_score', 'psychological_score', 'physical_score', 'age', 'gender'),
+        'performance_category', 'classification', 'svm_performance_category.pkl', 'svm_scaler.pkl', cost=6
+    ),
+    TrainingSpec(
+        'logistic_regression', 'Logistic Regression', 'logistic_regression', _logistic_regression,
+        RISK_FEATURES, 'risk_level', 'classification', 'logistic_regression_model.pkl', 'logistic_regression_scaler.pkl'
+    ),
+    TrainingSpec(
+        'decision_tree', 'Decision Tree', 'decision_tree', _decision_tree,
+        RISK_FEATURES, 'risk_level', 'classification', 'decision_tree_model.pkl'
+    ),
+    TrainingSpec(
+        'knn', 'K-Nearest Neighbors', 'knn', _knn,
+        RISK_FEATURES, 'risk_level', 'classification', 'knn_model.pkl', 'knn_scaler.pkl'
+    ),
+    TrainingSpec(
+        'naive_bayes', 'Naive Bayes', 'naive_bayes', _naive_bayes,
+        RISK_FEATURES, 'risk_level', 'classification', 'naive_bayes_model.pkl', 'naive_bayes_scaler.pkl'
+    ),
+    TrainingSpec(
+        'ensemble', 'Ensemble Classifier', 'ensemble', _ensemble,
+        RISK_FEATURES, 'risk_level', 'classification', 'ensemble_model.pkl', 'ensemble_scaler.pkl', cost=2
+    ),
+)
+
+SPECS_BY_KEY = {spec.key: spec for spec in TRAINING_SPECS}
+
+
+def prepare_training_data(df, directory: str) -> str:
+    """Split and scale the dataset once and write it where every worker can memory map it"""
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    X = np.nan_to_num(df[list(DATASET_COLUMNS)].to_numpy(dtype=float))
+    # The same split every model used to draw on its own (same row count and seed)
+    train_index, test_index = train_test_split(np.arange(len(df)), test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+    # Standard scaling is per column, so one fit serves every feature subset
+    scaler = StandardScaler().fit(X[train_index])
+    data = {
+        'X_train': X[train_index],
+        'X_test': X[test_index],
+        'X_train_scaled': scaler.transform(X[train_index]),
+        'X_test_scaled': scaler.transform(X[test_index]),
+        'scaler': scaler,
+    }
+    for target in TARGET_COLUMNS:
+        y = np.nan_to_num(df[target].to_numpy(dtype=float))
+        data[f'{target}_train'] = y[train_index]
+        data[f'{target}_test'] = y[test_index]
+
+    path = os.path.join(directory, 'training_data.joblib')
+    joblib.dump(data, path)
+    return path
+
+
+def column_scaler(scaler, columns: List[int]):
+    """StandardScaler restricted to some of the columns it was fitted on"""
+    from sklearn.preprocessing import StandardScaler
+
+    subset = StandardScaler()
+    subset.mean_ = scaler.mean_[columns]
+    subset.var_ = scaler.var_[columns]
+    subset.scale_ = scaler.scale_[columns]
+    subset.n_features_in_ = len(columns)
+    subset.n_samples_seen_ = scaler.n_samples_seen_
+    return subset
+
+
+def _limit_threads(threads: int):
+    """Worker initializer: keep BLAS/OpenMP pools inside the worker's share of the core budget"""
+    for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[variable] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+
+
+def fit_model(key: str, data_path: str, model_directory: str, n_jobs: int) -> Dict[str, Any]:
+    """Fit one model from the shared training data and save its artifacts"""
+    spec = SPECS_BY_KEY[key]
+    started = time.perf_counter()
+    data = joblib.load(data_path, mmap_mode='r')
+
+    columns = [DATASET_COLUMNS.index(feature) for feature in spec.features]
+    suffix = '_scaled' if spec.scaler_artifact else ''
+    X_train = data[f'X_train{suffix}'][:, columns]
+    X_test = data[f'X_test{suffix}'][:, columns]
+    y_train = np.asarray(data[f'{spec.target}_train'])
+    y_test = np.asarray(data[f'{spec.target}_test'])
+    if spec.task == 'classification':
+        y_train, y_test = y_train.astype(int), y_test.astype(int)
+
+    result = {
+        'key': key,
+        'features': list(spec.features),
+        'type': spec.task,
+        'artifact': os.path.join(model_directory, spec.artifact),
+        'scaler_artifact': os.path.join(model_directory, spec.scaler_artifact) if spec.scaler_artifact else None,
+    }
+
+    if key == 'neural_network':
+        model = spec.build(len(columns))
+        model.fit(X_train, y_train, epochs=50, batch_size=32, validation_split=0.2, verbose=0)
+        result['train_loss'] = float(model.evaluate(X_train, y_train, verbose=0)[0])
+        result['test_loss'] = float(model.evaluate(X_test, y_test, verbose=0)[0])
+        result['accuracy'] = 1.0 - result['test_loss'] / 100
+        model.save(result['artifact'])
+        # Keras models are reloaded from their artifact rather than pickled back
+        result['model'] = None
+    else:
+        model = spec.build(n_jobs)
+        model.fit(X_train, y_train)
+        result['train_score'] = float(model.score(X_train, y_train))
+        result['test_score'] = float(model.score(X_test, y_test))
+        if spec.task == 'regression':
+            result['mse'] = float(np.mean((model.predict(X_test) - y_test) ** 2))
+        result['accuracy'] = result['test_score']
+        joblib.dump(model, result['artifact'])
+        result['model'] = model
+
+    scaler = None
+    if spec.scaler_artifact:
+        scaler = column_scaler(data['scaler'], columns)
+        joblib.dump(scaler, result['scaler_artifact'])
+    result['scaler'] = scaler
+    result['training_seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def core_budget() -> int:
+    return max(1, getattr(settings, 'ML_TRAINING_CORES', None) or os.cpu_count() or 1)
+
+
+class TrainingOrchestrator:
+    """Trains the selected models in parallel worker processes from one shared dataset"""
+
+    def __init__(self, model_directory: str, cores: Optional[int] = None, keys: Optional[List[str]] = None):
+        self.model_directory = model_directory
+        self.cores = cores or core_budget()
+        self.specs = [SPECS_BY_KEY[key] for key in keys] if keys else list(TRAINING_SPECS)
+
+    def run(self, df) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """Train every model on df; returns (results by key, errors by key)"""
+        os.makedirs(self.model_directory, exist_ok=True)
+        workers = min(self.cores, len(self.specs))
+        threads = max(1, self.cores // workers)
+        results, errors = {}, {}
+
+        started = time.perf_counter()
+        scratch = tempfile.mkdtemp(prefix='edusight-training-')
+        try:
+            data_path = prepare_training_data(df, scratch)
+            # Spawned workers never inherit database connections or framework thread pools
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_limit_threads,
+                initargs=(threads,)
+            ) as executor:
+                futures = {
+                    executor.submit(fit_model, spec.key, data_path, self.model_directory, threads): spec.key
+                    for spec in sorted(self.specs, key=lambda spec: spec.cost, reverse=True)
+                }
+                for future in as_completed(futures):
+                    key = futures[future]
+                    try:
+                        results[key] = future.result()
+                        logger.info(f"Trained {key} in {results[key]['training_seconds']}s")
+                    except Exception as e:
+                        logger.warning(f"Training {key} failed: {e}")
+                        errors[key] = str(e)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+        self.wall_seconds = round(time.perf_counter() - started, 3)
+        self.fit_seconds = round(sum(result['training_seconds'] for result in results.values()), 3)
+        return results, errors
+
+
+def record_training_results(results: Dict[str, Dict[str, Any]], version: str = MODEL_VERSION) -> List[Any]:
+    """Create or update the MLModel row of every trained model with its score, timing and artifact"""
+    from .models import MLModel
+
+    records = []
+    for key, result in results.items():
+        spec = SPECS_BY_KEY[key]
+        metrics = {
+            name: result[name]
+            for name in ('train_score', 'test_score', 'mse', 'train_loss', 'test_loss')
+            if name in result
+        }
+        metrics['features'] = result['features']
+        if result['scaler_artifact']:
+            metrics['scaler_artifact'] = result['scaler_artifact']
+
+        record, _ = MLModel.objects.update_or_create(
+            name=spec.display_name,
+            version=version,
+            defaults={
+                'model_type': spec.model_type,
+                'file_path': result['artifact'],
+                'accuracy_score': round(result['accuracy'], 3),
+                'training_seconds': result['training_seconds'],
+                'metrics': metrics,
+                'is_active': True,
+            }
+        )
+        records.append(record)
+    return records
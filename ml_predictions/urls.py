@@ -18,6 +18,7 @@ urlpatterns = [
     # Batch predictions
     path('batch/', views.batch_predictions, name='batch_predictions'),
     path('batch/run/', views.run_batch_predictions, name='run_batch_predictions'),
+    path('batch/<int:job_id>/status/', views.batch_prediction_status, name='batch_prediction_status'),
     
     # Model management
     path('models/train/', views.train_models, name='train_models'),
@@ -26,5 +27,6 @@ urlpatterns = [
     # API endpoints
     path('api/predict/', views.predict_api, name='predict_api'),
     path('api/models/', views.models_api, name='models_api'),
+    path('api/metrics/', views.metrics_api, name='metrics_api'),
     path('api/student/<int:student_id>/predictions/', views.student_predictions_api, name='student_predictions_api'),
 ]
@@ -2,7 +2,7 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.contrib import messages
 from django.http import JsonResponse
 from django.db.models import Q, Count, Avg
@@ -11,14 +11,19 @@ from datetime import datetime, timedelta
 import json
 import random
 
-from .models import MLPrediction, MLModel, PredictionCache
+from .models import MLPrediction, MLModel, PredictionCache, BatchPredictionJob
+from .batch_inference import (
+    BATCH_PREDICTION_TYPES, create_batch_job, get_batch_job_status, serving_model, student_inputs, numeric_confidence
+)
+from .latency import PredictionTimer, get_latency_metrics, latency_summaries, latency_summary
+from .prediction_cache import get_prediction_cache
 from students.models import Student
 from assessments.models import AssessmentResult
 from data_analytics.models import StudentAnalytics
 
 # Import advanced ML functions
 try:
-    from .advanced_ml_views import AdvancedMLPredictor
+    from .advanced_ml_views import AdvancedMLPredictor, ml_predictor
     ADVANCED_ML_AVAILABLE = True
     print("✅ Advanced ML capabilities loaded")
 except ImportError:
@@ -79,100 +84,37 @@ def generate_prediction(request, student_id):
     
     if request.method == 'POST':
         prediction_type = request.POST.get('prediction_type')
+        timer = PredictionTimer()
         
-        # Generate prediction based on type - Use Advanced ML if available
-        if ADVANCED_ML_AVAILABLE:
-            try:
-                # Use Advanced ML Predictor
-                ml_predictor = AdvancedMLPredictor()
-                
-                # Prepare student data
-                assessments = AssessmentResult.objects.filter(student=student)
-                student_data = {
-                    'age': ml_predictor._calculate_age(student.date_of_birth),
-                    'gender': 1 if student.gender == 'M' else 0,
-                    'grade': ml_predictor._convert_grade(student.grade),
-                    'academic_score': assessments.filter(
-                        assessment__assessment_type='academic'
-                    ).aggregate(avg=Avg('percentage'))['avg'] or 75,
-                    'psychological_score': assessments.filter(
-                        assessment__assessment_type='psychological'
-                    ).aggregate(avg=Avg('percentage'))['avg'] or 75,
-                    'physical_score': assessments.filter(
-                        assessment__assessment_type='physical'
-                    ).aggregate(avg=Avg('percentage'))['avg'] or 75,
-                }
-                
-                # Generate advanced ML prediction
-                if prediction_type == 'performance_forecast':
-                    prediction_data = ml_predictor.predict_performance(student_data)
-                elif prediction_type == 'career_recommendation':
-                    prediction_data = ml_predictor.recommend_career(student_data)
-                elif prediction_type == 'risk_assessment':
-                    prediction_data = ml_predictor.assess_risk(student_data)
-                elif prediction_type == 'learning_style':
-                    prediction_data = generate_learning_style_analysis(student)
-                else:
-                    prediction_data = {}
-                    
-                # Add ML metadata
-                prediction_data['ml_engine'] = 'Advanced ML Engine v2.0'
-                prediction_data['algorithm_used'] = 'Real ML Algorithms'
-                
-            except Exception as e:
-                print(f"Advanced ML failed: {e}, falling back to standard predictions")
-                # Fallback to standard predictions
-                if prediction_type == 'performance_forecast':
-                    prediction_data = generate_performance_forecast(student)
-                elif prediction_type == 'career_recommendation':
-                    prediction_data = generate_career_recommendation(student)
-                elif prediction_type == 'risk_assessment':
-                    prediction_data = generate_risk_assessment(student)
-                elif prediction_type == 'learning_style':
-                    prediction_data = generate_learning_style_analysis(student)
-                else:
-                    prediction_data = {}
-        else:
-            # Use standard predictions
-            if prediction_type == 'performance_forecast':
-                prediction_data = generate_performance_forecast(student)
-            elif prediction_type == 'career_recommendation':
-                prediction_data = generate_career_recommendation(student)
-            elif prediction_type == 'risk_assessment':
-                prediction_data = generate_risk_assessment(student)
-            elif prediction_type == 'learning_style':
-                prediction_data = generate_learning_style_analysis(student)
-            else:
-                prediction_data = {}
+        with timer.stage('features'):
+            features, student_data = student_inputs(student)
         
-        # Create prediction record
-        model, _ = MLModel.objects.get_or_create(
-            name=f"{prediction_type}_model",
-            defaults={
-                'model_type': prediction_type,
-                'version': '1.0',
-                'description': f'ML model for {prediction_type}'
-            }
-        )
+        with timer.stage('model_load'):
+            if ADVANCED_ML_AVAILABLE:
+                ml_predictor.load_models()
+            ml_model = serving_model(prediction_type)
         
-        prediction = MLPrediction.objects.create(
-            student=student,
-            model=model,
-            prediction_type=prediction_type,
-            prediction_data=json.dumps(prediction_data),
-            confidence_score=random.uniform(0.75, 0.95),  # Simulated confidence_score
-            created_at=timezone.now()
-        )
+        # Identical inputs against the same model artifact are served from the cache
+        with timer.stage('inference'):
+            prediction_data = get_prediction_cache().get_or_compute(
+                student.id, prediction_type, features,
+                lambda: compute_prediction_data(student, prediction_type, student_data)
+            )
         
-        # Cache the prediction
-        PredictionCache.objects.get_or_create(
-            student=student,
-            prediction_type=prediction_type,
-            defaults={
-                'prediction_data': prediction.prediction_data,
-                'expires_at': timezone.now() + timedelta(hours=24)
-            }
-        )
+        # Create prediction record; its timing covers everything up to the write
+        with timer.stage('persist'):
+            prediction = MLPrediction.objects.create(
+                student=student,
+                prediction_type=prediction_type,
+                input_data=student_data,
+                prediction_result=prediction_data,
+                confidence_score=numeric_confidence(prediction_data),
+                model_version=ml_model.version,
+                ml_model=ml_model,
+                processing_time_ms=round(timer.elapsed_ms),
+                stage_timings=timer.as_dict()
+            )
+        get_latency_metrics().observe(f'{prediction_type}:{ml_model.version}', timer.elapsed_ms, timer.stages)
         
         messages.success(request, f'{prediction_type.replace("_", " ").title()} generated successfully!')
         return redirect('prediction_detail', pk=prediction.pk)
@@ -199,6 +141,42 @@ def generate_prediction(request, student_id):
     return render(request, 'ml_predictions/generate_prediction.html', context)
 
 
+def compute_prediction_data(student, prediction_type, student_data):
+    """Run a prediction for one student - Use Advanced ML if available"""
+    if ADVANCED_ML_AVAILABLE:
+        try:
+            # Use the shared Advanced ML Predictor; models are loaded once per process
+            if prediction_type == 'performance_forecast':
+                prediction_data = ml_predictor.predict_performance(student_data)
+            elif prediction_type == 'career_recommendation':
+                prediction_data = ml_predictor.recommend_career(student_data)
+            elif prediction_type == 'risk_assessment':
+                prediction_data = ml_predictor.assess_risk(student_data)
+            elif prediction_type == 'learning_style':
+                prediction_data = generate_learning_style_analysis(student)
+            else:
+                prediction_data = {}
+                
+            # Add ML metadata
+            prediction_data['ml_engine'] = 'Advanced ML Engine v2.0'
+            prediction_data['algorithm_used'] = 'Real ML Algorithms'
+            return prediction_data
+            
+        except Exception as e:
+            print(f"Advanced ML failed: {e}, falling back to standard predictions")
+    
+    # Use standard predictions
+    if prediction_type == 'performance_forecast':
+        return generate_performance_forecast(student)
+    elif prediction_type == 'career_recommendation':
+        return generate_career_recommendation(student)
+    elif prediction_type == 'risk_assessment':
+        return generate_risk_assessment(student)
+    elif prediction_type == 'learning_style':
+        return generate_learning_style_analysis(student)
+    return {}
+
+
 def generate_performance_forecast(student):
     """Generate performance forecast for a student."""
     # Get student's historical performance
@@ -214,7 +192,7 @@ def generate_performance_forecast(student):
         }
     
     # Calculate trend
-    recent_scores = [r.percentage for r in recent_results]
+    recent_scores = [float(r.percentage) for r in recent_results]
     if len(recent_scores) >= 2:
         trend = (recent_scores[0] - recent_scores[-1]) / len(recent_scores)
     else:
@@ -265,9 +243,9 @@ def generate_career_recommendation(student):
     strengths = []
     if analytics.academic_score > 80:
         strengths.append('Strong academic performance')
-    if analytics.psychological_score > 75:
+    if analytics.wellbeing_score > 75:
         strengths.append('Good psychological wellbeing')
-    if analytics.physical_score > 70:
+    if analytics.fitness_score > 70:
         strengths.append('Good physical health')
     
     # Generate career recommendations based on strengths
@@ -280,14 +258,14 @@ def generate_career_recommendation(student):
             {'name': 'Research', 'match': 75, 'description': 'Strong analytical and research capabilities'},
         ])
     
-    if analytics.psychological_score > 75:
+    if analytics.wellbeing_score > 75:
         careers.extend([
             {'name': 'Psychology', 'match': 90, 'description': 'Strong interpersonal and analytical skills'},
             {'name': 'Counseling', 'match': 85, 'description': 'Good understanding of human behavior'},
             {'name': 'Education', 'match': 80, 'description': 'Strong communication and empathy skills'},
         ])
     
-    if analytics.physical_score > 70:
+    if analytics.fitness_score > 70:
         careers.extend([
             {'name': 'Sports Science', 'match': 85, 'description': 'Good understanding of physical health'},
             {'name': 'Physical Therapy', 'match': 80, 'description': 'Interest in health and fitness'},
@@ -340,7 +318,7 @@ def generate_risk_assessment(student):
             risk_level = 'Medium'
     
     # Psychological risks
-    if analytics.psychological_score < 60:
+    if analytics.wellbeing_score < 60:
         risks.append({
             'type': 'Psychological',
             'level': 'High',
@@ -348,7 +326,7 @@ def generate_risk_assessment(student):
             'recommendation': 'Consider counseling or mental health support'
         })
         risk_level = 'High'
-    elif analytics.psychological_score < 70:
+    elif analytics.wellbeing_score < 70:
         risks.append({
             'type': 'Psychological',
             'level': 'Medium',
@@ -359,7 +337,7 @@ def generate_risk_assessment(student):
             risk_level = 'Medium'
     
     # Attendance risks (if available)
-    attendance = student.attendance_set.filter(
+    attendance = student.attendance_records.filter(
         date__gte=timezone.now() - timedelta(days=30)
     )
     if attendance.exists():
@@ -597,6 +575,7 @@ def ml_api(request):
         'total_models': total_models,
         'avg_confidence_score': avg_confidence_score,
         'recent_predictions': list(recent_predictions),
+        'prediction_cache': get_prediction_cache().stats(),
     })
 
 
@@ -832,55 +811,38 @@ def run_batch_predictions(request):
         if not student_ids:
             return JsonResponse({'error': 'No students selected'}, status=400)
         
-        created_count = 0
-        for student_id in student_ids:
-            try:
-                student = Student.objects.get(id=student_id)
-                
-                # Generate prediction
-                if prediction_type == 'performance_forecast':
-                    prediction_data = generate_performance_forecast(student)
-                elif prediction_type == 'career_recommendation':
-                    prediction_data = generate_career_recommendation(student)
-                elif prediction_type == 'risk_assessment':
-                    prediction_data = generate_risk_assessment(student)
-                elif prediction_type == 'learning_style':
-                    prediction_data = generate_learning_style_analysis(student)
-                else:
-                    continue
-                
-                # Create prediction record
-                model, _ = MLModel.objects.get_or_create(
-                    name=f"{prediction_type}_model",
-                    defaults={
-                        'model_type': prediction_type,
-                        'version': '1.0',
-                        'description': f'ML model for {prediction_type}'
-                    }
-                )
-                
-                MLPrediction.objects.create(
-                    student=student,
-                    model=model,
-                    prediction_type=prediction_type,
-                    prediction_data=json.dumps(prediction_data),
-                    confidence_score=random.uniform(0.75, 0.95)
-                )
-                
-                created_count += 1
-                
-            except Student.DoesNotExist:
-                continue
+        if prediction_type not in BATCH_PREDICTION_TYPES:
+            return JsonResponse({'error': 'Invalid prediction type'}, status=400)
+        
+        try:
+            student_ids = [int(student_id) for student_id in student_ids]
+        except ValueError:
+            return JsonResponse({'error': 'Invalid student id'}, status=400)
+        
+        # Scored in the background as one feature matrix and model call per chunk
+        job = create_batch_job(prediction_type, student_ids, request.user)
         
         return JsonResponse({
             'success': True,
-            'created_count': created_count,
-            'message': f'Generated {created_count} predictions successfully'
-        })
+            'job_id': job.id,
+            'total_students': job.total_students,
+            'status_url': reverse('ml_predictions:batch_prediction_status', args=[job.id]),
+            'message': f'Batch prediction queued for {job.total_students} students'
+        }, status=202)
     
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
 
+@login_required
+def batch_prediction_status(request, job_id):
+    """Progress of a batch prediction job."""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    job = get_object_or_404(BatchPredictionJob, pk=job_id)
+    return JsonResponse(get_batch_job_status(job))
+
+
 @login_required
 def train_models(request):
     """Train ML models."""
@@ -915,21 +877,21 @@ def model_details(request, model_id):
     model = get_object_or_404(MLModel, pk=model_id)
     
     # Get model statistics
-    prediction_count = MLPrediction.objects.filter(model=model).count()
-    avg_confidence_score = MLPrediction.objects.filter(model=model).aggregate(
+    model_predictions = model.predictions.all()
+    prediction_count = model_predictions.count()
+    avg_confidence_score = model_predictions.aggregate(
         Avg('confidence_score')
     )['confidence_score__avg'] or 0
     
     # Get recent predictions
-    recent_predictions = MLPrediction.objects.filter(
-        model=model
-    ).select_related('student__user').order_by('-created_at')[:10]
+    recent_predictions = model_predictions.select_related('student__user').order_by('-created_at')[:10]
     
     context = {
         'model': model,
         'prediction_count': prediction_count,
         'avg_confidence_score': avg_confidence_score,
         'recent_predictions': recent_predictions,
+        'latency': latency_summary(model_predictions),
     }
     
     return render(request, 'ml_predictions/model_details.html', context)
@@ -980,30 +942,45 @@ def predict_api(request):
 @login_required
 def models_api(request):
     """API endpoint for ML models."""
-    # Get models (simplified since there's no direct FK relationship)
     models = MLModel.objects.all()
     
+    # Counts, confidence and latency of every model's predictions in one grouped query
+    stats = latency_summaries(
+        MLPrediction.objects.filter(ml_model__isnull=False), 'ml_model', avg_confidence=Avg('confidence_score')
+    )
+    
     data = []
     for model in models:
-        # Calculate prediction count for this model version
-        prediction_count = MLPrediction.objects.filter(model_version=model.version).count()
-        avg_confidence = MLPrediction.objects.filter(model_version=model.version).aggregate(
-            avg_score=Avg('confidence_score')
-        )['avg_score'] or 0
+        latency = stats.get(model.id) or latency_summary(MLPrediction.objects.none())
         
         data.append({
             'id': model.id,
             'name': model.name,
             'model_type': model.model_type,
             'version': model.version,
-            'prediction_count': prediction_count,
-            'avg_confidence_score': avg_confidence,
+            'prediction_count': latency['count'],
+            'avg_confidence_score': latency.pop('avg_confidence', None) or 0,
+            'latency': latency,
             'created_at': model.created_at.isoformat(),
         })
     
     return JsonResponse({'models': data})
 
 
+@login_required
+def metrics_api(request):
+    """API endpoint for prediction latency and throughput metrics."""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    # Stored timings cover every process; the live histograms only this one
+    return JsonResponse({
+        'process': get_latency_metrics().snapshot(),
+        'stored': latency_summaries(MLPrediction.objects.all(), 'prediction_type'),
+        'prediction_cache': get_prediction_cache().stats(),
+    })
+
+
 @login_required
 def student_predictions_api(request, student_id):
     """API endpoint for student predictions."""
@@ -9,11 +9,12 @@ from scipy import stats
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
 from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
 import json
 from datetime import datetime, timedelta
 import re
 
+from .forecasting import get_forecaster
+
 
 class AcademicDataAnalyzer:
     """Main analyzer class for processing academic data"""
@@ -23,6 +24,7 @@ class AcademicDataAnalyzer:
         self.curriculum = curriculum
         self.semester = semester
         self.processed_data = None
+        self.subject_scores = {}
         self.analysis_results = {}
         
     def process_data(self):
@@ -39,6 +41,9 @@ class AcademicDataAnalyzer:
             # Clean and validate data
             self.processed_data = self._clean_data(self.processed_data)
             
+            # Split scores by subject once for all analyses
+            self.subject_scores = self._group_subject_scores(self.processed_data)
+            
             return True
         except Exception as e:
             print(f"Error processing data: {e}")
@@ -78,6 +83,13 @@ class AcademicDataAnalyzer:
         
         return df
     
+    def _group_subject_scores(self, df):
+        """Group scores per subject in a single pass, keeping first-appearance order"""
+        return {
+            subject: group.to_numpy(dtype=float)
+            for subject, group in df.groupby('Subject', sort=False)['Score']
+        }
+    
     def perform_comprehensive_analysis(self):
         """Perform all analysis algorithms"""
         if self.processed_data is None or self.processed_data.empty:
@@ -135,12 +147,10 @@ class AcademicDataAnalyzer:
     
     def _trend_analysis(self):
         """Analyze performance trends"""
-        subject_means = self.processed_data.groupby('Subject')['Score'].agg(['mean', 'count', 'std']).fillna(0)
-        
         # Calculate trend indicators
         trends = {}
-        for subject in subject_means.index:
-            subject_scores = self.processed_data[self.processed_data['Subject'] == subject]['Score'].values
+        for subject in sorted(self.subject_scores):
+            subject_scores = self.subject_scores[subject]
             
             if len(subject_scores) > 1:
                 # Linear regression to detect trend
@@ -169,7 +179,7 @@ class AcademicDataAnalyzer:
     
     def _correlation_analysis(self):
         """Analyze correlations between subjects"""
-        if len(self.processed_data['Subject'].unique()) < 2:
+        if len(self.subject_scores) < 2:
             return {'message': 'Insufficient subjects for correlation analysis'}
         
         # Create pivot table for correlation
@@ -223,8 +233,7 @@ class AcademicDataAnalyzer:
         
         # Subject-wise classification
         subject_classification = {}
-        for subject in self.processed_data['Subject'].unique():
-            subject_scores = self.processed_data[self.processed_data['Subject'] == subject]['Score'].values
+        for subject, subject_scores in self.subject_scores.items():
             avg_score = np.mean(subject_scores)
             
             if avg_score >= 90:
@@ -261,58 +270,9 @@ class AcademicDataAnalyzer:
         }
     
     def _predictive_analysis(self):
-        """Predict future performance using ML algorithms"""
+        """Predict each subject's next score with the shared forecaster"""
         try:
-            # Prepare data for prediction
-            subject_data = []
-            for subject in self.processed_data['Subject'].unique():
-                subject_scores = self.processed_data[self.processed_data['Subject'] == subject]['Score'].values
-                if len(subject_scores) >= 2:
-                    # Create time series data
-                    for i, score in enumerate(subject_scores):
-                        subject_data.append({
-                            'subject_encoded': hash(subject) % 1000,
-                            'time_index': i,
-                            'score': score
-                        })
-            
-            if len(subject_data) < 3:
-                return {'message': 'Insufficient data for predictions'}
-            
-            # Convert to DataFrame
-            pred_df = pd.DataFrame(subject_data)
-            
-            # Features and target
-            X = pred_df[['subject_encoded', 'time_index']].values
-            y = pred_df['score'].values
-            
-            # Train Random Forest model
-            rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
-            rf_model.fit(X, y)
-            
-            # Make predictions for next period
-            predictions = {}
-            for subject in self.processed_data['Subject'].unique():
-                subject_scores = self.processed_data[self.processed_data['Subject'] == subject]['Score'].values
-                if len(subject_scores) >= 1:
-                    subject_encoded = hash(subject) % 1000
-                    next_time_index = len(subject_scores)
-                    
-                    predicted_score = rf_model.predict([[subject_encoded, next_time_index]])[0]
-                    
-                    # Calculate confidence based on historical variance
-                    historical_variance = np.var(subject_scores) if len(subject_scores) > 1 else 5
-                    confidence = max(0.5, min(0.95, 1 - (historical_variance / 100)))
-                    
-                    predictions[subject] = {
-                        'predicted_score': float(max(0, min(100, predicted_score))),
-                        'confidence': float(confidence),
-                        'trend': 'improving' if predicted_score > np.mean(subject_scores) else 'declining',
-                        'variance': float(historical_variance)
-                    }
-            
-            return predictions
-            
+            return get_forecaster().forecast(self.subject_scores)
         except Exception as e:
             return {'error': str(e), 'message': 'Error in predictive analysis'}
     
@@ -345,8 +305,7 @@ class AcademicDataAnalyzer:
         curriculum_benchmarks = benchmarks.get(self.curriculum, benchmarks['CBSE'])
         
         comparisons = {}
-        for subject in self.processed_data['Subject'].unique():
-            subject_scores = self.processed_data[self.processed_data['Subject'] == subject]['Score'].values
+        for subject, subject_scores in self.subject_scores.items():
             avg_score = np.mean(subject_scores)
             
             # Find closest benchmark subject
@@ -390,14 +349,14 @@ class AcademicDataAnalyzer:
     
     def _generate_radar_chart_data(self):
         """Generate data for radar/spider chart"""
-        subjects = list(self.processed_data['Subject'].unique())
+        subjects = list(self.subject_scores)
         student_scores = []
         benchmark_scores = []
         
         benchmarks = self.analysis_results.get('benchmarks', {})
         
         for subject in subjects:
-            subject_avg = self.processed_data[self.processed_data['Subject'] == subject]['Score'].mean()
+            subject_avg = self.subject_scores[subject].mean()
             student_scores.append(float(subject_avg))
             
             benchmark = benchmarks.get(subject, {}).get('benchmark_score', subject_avg)
@@ -513,7 +472,7 @@ class AcademicDataAnalyzer:
             }
         
         # Convert correlations to matrix format
-        subjects = list(self.processed_data['Subject'].unique())
+        subjects = list(self.subject_scores)
         matrix_data = []
         
         for i, subject1 in enumerate(subjects):
@@ -541,7 +500,7 @@ class AcademicDataAnalyzer:
     def _generate_area_chart_data(self):
         """Generate data for area chart showing performance over time"""
         # Simulate time-based performance data
-        subjects = list(self.processed_data['Subject'].unique())
+        subjects = list(self.subject_scores)
         time_labels = ['Month 1', 'Month 2', 'Month 3', 'Current', 'Predicted']
         
         datasets = []
@@ -555,7 +514,7 @@ class AcademicDataAnalyzer:
         ]
         
         for i, subject in enumerate(subjects[:6]):  # Limit to 6 subjects for clarity
-            subject_scores = self.processed_data[self.processed_data['Subject'] == subject]['Score'].values
+            subject_scores = self.subject_scores[subject]
             current_avg = np.mean(subject_scores)
             
             # Generate synthetic historical data with some variation
@@ -599,15 +558,15 @@ def process_file_and_analyze(file_path, curriculum='CBSE', semester='Current'):
         # Determine file type and read data
         if file_path.endswith(('.xlsx', '.xls')):
             df = pd.read_excel(file_path)
-            raw_data = _extract_data_from_excel(df)
+            score_frame = _extract_data_from_excel(df)
         elif file_path.endswith('.csv'):
             df = pd.read_csv(file_path)
-            raw_data = _extract_data_from_csv(df)
+            score_frame = _extract_data_from_csv(df)
         else:
             return None, "Unsupported file format"
         
-        # Initialize analyzer
-        analyzer = AcademicDataAnalyzer(raw_data, curriculum, semester)
+        # Initialize analyzer with the tidy Subject/Score frame
+        analyzer = AcademicDataAnalyzer(score_frame, curriculum, semester)
         
         # Process data
         if not analyzer.process_data():
@@ -623,7 +582,8 @@ def process_file_and_analyze(file_path, curriculum='CBSE', semester='Current'):
         return {
             'analysis_results': analyzer.analysis_results,
             'graph_data': graph_data,
-            'processed_data': analyzer.processed_data.to_dict('records')
+            'processed_data': analyzer.processed_data.to_dict('records'),
+            'subject_summary': _subject_summary(score_frame)
         }, None
         
     except Exception as e:
@@ -631,9 +591,7 @@ def process_file_and_analyze(file_path, curriculum='CBSE', semester='Current'):
 
 
 def _extract_data_from_excel(df):
-    """Extract academic data from Excel DataFrame"""
-    data = {}
-    
+    """Extract academic data from Excel DataFrame as a tidy Subject/Score frame"""
     # Try to find subject and score columns
     subject_col = None
     score_cols = []
@@ -645,28 +603,46 @@ def _extract_data_from_excel(df):
         elif any(word in col_lower for word in ['score', 'mark', 'grade', 'result']):
             score_cols.append(col)
     
-    if subject_col and score_cols:
-        for _, row in df.iterrows():
-            subject = str(row[subject_col])
-            scores = []
-            
-            for score_col in score_cols:
-                try:
-                    score = float(row[score_col])
-                    if 0 <= score <= 100:
-                        scores.append(score)
-                except (ValueError, TypeError):
-                    continue
-            
-            if scores:
-                data[subject] = {
-                    'scores': scores,
-                    'average': np.mean(scores),
-                    'max_score': max(scores),
-                    'min_score': min(scores)
-                }
+    if subject_col is None or not score_cols:
+        return pd.DataFrame({'Subject': pd.Series(dtype=object), 'Score': pd.Series(dtype=float)})
     
-    return data
+    subjects = df[subject_col].map(str).to_numpy(dtype=object)
+    
+    # Coerce the whole score block at once; text and out-of-range cells become NaN
+    scores = df[score_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float, copy=True)
+    scores[(scores < 0) | (scores > 100)] = np.nan
+    
+    # A subject on several rows keeps only its last row with scores, listed where the subject first appears
+    positions = pd.Series(np.flatnonzero(~np.isnan(scores).all(axis=1)))
+    row_subjects = pd.Series(subjects[positions.to_numpy()])
+    first_seen = positions.groupby(row_subjects.to_numpy(), sort=False).transform('first')
+    latest = positions[~row_subjects.duplicated(keep='last')]
+    rows = latest.iloc[np.argsort(first_seen[latest.index].to_numpy(), kind='stable')].to_numpy()
+    
+    # Melt row by row so each subject keeps its scores in column order
+    flat_scores = scores[rows].ravel()
+    valid = ~np.isnan(flat_scores)
+    
+    return pd.DataFrame({
+        'Subject': np.repeat(subjects[rows], len(score_cols))[valid],
+        'Score': flat_scores[valid]
+    })
+
+
+def _subject_summary(score_frame):
+    """Scores, average, max and min of each subject in a tidy Subject/Score frame"""
+    grouped = score_frame.groupby('Subject', sort=False)['Score']
+    summary = grouped.agg(average='mean', max_score='max', min_score='min')
+    summary['scores'] = grouped.agg(list)
+    return {
+        subject: {
+            'scores': [float(score) for score in row['scores']],
+            'average': float(row['average']),
+            'max_score': float(row['max_score']),
+            'min_score': float(row['min_score'])
+        }
+        for subject, row in summary.iterrows()
+    }
 
 
 def _extract_data_from_csv(df):
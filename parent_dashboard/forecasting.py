@@ -0,0 +1,212 @@
+"""
+Next-score forecasting for uploaded academic data
+A regressor trained offline on accumulated upload sessions is loaded once per process;
+subjects without enough history fall back to a closed-form linear trend
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import joblib
+import numpy as np
+from django.conf import settings
+from sklearn.linear_model import Ridge
+
+logger = logging.getLogger(__name__)
+
+FORECASTER_VERSION = 1
+
+# Scores needed before the learned model is used instead of the trend line
+MIN_MODEL_HISTORY = 2
+
+# Scores, across subjects with at least two, needed before any subject is forecast
+MIN_FORECAST_POINTS = 3
+
+
+def normalize_subject(subject) -> str:
+    """Stable subject key, independent of process hash randomization"""
+    return ' '.join(str(subject).lower().split())
+
+
+def history_features(scores: np.ndarray) -> List[float]:
+    """Summary features of a score history: last, mean, slope, spread and length"""
+    n = len(scores)
+    return [
+        float(scores[-1]),
+        float(scores.mean()),
+        trend_slope(scores),
+        float(scores.std()),
+        float(n),
+    ]
+
+
+def trend_slope(scores: np.ndarray) -> float:
+    """Least-squares slope of the scores against their position"""
+    n = len(scores)
+    if n < 2:
+        return 0.0
+    x = np.arange(n, dtype=float)
+    x_centered = x - x.mean()
+    return float(np.dot(x_centered, scores - scores.mean()) / np.dot(x_centered, x_centered))
+
+
+def trend_forecast(scores: np.ndarray) -> float:
+    """Closed-form linear trend extrapolated one step ahead"""
+    n = len(scores)
+    return float(scores.mean() + trend_slope(scores) * (n - (n - 1) / 2))
+
+
+class ScoreForecaster:
+    """Predicts each subject's next score from its score history"""
+
+    def __init__(self, model=None, subject_offsets: Optional[Dict[str, float]] = None,
+                 metadata: Optional[Dict] = None):
+        self.model = model
+        self.subject_offsets = subject_offsets or {}
+        self.metadata = metadata or {}
+
+    @property
+    def is_trained(self) -> bool:
+        return self.model is not None
+
+    def forecast(self, subject_scores: Dict[str, np.ndarray]) -> Dict[str, Dict]:
+        """Forecast every subject, batching all model inputs into one predict call"""
+        history_points = sum(len(scores) for scores in subject_scores.values() if len(scores) >= 2)
+        if history_points < MIN_FORECAST_POINTS:
+            return {'message': 'Insufficient data for predictions'}
+
+        subjects = [subject for subject, scores in subject_scores.items() if len(scores) >= 1]
+        predicted = {subject: trend_forecast(subject_scores[subject]) for subject in subjects}
+
+        if self.is_trained:
+            modelled = [subject for subject in subjects if len(subject_scores[subject]) >= MIN_MODEL_HISTORY]
+            if modelled:
+                features = np.array([history_features(subject_scores[subject]) for subject in modelled])
+                for subject, value in zip(modelled, self.model.predict(features)):
+                    predicted[subject] = float(value) + self.subject_offsets.get(normalize_subject(subject), 0.0)
+
+        predictions = {}
+        for subject in subjects:
+            subject_scores_array = subject_scores[subject]
+            predicted_score = predicted[subject]
+
+            # Calculate confidence based on historical variance
+            historical_variance = np.var(subject_scores_array) if len(subject_scores_array) > 1 else 5
+            confidence = max(0.5, min(0.95, 1 - (historical_variance / 100)))
+
+            predictions[subject] = {
+                'predicted_score': float(max(0, min(100, predicted_score))),
+                'confidence': float(confidence),
+                'trend': 'improving' if predicted_score > np.mean(subject_scores_array) else 'declining',
+                'variance': float(historical_variance),
+                'method': 'model' if self.is_trained and len(subject_scores_array) >= MIN_MODEL_HISTORY else 'trend'
+            }
+
+        return predictions
+
+    @classmethod
+    def train(cls, histories: Iterable[Tuple[str, np.ndarray]]) -> 'ScoreForecaster':
+        """Fit on every (history prefix -> next score) pair of the given subject histories"""
+        features = []
+        targets = []
+        subjects = []
+        for subject, scores in histories:
+            scores = np.asarray(scores, dtype=float)
+            for end in range(MIN_MODEL_HISTORY, len(scores)):
+                features.append(history_features(scores[:end]))
+                targets.append(scores[end])
+                subjects.append(normalize_subject(subject))
+
+        if not features:
+            raise ValueError("No subject has enough history to train the forecaster")
+
+        X = np.array(features)
+        y = np.array(targets)
+        model = Ridge(alpha=1.0)
+        model.fit(X, y)
+
+        # Per-subject bias of the shared model, used as a stable subject encoding
+        residuals = y - model.predict(X)
+        subject_codes, subject_index = np.unique(subjects, return_inverse=True)
+        residual_sums = np.bincount(subject_index, weights=residuals)
+        residual_counts = np.bincount(subject_index)
+        offsets = {
+            str(subject): float(total / count)
+            for subject, total, count in zip(subject_codes, residual_sums, residual_counts)
+        }
+
+        metadata = {
+            'version': FORECASTER_VERSION,
+            'trained_at': datetime.now().isoformat(),
+            'samples': int(len(y)),
+            'subjects': len(offsets),
+            'mae': float(np.abs(residuals).mean()),
+        }
+        return cls(model, offsets, metadata)
+
+    def save(self, path) -> None:
+        joblib.dump({
+            'model': self.model,
+            'subject_offsets': self.subject_offsets,
+            'metadata': self.metadata,
+        }, path)
+
+    @classmethod
+    def load(cls, path) -> 'ScoreForecaster':
+        """Load a trained artifact, or return an untrained (trend-only) forecaster"""
+        try:
+            artifact = joblib.load(path)
+            if artifact.get('metadata', {}).get('version') != FORECASTER_VERSION:
+                raise ValueError("Incompatible forecaster version")
+            return cls(artifact['model'], artifact['subject_offsets'], artifact['metadata'])
+        except FileNotFoundError:
+            logger.info(f"No score forecaster at {path}; using trend forecasts")
+        except Exception as e:
+            logger.warning(f"Could not load score forecaster from {path}: {e}")
+        return cls()
+
+
+_forecaster = None
+_forecaster_lock = threading.Lock()
+
+
+def get_forecaster() -> ScoreForecaster:
+    """Process-wide forecaster, loaded on first use"""
+    global _forecaster
+    if _forecaster is None:
+        with _forecaster_lock:
+            if _forecaster is None:
+                _forecaster = ScoreForecaster.load(settings.SCORE_FORECASTER_PATH)
+    return _forecaster
+
+
+def reset_forecaster() -> None:
+    """Drop the cached forecaster so the next call reloads it from disk"""
+    global _forecaster
+    with _forecaster_lock:
+        _forecaster = None
+
+
+def session_subject_histories(raw_data) -> List[Tuple[str, np.ndarray]]:
+    """Extract per-subject score histories from an UploadSession.raw_data payload"""
+    histories: Dict[str, List[float]] = {}
+
+    if isinstance(raw_data, list):
+        # Tidy records as stored by api_upload_file
+        for record in raw_data:
+            if isinstance(record, dict) and 'Subject' in record and 'Score' in record:
+                histories.setdefault(str(record['Subject']), []).append(record['Score'])
+    elif isinstance(raw_data, dict):
+        for subject, data in raw_data.items():
+            if isinstance(data, dict) and isinstance(data.get('scores'), list):
+                histories.setdefault(str(subject), []).extend(data['scores'])
+
+    result = []
+    for subject, scores in histories.items():
+        try:
+            result.append((subject, np.array(scores, dtype=float)))
+        except (TypeError, ValueError):
+            continue
+    return result
@@ -1,11 +1,18 @@
 """
 Educational Assessment Frameworks for EduSight Platform
 Comprehensive framework definitions for academic, physical, psychological, and career assessments
+Definitions are frozen once per process into the FrameworkRegistry for lookups at request time
 """
 
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Any
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple, Any
 import json
+import re
+import threading
+
+import numpy as np
 
 
 @dataclass
@@ -1395,6 +1402,184 @@ class CareerMappingFrameworks:
         }
 
 
+@dataclass(frozen=True, slots=True)
+class CriterionSpec:
+    """Immutable assessment criterion with its precomputed competency bands"""
+    criterion_id: str  # '<domain_key>.<criterion_slug>'
+    domain_key: str
+    name: str
+    description: str
+    weight: float
+    min_score: float
+    max_score: float
+    competency_levels: Mapping[str, str]
+    assessment_methods: Tuple[str, ...]
+    level_names: Tuple[str, ...]
+    level_edges: Tuple[float, ...]  # upper bound of every band but the last
+
+    def competency_level(self, score: float) -> str:
+        """Competency level whose equal-width band of the score range contains score"""
+        return self.level_names[bisect_right(self.level_edges, score)]
+
+
+@dataclass(frozen=True, slots=True)
+class DomainSpec:
+    """Immutable framework domain with its criterion weights as an array"""
+    key: str
+    domain_name: str
+    description: str
+    domain_weight: float
+    age_appropriate: Tuple[int, int]
+    criteria: Tuple[CriterionSpec, ...]
+    criterion_weights: np.ndarray
+
+    def applies_to_age(self, age: int) -> bool:
+        return self.age_appropriate[0] <= age <= self.age_appropriate[1]
+
+
+@dataclass(frozen=True, slots=True)
+class FrameworkSpec:
+    """Immutable framework with O(1) lookups precomputed at build time"""
+    key: str
+    domains: Mapping[str, DomainSpec]
+    domain_keys: Tuple[str, ...]
+    domain_weights: np.ndarray
+    criteria_by_id: Mapping[str, CriterionSpec]
+    domains_by_age: Tuple[Tuple[str, ...], ...]  # indexed by age, 0..MAX_FRAMEWORK_AGE
+
+    def domain(self, key: str) -> DomainSpec:
+        return self.domains[key]
+
+    def criterion(self, criterion_id: str) -> CriterionSpec:
+        return self.criteria_by_id[criterion_id]
+
+    def domains_for_age(self, age: int) -> Tuple[str, ...]:
+        """Keys of the domains appropriate for a student of the given age"""
+        if 0 <= age < len(self.domains_by_age):
+            return self.domains_by_age[age]
+        return ()
+
+    def weighted_score(self, domain_scores: Dict[str, float]) -> float:
+        """Domain-weighted score; domains missing from domain_scores count as 0"""
+        scores = np.fromiter((domain_scores.get(key, 0) for key in self.domain_keys),
+                             dtype=float, count=len(self.domain_keys))
+        return float(scores @ self.domain_weights)
+
+
+MAX_FRAMEWORK_AGE = 25
+
+# Registry key -> builder returning the mutable framework definition
+FRAMEWORK_BUILDERS = {
+    'cbse': AcademicFrameworks.get_cbse_framework,
+    'icse': AcademicFrameworks.get_icse_framework,
+    'ib': AcademicFrameworks.get_ib_framework,
+    'physical_education': PhysicalEducationFrameworks.get_comprehensive_pe_framework,
+    'cognitive': PsychologicalFrameworks.get_cognitive_framework,
+    'behavioral': PsychologicalFrameworks.get_behavioral_framework,
+    'holland': CareerMappingFrameworks.get_holland_framework,
+    'multiple_intelligences': CareerMappingFrameworks.get_multiple_intelligences_framework,
+}
+
+
+def _criterion_slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+
+def _readonly_array(values: List[float]) -> np.ndarray:
+    array = np.array(values, dtype=float)
+    array.setflags(write=False)
+    return array
+
+
+def _freeze_criterion(domain_key: str, criteria: AssessmentCriteria) -> CriterionSpec:
+    level_names = tuple(criteria.competency_levels)
+    step = (criteria.max_score - criteria.min_score) / max(len(level_names), 1)
+    return CriterionSpec(
+        criterion_id=f"{domain_key}.{_criterion_slug(criteria.name)}",
+        domain_key=domain_key,
+        name=criteria.name,
+        description=criteria.description,
+        weight=criteria.weight,
+        min_score=criteria.min_score,
+        max_score=criteria.max_score,
+        competency_levels=MappingProxyType(dict(criteria.competency_levels)),
+        assessment_methods=tuple(criteria.assessment_methods),
+        level_names=level_names,
+        level_edges=tuple(criteria.min_score + step * band for band in range(1, len(level_names)))
+    )
+
+
+def freeze_framework(key: str, framework: Dict[str, FrameworkDomain]) -> FrameworkSpec:
+    """Convert a framework definition into its immutable, indexed form"""
+    domains = {}
+    criteria_by_id = {}
+    for domain_key, domain in framework.items():
+        criteria = tuple(_freeze_criterion(domain_key, criteria) for criteria in domain.criteria)
+        criteria_by_id.update((criterion.criterion_id, criterion) for criterion in criteria)
+        domains[domain_key] = DomainSpec(
+            key=domain_key,
+            domain_name=domain.domain_name,
+            description=domain.description,
+            domain_weight=domain.domain_weight,
+            age_appropriate=tuple(domain.age_appropriate),
+            criteria=criteria,
+            criterion_weights=_readonly_array([criterion.weight for criterion in criteria])
+        )
+
+    domain_keys = tuple(domains)
+    return FrameworkSpec(
+        key=key,
+        domains=MappingProxyType(domains),
+        domain_keys=domain_keys,
+        domain_weights=_readonly_array([domains[domain_key].domain_weight for domain_key in domain_keys]),
+        criteria_by_id=MappingProxyType(criteria_by_id),
+        domains_by_age=tuple(
+            tuple(domain_key for domain_key in domain_keys if domains[domain_key].applies_to_age(age))
+            for age in range(MAX_FRAMEWORK_AGE + 1)
+        )
+    )
+
+
+class FrameworkRegistry:
+    """All assessment frameworks, built once into immutable indexed structures"""
+
+    def __init__(self):
+        self._frameworks = MappingProxyType({
+            key: freeze_framework(key, builder()) for key, builder in FRAMEWORK_BUILDERS.items()
+        })
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._frameworks
+
+    def keys(self) -> Tuple[str, ...]:
+        return tuple(self._frameworks)
+
+    def get(self, key: str) -> FrameworkSpec:
+        return self._frameworks[key]
+
+    def criterion(self, framework_key: str, criterion_id: str) -> CriterionSpec:
+        return self._frameworks[framework_key].criteria_by_id[criterion_id]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_framework_registry() -> FrameworkRegistry:
+    """Process-wide framework registry, built on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = FrameworkRegistry()
+    return _registry
+
+
+def get_framework(key: str) -> FrameworkSpec:
+    """Immutable framework by registry key, e.g. get_framework('cbse')"""
+    return get_framework_registry().get(key)
+
+
 class MLModelIntegration:
     """Machine Learning Model Integration for Assessment Predictions"""
     
@@ -1406,12 +1591,7 @@ class MLModelIntegration:
         prediction_confidence = 0.85
         
         # Calculate weighted academic prediction
-        academic_prediction = (
-            framework_scores.get('mathematics', 0) * 0.25 +
-            framework_scores.get('language_arts', 0) * 0.25 +
-            framework_scores.get('sciences', 0) * 0.25 +
-            framework_scores.get('social_studies', 0) * 0.25
-        )
+        academic_prediction = get_framework('cbse').weighted_score(framework_scores)
         
         # Add some variance and trend analysis
         predicted_improvement = min(15.0, max(-5.0, academic_prediction * 0.1))
@@ -1433,12 +1613,8 @@ class MLModelIntegration:
         
         # Holland RIASEC scoring
         holland_scores = {
-            'realistic': career_scores.get('realistic', 0),
-            'investigative': career_scores.get('investigative', 0),
-            'artistic': career_scores.get('artistic', 0),
-            'social': career_scores.get('social', 0),
-            'enterprising': career_scores.get('enterprising', 0),
-            'conventional': career_scores.get('conventional', 0)
+            domain_key: career_scores.get(domain_key, 0)
+            for domain_key in get_framework('holland').domain_keys
         }
         
         # Identify top 3 Holland codes
@@ -25,6 +25,7 @@ class UploadSession(models.Model):
     upload_type = models.CharField(max_length=20, choices=UPLOAD_TYPES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     file_path = models.FileField(upload_to='parent_uploads/', null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
     detected_curriculum = models.CharField(max_length=100, null=True, blank=True)
     detected_semester = models.CharField(max_length=50, null=True, blank=True)
     detected_year = models.CharField(max_length=50, null=True, blank=True)
@@ -0,0 +1,299 @@
+import os
+import shutil
+import tempfile
+from dataclasses import FrozenInstanceError
+from unittest import mock
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from .analyzers import AcademicDataAnalyzer, _extract_data_from_excel, _subject_summary
+from .frameworks import (
+    FRAMEWORK_BUILDERS, AcademicFrameworks, MLModelIntegration, get_framework, get_framework_registry
+)
+from .forecasting import (
+    MIN_FORECAST_POINTS, ScoreForecaster, history_features, normalize_subject, reset_forecaster,
+    session_subject_histories
+)
+
+INSUFFICIENT = {'message': 'Insufficient data for predictions'}
+
+
+def linear_histories(count=30, seed=0):
+    """Subject histories that climb steadily from a random start"""
+    rng = np.random.default_rng(seed)
+    histories = []
+    for index in range(count):
+        start, step = rng.uniform(40, 70), rng.uniform(-2, 4)
+        length = int(rng.integers(3, 7))
+        histories.append((['Maths', 'Science', 'English'][index % 3], start + step * np.arange(length)))
+    return histories
+
+
+class ForecasterTests(SimpleTestCase):
+
+    def test_too_few_scores_are_insufficient(self):
+        forecaster = ScoreForecaster()
+        # Only subjects with two or more scores count towards MIN_FORECAST_POINTS
+        for subject_scores in (
+            {'Maths': np.array([80.0, 82.0])},
+            {'Maths': np.array([80.0]), 'Science': np.array([70.0]), 'English': np.array([60.0])},
+            {'Maths': np.array([80.0, 82.0]), 'Science': np.array([70.0])},
+        ):
+            with self.subTest(subject_scores=subject_scores):
+                self.assertEqual(forecaster.forecast(subject_scores), INSUFFICIENT)
+
+        enough = {'Maths': np.array([80.0, 82.0, 84.0])}
+        self.assertEqual(sum(map(len, enough.values())), MIN_FORECAST_POINTS)
+        self.assertIn('Maths', forecaster.forecast(enough))
+
+    def test_untrained_forecaster_extends_the_trend(self):
+        predictions = ScoreForecaster().forecast({
+            'Maths': np.array([70.0, 75.0, 80.0]),
+            'Science': np.array([90.0, 80.0]),
+            'English': np.array([65.0]),
+        })
+        self.assertAlmostEqual(predictions['Maths']['predicted_score'], 85.0)
+        self.assertEqual(predictions['Maths']['trend'], 'improving')
+        self.assertAlmostEqual(predictions['Science']['predicted_score'], 70.0)
+        self.assertEqual(predictions['Science']['trend'], 'declining')
+        # A single score has no trend and keeps its value
+        self.assertAlmostEqual(predictions['English']['predicted_score'], 65.0)
+        self.assertEqual(predictions['English']['variance'], 5.0)
+        self.assertEqual({prediction['method'] for prediction in predictions.values()}, {'trend'})
+
+    def test_predictions_are_clipped_to_the_score_range(self):
+        predictions = ScoreForecaster().forecast({'Maths': np.array([80.0, 90.0, 100.0])})
+        self.assertEqual(predictions['Maths']['predicted_score'], 100.0)
+
+    def test_trained_model_predicts_subjects_with_history(self):
+        forecaster = ScoreForecaster.train(linear_histories())
+        self.assertTrue(forecaster.is_trained)
+        self.assertEqual(forecaster.metadata['subjects'], 3)
+        self.assertEqual(set(forecaster.subject_offsets), {'maths', 'science', 'english'})
+
+        maths = np.array([60.0, 63.0, 66.0])
+        predictions = forecaster.forecast({'Maths': maths, 'Art': np.array([55.0])})
+        expected = forecaster.model.predict([history_features(maths)])[0] + forecaster.subject_offsets['maths']
+        self.assertAlmostEqual(predictions['Maths']['predicted_score'], expected)
+        self.assertAlmostEqual(predictions['Maths']['predicted_score'], 69.0, delta=2)
+        self.assertEqual(predictions['Maths']['method'], 'model')
+        self.assertEqual((predictions['Art']['predicted_score'], predictions['Art']['method']), (55.0, 'trend'))
+
+    def test_training_needs_a_history_to_learn_from(self):
+        with self.assertRaises(ValueError):
+            ScoreForecaster.train([('Maths', np.array([70.0, 72.0]))])
+
+    def test_subject_keys_ignore_case_and_spacing(self):
+        self.assertEqual(normalize_subject('  Social   Studies '), 'social studies')
+
+    def test_session_histories_from_both_payload_shapes(self):
+        tidy = [{'Subject': 'Maths', 'Score': 70}, {'Subject': 'Maths', 'Score': 75}, {'Subject': 'Art'}]
+        summary = {'Maths': {'scores': [70, 75], 'average': 72.5}, 'Art': {'average': 60}}
+        for raw_data in (tidy, summary):
+            with self.subTest(raw_data=raw_data):
+                (subject, scores), = session_subject_histories(raw_data)
+                self.assertEqual((subject, scores.tolist()), ('Maths', [70.0, 75.0]))
+
+
+class ForecasterArtifactTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.path = os.path.join(self.directory, 'score_forecaster.joblib')
+        self.addCleanup(reset_forecaster)
+
+    def test_saved_forecaster_loads_unchanged(self):
+        forecaster = ScoreForecaster.train(linear_histories())
+        forecaster.save(self.path)
+        loaded = ScoreForecaster.load(self.path)
+        subject_scores = {'Science': np.array([50.0, 52.0, 55.0])}
+        self.assertEqual(loaded.forecast(subject_scores), forecaster.forecast(subject_scores))
+        self.assertEqual(loaded.metadata, forecaster.metadata)
+
+    def test_missing_or_incompatible_artifacts_fall_back_to_the_trend(self):
+        self.assertFalse(ScoreForecaster.load(self.path).is_trained)
+        joblib.dump({'model': None, 'subject_offsets': {}, 'metadata': {'version': 0}}, self.path)
+        self.assertFalse(ScoreForecaster.load(self.path).is_trained)
+
+    def test_analyzer_uses_the_shared_forecaster(self):
+        ScoreForecaster.train(linear_histories()).save(self.path)
+        scores = pd.DataFrame({'Subject': ['Maths'] * 3 + ['Art'], 'Score': [60.0, 63.0, 66.0, 55.0]})
+        with override_settings(SCORE_FORECASTER_PATH=self.path):
+            reset_forecaster()
+            analyzer = AcademicDataAnalyzer(scores)
+            self.assertTrue(analyzer.process_data())
+            predictions = analyzer._predictive_analysis()
+        self.assertEqual(predictions['Maths']['method'], 'model')
+        self.assertEqual(predictions['Art']['method'], 'trend')
+
+
+def extract_row_by_row(df):
+    """The per-row extraction that _extract_data_from_excel replaced, as a reference"""
+    data = {}
+    subject_col = None
+    score_cols = []
+    for col in df.columns:
+        col_lower = str(col).lower()
+        if any(word in col_lower for word in ['subject', 'course', 'paper']):
+            subject_col = col
+        elif any(word in col_lower for word in ['score', 'mark', 'grade', 'result']):
+            score_cols.append(col)
+
+    if subject_col and score_cols:
+        for _, row in df.iterrows():
+            scores = []
+            for score_col in score_cols:
+                try:
+                    score = float(row[score_col])
+                    if 0 <= score <= 100:
+                        scores.append(score)
+                except (ValueError, TypeError):
+                    continue
+            if scores:
+                data[str(row[subject_col])] = {
+                    'scores': scores,
+                    'average': np.mean(scores),
+                    'max_score': max(scores),
+                    'min_score': min(scores)
+                }
+    return data
+
+
+class ExcelExtractionTests(SimpleTestCase):
+
+    def assertMatchesRowByRow(self, df):
+        expected = extract_row_by_row(df)
+        actual = _subject_summary(_extract_data_from_excel(df))
+        self.assertEqual(list(actual), list(expected))
+        for subject, summary in expected.items():
+            self.assertEqual(actual[subject]['scores'], summary['scores'])
+            self.assertAlmostEqual(actual[subject]['average'], summary['average'])
+            self.assertEqual(actual[subject]['max_score'], summary['max_score'])
+            self.assertEqual(actual[subject]['min_score'], summary['min_score'])
+        return actual
+
+    def test_repeated_subject_keeps_its_last_row_with_scores(self):
+        df = pd.DataFrame({
+            'Subject': ['Maths', 'Science', 'Maths', 'English', 'Maths'],
+            'Term 1 Marks': [50, 60, 70, 80, None],
+            'Term 2 Marks': [55, 65, 75, 85, 'absent'],
+        })
+        summary = self.assertMatchesRowByRow(df)
+        self.assertEqual(list(summary), ['Maths', 'Science', 'English'])
+        self.assertEqual(summary['Maths']['scores'], [70.0, 75.0])
+
+    def test_missing_text_and_out_of_range_cells_are_skipped(self):
+        df = pd.DataFrame({
+            'Course': ['Maths', 'Science', np.nan, 'Art', 'Music'],
+            'Score A': [np.nan, '88', 70, 'abc', 120],
+            'Score B': [64.5, -5, 71, 90, np.nan],
+            'Notes': ['x', 'y', 'z', 'w', 'v'],
+        })
+        summary = self.assertMatchesRowByRow(df)
+        # A blank subject is kept under 'nan', as the row loop did
+        self.assertEqual(list(summary), ['Maths', 'Science', 'nan', 'Art'])
+        self.assertEqual(summary['Science']['scores'], [88.0])
+
+    def test_subject_aggregates(self):
+        df = pd.DataFrame({'Paper': ['Physics'], 'Mark 1': [60], 'Mark 2': [90], 'Mark 3': [75]})
+        self.assertEqual(self.assertMatchesRowByRow(df)['Physics'], {
+            'scores': [60.0, 90.0, 75.0], 'average': 75.0, 'max_score': 90.0, 'min_score': 60.0
+        })
+
+    def test_sheets_without_subject_or_score_columns_are_empty(self):
+        for df in (pd.DataFrame({'Name': ['A'], 'Score': [50]}), pd.DataFrame({'Subject': ['Maths'], 'Teacher': ['B']})):
+            with self.subTest(columns=list(df.columns)):
+                self.assertEqual(self.assertMatchesRowByRow(df), {})
+
+    def test_random_sheets_match_the_row_loop(self):
+        rng = np.random.default_rng(0)
+        for seed in range(20):
+            rows = int(rng.integers(1, 30))
+            values = rng.uniform(-20, 120, size=(rows, 3)).round(1).astype(object)
+            values[rng.random(values.shape) < 0.2] = np.nan
+            values[rng.random(values.shape) < 0.05] = 'n/a'
+            df = pd.DataFrame(values, columns=['Marks 1', 'Marks 2', 'Result'])
+            df.insert(0, 'Subject', rng.choice(['Maths', 'Science', 'English', 'Art'], size=rows))
+            with self.subTest(seed=seed):
+                self.assertMatchesRowByRow(df)
+
+
+class FrameworkRegistryTests(SimpleTestCase):
+
+    def test_frameworks_are_built_once_per_process(self):
+        builder = mock.Mock(wraps=AcademicFrameworks.get_cbse_framework)
+        with mock.patch('parent_dashboard.frameworks._registry', None), \
+                mock.patch.dict(FRAMEWORK_BUILDERS, {'cbse': builder}):
+            registry = get_framework_registry()
+            self.assertIs(get_framework_registry(), registry)
+            self.assertIs(get_framework('cbse'), get_framework('cbse'))
+            self.assertIs(get_framework('cbse'), registry.get('cbse'))
+        builder.assert_called_once_with()
+
+    def test_specs_match_the_framework_definitions(self):
+        registry = get_framework_registry()
+        self.assertEqual(registry.keys(), tuple(FRAMEWORK_BUILDERS))
+        for key, builder in FRAMEWORK_BUILDERS.items():
+            with self.subTest(framework=key):
+                definition = builder()
+                spec = registry.get(key)
+                self.assertEqual(spec.domain_keys, tuple(definition))
+                for domain_key, domain in definition.items():
+                    domain_spec = spec.domain(domain_key)
+                    self.assertEqual(
+                        (domain_spec.domain_name, domain_spec.domain_weight, domain_spec.age_appropriate),
+                        (domain.domain_name, domain.domain_weight, tuple(domain.age_appropriate))
+                    )
+                    self.assertEqual(
+                        [(c.name, c.weight, c.min_score, c.max_score, dict(c.competency_levels), list(c.assessment_methods))
+                         for c in domain_spec.criteria],
+                        [(c.name, c.weight, c.min_score, c.max_score, c.competency_levels, c.assessment_methods)
+                         for c in domain.criteria]
+                    )
+                    self.assertEqual(domain_spec.criterion_weights.tolist(), [c.weight for c in domain.criteria])
+
+    def test_indexes(self):
+        cbse = get_framework('cbse')
+        criterion = cbse.criterion('mathematics.numerical_ability')
+        self.assertEqual(criterion.name, 'Numerical Ability')
+        self.assertEqual(
+            [criterion.competency_level(score) for score in (0, 24.9, 25, 60, 100)],
+            ['basic', 'basic', 'proficient', 'advanced', 'expert']
+        )
+        self.assertEqual(cbse.domains_for_age(7), ('mathematics', 'language_arts'))
+        self.assertEqual(cbse.domains_for_age(12), cbse.domain_keys)
+        self.assertEqual(cbse.domains_for_age(99), ())
+
+    def test_specs_are_immutable(self):
+        cbse = get_framework('cbse')
+        with self.assertRaises(FrozenInstanceError):
+            cbse.key = 'other'
+        with self.assertRaises(TypeError):
+            cbse.domains['extra'] = None
+        with self.assertRaises(ValueError):
+            cbse.domain_weights[0] = 1.0
+        # Mutating a fresh definition, as the ICSE builder does, leaves the registry alone
+        AcademicFrameworks.get_cbse_framework()['mathematics'].criteria[0].weight = 0
+        self.assertEqual(cbse.criterion('mathematics.numerical_ability').weight, 0.3)
+
+    def test_model_integration_uses_the_same_weights_and_domains(self):
+        scores = {'mathematics': 80, 'language_arts': 65, 'sciences': 90, 'social_studies': 70, 'art': 100}
+        prediction = MLModelIntegration.predict_academic_performance({}, scores)
+        # The weights MLModelIntegration hardcoded before the registry
+        expected = (
+            scores['mathematics'] * 0.25 + scores['language_arts'] * 0.25 +
+            scores['sciences'] * 0.25 + scores['social_studies'] * 0.25
+        )
+        self.assertEqual(prediction['overall_academic_score'], round(expected, 2))
+
+        holland = ('realistic', 'investigative', 'artistic', 'social', 'enterprising', 'conventional')
+        self.assertEqual(get_framework('holland').domain_keys, holland)
+        alignment = MLModelIntegration.predict_career_alignment(
+            {'social': 80, 'artistic': 80, 'investigative': 60, 'realistic': 10}, {}
+        )
+        self.assertEqual(alignment['holland_code'], 'ASI')
+        self.assertEqual(alignment['primary_interests'], ['artistic', 'social', 'investigative'])
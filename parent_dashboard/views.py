@@ -29,6 +29,7 @@ from .models import (
     Recommendation, CareerMapping, ParentFeedback
 )
 from students.models import Student
+from dashboard.result_store import get_result, put_result, result_key
 
 
 def parent_login_view(request):
@@ -1120,21 +1121,37 @@ def api_upload_file(request):
         if not uploaded_file:
             return JsonResponse({'status': 'error', 'message': 'No file uploaded'})
         
-        # Save uploaded file temporarily
+        # Save uploaded file temporarily, hashing it on the way
+        import hashlib
         import tempfile
         import os
         from .analyzers import process_file_and_analyze
         
+        digest = hashlib.sha256()
         with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as temp_file:
             for chunk in uploaded_file.chunks():
+                digest.update(chunk)
                 temp_file.write(chunk)
             temp_file_path = temp_file.name
+        content_hash = digest.hexdigest()
         
         try:
-            # Perform advanced analysis
             curriculum = request.POST.get('curriculum', 'CBSE')
             semester = request.POST.get('semester', 'Current')
+            student_id = request.POST.get('student_id', 1)  # Default for demo
+            
+            # An identical file already analysed for this student is not analysed again
+            duplicate = find_duplicate_upload_session(
+                request.user, student_id, content_hash, curriculum, semester
+            )
+            if duplicate:
+                previous_session, previous_result = duplicate
+                request.session[f'analysis_results_{previous_session.id}'] = result_key('upload_session', previous_session.id)
+                return JsonResponse(build_upload_analysis_response(
+                    previous_session, previous_result, duplicate=True
+                ))
             
+            # Perform advanced analysis
             analysis_result, error = process_file_and_analyze(temp_file_path, curriculum, semester)
             
             if error:
@@ -1143,10 +1160,11 @@ def api_upload_file(request):
             # Create upload session with analysis results
             upload_session = UploadSession.objects.create(
                 parent_user=request.user,
-                student_id=request.POST.get('student_id', 1),  # Default for demo
+                student_id=student_id,
                 upload_type='excel' if uploaded_file.name.endswith(('.xlsx', '.xls')) else 'csv' if uploaded_file.name.endswith('.csv') else 'image',
                 status='completed',
                 file_path=uploaded_file,
+                content_hash=content_hash,
                 detected_curriculum=curriculum,
                 detected_semester=semester,
                 detected_year='2024-25',
@@ -1154,29 +1172,16 @@ def api_upload_file(request):
                 raw_data=analysis_result['processed_data']
             )
             
-            # Store analysis results in session for later use
-            request.session[f'analysis_results_{upload_session.id}'] = analysis_result
+            # Keep the full analysis server-side; the session only references it
+            request.session[f'analysis_results_{upload_session.id}'] = put_result(
+                result_key('upload_session', upload_session.id), analysis_result
+            )
             
             # Calculate assessment based on analysis
             success = calculate_assessment_from_analysis(upload_session, analysis_result)
             
             if success:
-                return JsonResponse({
-                    'status': 'success', 
-                    'message': 'File analyzed successfully with advanced algorithms',
-                    'session_id': upload_session.id,
-                    'detected_curriculum': upload_session.detected_curriculum,
-                    'detected_semester': upload_session.detected_semester,
-                    'subjects': upload_session.detected_subjects,
-                    'analysis_summary': {
-                        'statistical': analysis_result['analysis_results'].get('statistical', {}),
-                        'trends': analysis_result['analysis_results'].get('trends', {}),
-                        'classification': analysis_result['analysis_results'].get('classification', {}),
-                        'predictions': analysis_result['analysis_results'].get('predictions', {}),
-                        'benchmarks': analysis_result['analysis_results'].get('benchmarks', {})
-                    },
-                    'graph_data': analysis_result['graph_data']
-                })
+                return JsonResponse(build_upload_analysis_response(upload_session, analysis_result))
             else:
                 return JsonResponse({'status': 'error', 'message': 'Failed to calculate assessment'})
                 
@@ -1188,6 +1193,47 @@ def api_upload_file(request):
         return JsonResponse({'status': 'error', 'message': str(e)})
 
 
+def find_duplicate_upload_session(parent_user, student_id, content_hash, curriculum, semester):
+    """Find a completed, fully assessed upload of the same file with its stored analysis"""
+    candidates = UploadSession.objects.filter(
+        parent_user=parent_user,
+        student_id=student_id,
+        content_hash=content_hash,
+        detected_curriculum=curriculum,
+        detected_semester=semester,
+        status='completed',
+        assessmentcalculation__isnull=False
+    ).order_by('-created_at')
+    
+    for candidate in candidates:
+        analysis_result = get_result(result_key('upload_session', candidate.id))
+        if analysis_result and analysis_result.get('analysis_results'):
+            return candidate, analysis_result
+    return None
+
+
+def build_upload_analysis_response(upload_session, analysis_result, duplicate=False):
+    """Build the JSON payload returned to the upload workflow"""
+    analyses = analysis_result['analysis_results']
+    return {
+        'status': 'success',
+        'message': 'File already analyzed; previous results reused' if duplicate else 'File analyzed successfully with advanced algorithms',
+        'session_id': upload_session.id,
+        'duplicate': duplicate,
+        'detected_curriculum': upload_session.detected_curriculum,
+        'detected_semester': upload_session.detected_semester,
+        'subjects': upload_session.detected_subjects,
+        'analysis_summary': {
+            'statistical': analyses.get('statistical', {}),
+            'trends': analyses.get('trends', {}),
+            'classification': analyses.get('classification', {}),
+            'predictions': analyses.get('predictions', {}),
+            'benchmarks': analyses.get('benchmarks', {})
+        },
+        'graph_data': analysis_result['graph_data']
+    }
+
+
 @login_required
 @csrf_exempt
 def api_process_data(request):
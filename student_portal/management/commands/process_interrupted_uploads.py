@@ -0,0 +1,29 @@
+"""
+Process uploads whose background job was lost, e.g. when the worker pool restarted
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from student_portal.upload_processor import interrupted_uploads, run_upload_job
+
+
+class Command(BaseCommand):
+    help = ('Re-run uploads left pending or processing (jobs on the in-process worker pool do not survive '
+            'a restart); run after each deploy or restart')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=15,
+                            help='Minutes since the worker last reported progress, or since upload if it never started; '
+                                 'more recent uploads may still be running on a live worker')
+
+    def handle(self, *args, **options):
+        older_than = timedelta(minutes=options['older_than'])
+        upload_ids = list(interrupted_uploads(older_than).values_list('id', flat=True))
+        processed = 0
+        for upload_id in upload_ids:
+            # Re-claimed only if still stale, so an upload a live worker has picked up since is left alone
+            processed += run_upload_job(upload_id, stale_before=timezone.now() - older_than)
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} interrupted uploads"))
@@ -1,3 +1,219 @@
-from django.test import TestCase
+import csv
+import hashlib
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from epr_system.data_models import AcademicDataEntry, DataUpload, DataValidationIssue, StudentDataProfile
+from epr_system.file_processors import DataValidator, HashingFile
+from students.models import User
+
+from .upload_processor import (
+    UploadClaimLost, claim_upload, interrupted_uploads, process_uploaded_file, report_progress
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+ACADEMIC_CSV = (
+    b'subject,marks,total_marks,academic_year\n'
+    b'mathematics,88,100,2024-25\n'
+    b'science,1200,100,2024-25\n'
+    b'english,,100,2024-25\n'
+)
+
+
+def parse_academic_csv(processor):
+    """Stand-in for FileProcessor.process, whose CSV parsing is disabled while pandas is not imported there"""
+    with open(processor.file_path, newline='') as f:
+        records = []
+        for row in csv.DictReader(f):
+            record = {'subject': row['subject'], 'total_marks': float(row['total_marks']), 'academic_year': row['academic_year']}
+            if row['marks']:
+                record['marks_obtained'] = float(row['marks'])
+                record['percentage'] = record['marks_obtained'] / record['total_marks'] * 100
+            records.append(record)
+    return {'success': True, 'data_type': 'academic', 'extracted_data': records, 'validation_errors': [], 'confidence_score': 0.8}
+
+
+def process_by_id(upload_id, stale_before=None):
+    """Stand-in for run_upload_job that stays on the test's database connection"""
+    upload = claim_upload(upload_id, stale_before)
+    if upload is None:
+        return False
+    process_uploaded_file(upload)
+    return True
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class UploadTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(username='student', password='x', role='student')
+        StudentDataProfile.objects.create(student=cls.student, current_academic_year='2024-25')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.enterContext(mock.patch('epr_system.file_processors.FileProcessor.process', parse_academic_csv))
+        self.client.force_login(self.student)
+
+    def upload(self, content=ACADEMIC_CSV, name='marks.csv'):
+        """Post a file and run the queued job in the test thread"""
+        with mock.patch('student_portal.views.enqueue_upload') as enqueue:
+            response = self.client.post(reverse('student_portal:api_upload'), {
+                'file': SimpleUploadedFile(name, content, content_type='text/csv'),
+                'upload_type': 'academic',
+                'academic_year': '2024-25',
+            }).json()
+        self.assertTrue(response['success'], response.get('error'))
+        for call in enqueue.call_args_list:
+            process_by_id(call.args[0].id)
+        return response
+
+
+class UploadProcessingTests(UploadTestCase):
+
+    def test_upload_is_queued_and_processed(self):
+        response = self.upload()
+        upload = DataUpload.objects.get(pk=response['upload_id'])
+        self.assertEqual(upload.content_hash, hashlib.sha256(ACADEMIC_CSV).hexdigest())
+        self.assertEqual((upload.processing_status, upload.processing_stage, upload.processing_progress), ('completed', 'done', 100))
+
+        status = self.client.get(response['status_url']).json()
+        self.assertTrue(status['finished'])
+        self.assertEqual(status['validation_issue_count'], len(upload.validation_errors))
+
+        self.assertEqual(
+            dict(AcademicDataEntry.objects.filter(student=self.student).values_list('subject', 'marks_obtained')),
+            {'mathematics': 88.0, 'science': 1200.0, 'english': 0.0}
+        )
+        self.assertTrue(StudentDataProfile.objects.get(student=self.student).academic_data_complete)
+
+    def test_validation_issues_are_stored(self):
+        upload = DataUpload.objects.get(pk=self.upload()['upload_id'])
+        issues = DataValidationIssue.objects.filter(object_id=upload.id)
+        self.assertEqual(
+            sorted(issues.values_list('field_name', 'issue_type')),
+            [('marks_obtained', 'range_error'), ('percentage', 'range_error')]
+        )
+        self.assertTrue(all(issue.description.startswith('Row 2:') for issue in issues))
+
+    def test_reuploading_with_new_marks_updates_the_entries(self):
+        self.upload()
+        self.upload(ACADEMIC_CSV.replace(b'mathematics,88', b'mathematics,91'), name='marks-v2.csv')
+        entries = AcademicDataEntry.objects.filter(student=self.student)
+        self.assertEqual(entries.count(), 3)
+        self.assertEqual(entries.get(subject='mathematics').marks_obtained, 91.0)
+
+    def test_identical_file_reuses_the_previous_upload(self):
+        first = self.upload()
+        second = self.upload(name='marks-copy.csv')
+        self.assertEqual(second['duplicate_of'], first['upload_id'])
+
+        original, duplicate = DataUpload.objects.get(pk=first['upload_id']), DataUpload.objects.get(pk=second['upload_id'])
+        self.assertEqual(duplicate.file.name, original.file.name)
+        self.assertEqual(duplicate.extracted_data, original.extracted_data)
+        self.assertEqual(AcademicDataEntry.objects.filter(student=self.student).count(), 3)
+
+
+class InterruptedUploadTests(UploadTestCase):
+
+    def queue_upload(self, minutes_ago, heartbeat_minutes_ago=None):
+        upload = DataUpload.objects.create(
+            student=self.student, file=SimpleUploadedFile('marks.csv', ACADEMIC_CSV), original_filename='marks.csv',
+            file_size=len(ACADEMIC_CSV), file_type='csv', upload_type='academic', academic_year='2024-25',
+            processing_status='processing', processing_stage='persist', processing_progress=60
+        )
+        heartbeat_at = None if heartbeat_minutes_ago is None else timezone.now() - timedelta(minutes=heartbeat_minutes_ago)
+        DataUpload.objects.filter(pk=upload.pk).update(
+            created_at=timezone.now() - timedelta(minutes=minutes_ago), heartbeat_at=heartbeat_at
+        )
+        upload.refresh_from_db()
+        return upload
+
+    def test_command_reruns_stale_uploads(self):
+        stale, recent = self.queue_upload(30), self.queue_upload(1)
+        self.assertEqual(list(interrupted_uploads(timedelta(minutes=15))), [stale])
+
+        out = StringIO()
+        with mock.patch('student_portal.management.commands.process_interrupted_uploads.run_upload_job', process_by_id):
+            call_command('process_interrupted_uploads', stdout=out)
+        self.assertIn('Processed 1 interrupted uploads', out.getvalue())
+
+        stale.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(stale.processing_status, 'completed')
+        self.assertEqual(recent.processing_status, 'processing')
+        self.assertEqual(DataValidationIssue.objects.filter(object_id=stale.id).count(), 2)
+
+    def test_staleness_is_measured_from_the_last_heartbeat(self):
+        working = self.queue_upload(30, heartbeat_minutes_ago=1)
+        stalled = self.queue_upload(30, heartbeat_minutes_ago=20)
+        self.assertEqual(list(interrupted_uploads(timedelta(minutes=15))), [stalled])
+        self.assertIsNone(claim_upload(working.id, timezone.now() - timedelta(minutes=15)))
+
+    def test_an_upload_is_claimed_once(self):
+        upload = self.queue_upload(30)
+        cutoff = timezone.now() - timedelta(minutes=15)
+        self.assertIsNotNone(claim_upload(upload.id, cutoff))
+        self.assertIsNone(claim_upload(upload.id, cutoff))
+        # The worker that queued it finds it taken when it gets to it
+        self.assertIsNone(claim_upload(upload.id))
+
+    def test_a_worker_that_lost_its_claim_stops(self):
+        stalled = self.queue_upload(30, heartbeat_minutes_ago=20)
+        second = claim_upload(stalled.id, timezone.now() - timedelta(minutes=15))
+        with self.assertRaises(UploadClaimLost):
+            report_progress(stalled, 'recalc')
+
+        process_uploaded_file(stalled)
+        self.assertFalse(AcademicDataEntry.objects.filter(student=self.student).exists())
+        process_uploaded_file(second)
+        stalled.refresh_from_db()
+        self.assertEqual(stalled.processing_status, 'completed')
+
+
+class HashingFileTests(TestCase):
+
+    def test_hash_is_computed_from_the_chunks_storage_reads(self):
+        content = b'x' * (3 * 64 * 1024 + 17)
+        hashing_file = HashingFile(SimpleUploadedFile('big.csv', content))
+        self.assertEqual(b''.join(hashing_file.chunks(64 * 1024)), content)
+        self.assertEqual(hashing_file.content_hash, hashlib.sha256(content).hexdigest())
+
+
+class DataValidatorTests(TestCase):
+
+    def test_column_checks_match_per_record_validation(self):
+        # As the extractors produce them: blank optional values are left out of the record
+        records = [
+            {'subject': 'mathematics', 'marks_obtained': 50, 'total_marks': 100, 'percentage': 50},
+            {'subject': '', 'marks_obtained': -1, 'total_marks': 0},
+            {'marks_obtained': 'abc', 'percentage': 101, 'attendance': '95'},
+            {'subject': 'science', 'attendance': 100.5},
+        ]
+        validator = DataValidator()
+        issues = validator.validate_records(records, 'academic')
+        for index, record in enumerate(records):
+            with self.subTest(record=record):
+                expected = validator.validate_data(record, 'academic')
+                actual = [
+                    {key: value for key, value in issue.items() if key != 'record_index'}
+                    for issue in issues if issue['record_index'] == index
+                ]
+                self.assertCountEqual(actual, expected)
+
+    def test_unknown_data_type_has_no_issues(self):
+        self.assertEqual(DataValidator().validate_records([{'a': 1}], 'unknown'), [])
@@ -0,0 +1,393 @@
+"""
+Background processing of student data uploads
+Runs the parse, validate, persist and recalc stages on a local worker pool
+and reports progress on the DataUpload record so the request can return immediately
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from epr_system.data_models import (
+    StudentDataProfile, DataUpload, AcademicDataEntry,
+    PsychologicalDataEntry, PhysicalDataEntry, DataValidationIssue
+)
+from epr_system.file_processors import FileProcessor, DataValidator
+from epr_system.bulk_upsert import bulk_upsert
+
+logger = logging.getLogger(__name__)
+
+# Progress reported when each stage starts
+STAGE_PROGRESS = {
+    'parse': 5,
+    'validate': 40,
+    'persist': 60,
+    'recalc': 90,
+    'done': 100,
+}
+
+# Fields written when a job finishes
+RESULT_FIELDS = (
+    'extracted_data', 'confidence_score', 'validation_errors', 'processing_status', 'processing_stage',
+    'processing_progress', 'processing_notes', 'processed_at'
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide upload worker pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'UPLOAD_PROCESSING_WORKERS', 2),
+                    thread_name_prefix='upload-worker'
+                )
+    return _executor
+
+def enqueue_upload(upload: DataUpload):
+    """Schedule an upload for background processing once the current transaction commits"""
+    upload_id = upload.id
+    transaction.on_commit(lambda: get_executor().submit(run_upload_job, upload_id))
+
+def run_upload_job(upload_id: int, stale_before=None) -> bool:
+    """Worker entry point: claim and process one upload with thread-local database connections"""
+    close_old_connections()
+    try:
+        upload = claim_upload(upload_id, stale_before)
+        if upload is None:
+            logger.info(f"Upload job {upload_id} skipped: another worker has claimed it")
+            return False
+        process_uploaded_file(upload)
+        return True
+    except Exception:
+        logger.exception(f"Upload job {upload_id} crashed")
+        return False
+    finally:
+        close_old_connections()
+
+def _stale(before) -> Q:
+    """Uploads whose worker last reported progress before the cutoff, or that never started by then"""
+    return Q(heartbeat_at__lte=before) | Q(heartbeat_at__isnull=True, created_at__lte=before)
+
+def interrupted_uploads(older_than: timedelta):
+    """Uploads pending or processing with no progress for older_than, e.g. queued on a worker pool that was restarted"""
+    return DataUpload.objects.filter(
+        _stale(timezone.now() - older_than),
+        processing_status__in=('pending', 'processing'),
+        duplicate_of__isnull=True
+    ).order_by('created_at')
+
+def claim_upload(upload_id: int, stale_before=None) -> Optional[DataUpload]:
+    """
+    Take an upload for processing with a conditional status update, so only one worker runs it.
+    A queued upload is claimed while it is still pending; with stale_before, an interrupted upload
+    is re-claimed and its partial results are cleared. Returns None when another worker holds the upload.
+    """
+    now = timezone.now()
+    if stale_before is None:
+        claimed = DataUpload.objects.filter(pk=upload_id, processing_status='pending').update(
+            processing_status='processing', heartbeat_at=now
+        )
+    else:
+        claimed = DataUpload.objects.filter(
+            _stale(stale_before), pk=upload_id, processing_status__in=('pending', 'processing')
+        ).update(
+            processing_status='processing', processing_stage='queued', processing_progress=0,
+            processing_notes='', heartbeat_at=now
+        )
+        if claimed:
+            DataValidationIssue.objects.filter(
+                content_type=ContentType.objects.get_for_model(DataUpload), object_id=upload_id
+            ).delete()
+    if not claimed:
+        return None
+    return DataUpload.objects.select_related('student').get(pk=upload_id)
+
+class UploadClaimLost(Exception):
+    """Raised when an upload was re-claimed by another worker while this one was processing it"""
+
+def report_progress(upload: DataUpload, stage: str):
+    """Record the current stage and heartbeat without rewriting the whole upload row"""
+    heartbeat_at = timezone.now()
+    updated = DataUpload.objects.filter(pk=upload.pk, heartbeat_at=upload.heartbeat_at).update(
+        processing_status='processing',
+        processing_stage=stage,
+        processing_progress=STAGE_PROGRESS[stage],
+        heartbeat_at=heartbeat_at
+    )
+    if not updated:
+        raise UploadClaimLost(f"Upload {upload.pk} was claimed by another worker")
+    upload.processing_status = 'processing'
+    upload.processing_stage = stage
+    upload.processing_progress = STAGE_PROGRESS[stage]
+    upload.heartbeat_at = heartbeat_at
+
+def get_upload_status(upload: DataUpload) -> Dict[str, Any]:
+    """Serialize the progress fields polled by the upload page"""
+    return {
+        'upload_id': upload.id,
+        'status': upload.processing_status,
+        'stage': upload.processing_stage,
+        'progress': upload.processing_progress,
+        'notes': upload.processing_notes,
+        'validation_issue_count': len(upload.validation_errors),
+        'finished': upload.processing_status in ('completed', 'failed', 'needs_review'),
+        'processed_at': upload.processed_at.isoformat() if upload.processed_at else None,
+    }
+
+def process_uploaded_file(upload: DataUpload):
+    """Process uploaded file and extract data"""
+    try:
+        # Stage 1: parse
+        report_progress(upload, 'parse')
+        processor = FileProcessor(upload.file.path, upload.file_type)
+        result = processor.process()
+
+        if result['success']:
+            upload.extracted_data = result.get('extracted_data', {})
+            upload.confidence_score = result.get('confidence_score', 0.0)
+
+            # Stage 2: validate
+            report_progress(upload, 'validate')
+            upload.validation_errors = result.get('validation_errors', []) + validate_extracted_records(upload, result)
+
+            # Stage 3: persist
+            report_progress(upload, 'persist')
+            create_data_entries_from_upload(upload, result)
+
+            # Stage 4: recalc
+            report_progress(upload, 'recalc')
+            update_profile_completion(upload.student.data_profile)
+
+            upload.processing_status = 'completed'
+
+        else:
+            upload.processing_status = 'failed'
+            upload.processing_notes = result.get('error', 'Processing failed')
+
+    except UploadClaimLost:
+        logger.warning(f"Upload {upload.pk} was re-claimed while processing; leaving it to the new worker")
+        return
+
+    except Exception as e:
+        upload.processing_status = 'failed'
+        upload.processing_notes = f"Processing error: {str(e)}"
+
+    upload.processing_stage = 'done'
+    upload.processing_progress = STAGE_PROGRESS['done']
+    upload.processed_at = timezone.now()
+    # Only the worker holding the claim records the result
+    finished = DataUpload.objects.filter(pk=upload.pk, heartbeat_at=upload.heartbeat_at).update(
+        **{field: getattr(upload, field) for field in RESULT_FIELDS}
+    )
+    if not finished:
+        logger.warning(f"Upload {upload.pk} was re-claimed while processing; leaving it to the new worker")
+
+# DataValidator issue codes mapped to DataValidationIssue.issue_type
+VALIDATION_ISSUE_TYPES = {
+    'missing_value': 'missing_data',
+    'invalid_type': 'format_error',
+    'invalid_choice': 'invalid_value',
+    'value_too_low': 'range_error',
+    'value_too_high': 'range_error',
+    'entry_error': 'format_error',
+}
+
+def validate_extracted_records(upload: DataUpload, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Validate all extracted records column-wise and store the issues in bulk"""
+    extracted_data = result.get('extracted_data', {})
+    data_type = result.get('data_type', 'unknown')
+    if not isinstance(extracted_data, list):
+        return []
+
+    issues = DataValidator().validate_records(extracted_data, data_type)
+    if issues:
+        save_validation_issues(upload, issues, data_type)
+    return issues
+
+def save_validation_issues(upload: DataUpload, issues: List[Dict[str, Any]], data_category: str):
+    """Create DataValidationIssue rows for an upload in batched inserts"""
+    content_type = ContentType.objects.get_for_model(DataUpload)
+    DataValidationIssue.objects.bulk_create([
+        DataValidationIssue(
+            student_id=upload.student_id,
+            issue_type=VALIDATION_ISSUE_TYPES.get(issue['issue'], 'other'),
+            severity=issue['severity'],
+            status='open',
+            data_category=data_category,
+            field_name=issue['field'],
+            current_value='' if issue['current_value'] is None else str(issue['current_value']),
+            description=issue.get('description') or f"Row {issue['record_index'] + 1}: {issue['field']} {issue['issue'].replace('_', ' ')}",
+            content_type=content_type,
+            object_id=upload.id,
+        )
+        for issue in issues
+    ], batch_size=1000)
+
+def create_data_entries_from_upload(upload: DataUpload, result: Dict[str, Any]) -> Dict[str, int]:
+    """Upsert the extracted records of an upload into the data entry tables"""
+    counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    try:
+        extracted_data = result.get('extracted_data', {})
+        data_type = result.get('data_type', 'unknown')
+
+        if data_type not in ENTRY_UPSERT_SPECS or not isinstance(extracted_data, list):
+            return counts
+
+        model, build_entry, unique_fields, update_fields = ENTRY_UPSERT_SPECS[data_type]
+        profile = upload.student.data_profile
+
+        entries = []
+        failures = []
+        for index, record in enumerate(extracted_data):
+            try:
+                entries.append(build_entry(upload, record, profile))
+            except (ValueError, TypeError) as e:
+                failures.append({
+                    'field': f'{data_type}_entry',
+                    'issue': 'entry_error',
+                    'current_value': None,
+                    'severity': 'medium',
+                    'record_index': index,
+                    'description': f"Failed to create {data_type} entry from upload: {str(e)}"
+                })
+
+        counts = bulk_upsert(model, entries, unique_fields, update_fields)
+        counts['skipped'] += len(failures)
+
+        if failures:
+            save_validation_issues(upload, failures, data_type)
+
+        # Track every academic year seen in one profile update
+        new_years = {entry.academic_year for entry in entries if entry.academic_year} - set(profile.academic_years)
+        if new_years:
+            profile.academic_years.extend(sorted(new_years))
+            profile.save()
+
+        upload.processing_notes += (
+            f" Entries: {counts['inserted']} inserted, {counts['updated']} updated, {counts['skipped']} skipped."
+        )
+
+    except Exception as e:
+        upload.processing_notes += f" Data entry creation failed: {str(e)}"
+
+    return counts
+
+def _optional_float(value) -> Optional[float]:
+    """Convert an extracted value to float, keeping blanks as None"""
+    if value is None or value == '':
+        return None
+    return float(value)
+
+def _entry_date(value) -> date:
+    """Parse an extracted date, defaulting to today"""
+    if not value:
+        return timezone.now().date()
+    if isinstance(value, date):
+        return value
+    parsed = parse_date(str(value))
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value}")
+    return parsed
+
+def build_academic_entry(upload: DataUpload, record: Dict[str, Any], profile: StudentDataProfile) -> AcademicDataEntry:
+    """Build an unsaved academic data entry from an extracted record"""
+    marks_obtained = _optional_float(record.get('marks_obtained', 0)) or 0.0
+    total_marks = _optional_float(record.get('total_marks', 100)) or 100.0
+    percentage = _optional_float(record.get('percentage'))
+
+    # Mirrors AcademicDataEntry.save, which bulk writes bypass
+    if not percentage and marks_obtained and total_marks:
+        percentage = (marks_obtained / total_marks) * 100
+
+    return AcademicDataEntry(
+        student=upload.student,
+        data_profile=profile,
+        academic_year=record.get('academic_year', upload.academic_year or profile.current_academic_year),
+        class_grade=record.get('class_grade', ''),
+        subject=record.get('subject', 'general'),
+        assessment_type=record.get('assessment_type', 'other'),
+        marks_obtained=marks_obtained,
+        total_marks=total_marks,
+        percentage=percentage,
+        grade=record.get('grade', ''),
+        attendance_percentage=_optional_float(record.get('attendance')),
+        data_source='upload',
+        source_file=upload
+    )
+
+def build_psychological_entry(upload: DataUpload, record: Dict[str, Any], profile: StudentDataProfile) -> PsychologicalDataEntry:
+    """Build an unsaved psychological data entry from an extracted record"""
+    return PsychologicalDataEntry(
+        student=upload.student,
+        data_profile=profile,
+        assessment_date=_entry_date(record.get('assessment_date')),
+        academic_year=record.get('academic_year', upload.academic_year or profile.current_academic_year),
+        assessment_category=record.get('assessment_category', 'other'),
+        assessment_name=record.get('assessment_name', 'Uploaded Assessment'),
+        custom_scores=record,
+        data_source='upload',
+        source_file=upload
+    )
+
+def build_physical_entry(upload: DataUpload, record: Dict[str, Any], profile: StudentDataProfile) -> PhysicalDataEntry:
+    """Build an unsaved physical data entry from an extracted record"""
+    height_cm = _optional_float(record.get('height_cm'))
+    weight_kg = _optional_float(record.get('weight_kg'))
+    bmi = _optional_float(record.get('bmi'))
+
+    # Mirrors PhysicalDataEntry.save, which bulk writes bypass
+    if height_cm and weight_kg and not bmi:
+        bmi = weight_kg / ((height_cm / 100) ** 2)
+
+    return PhysicalDataEntry(
+        student=upload.student,
+        data_profile=profile,
+        measurement_date=_entry_date(record.get('measurement_date')),
+        academic_year=record.get('academic_year', upload.academic_year or profile.current_academic_year),
+        measurement_type=record.get('measurement_type', 'other'),
+        height_cm=height_cm,
+        weight_kg=weight_kg,
+        bmi=bmi,
+        data_source='upload',
+        source_file=upload
+    )
+
+# data_type -> (model, builder, natural key, fields refreshed when the key already exists)
+ENTRY_UPSERT_SPECS = {
+    'academic': (
+        AcademicDataEntry, build_academic_entry,
+        ['student', 'academic_year', 'subject', 'assessment_type'],
+        ['class_grade', 'marks_obtained', 'total_marks', 'percentage', 'grade',
+         'attendance_percentage', 'data_source', 'source_file', 'updated_at']
+    ),
+    'psychological': (
+        PsychologicalDataEntry, build_psychological_entry,
+        ['student', 'academic_year', 'assessment_date', 'assessment_category', 'assessment_name'],
+        ['custom_scores', 'data_source', 'source_file', 'updated_at']
+    ),
+    'physical': (
+        PhysicalDataEntry, build_physical_entry,
+        ['student', 'academic_year', 'measurement_date', 'measurement_type'],
+        ['height_cm', 'weight_kg', 'bmi', 'data_source', 'source_file', 'updated_at']
+    ),
+}
+
+def update_profile_completion(profile: StudentDataProfile):
+    """Update profile data completion status"""
+    profile.academic_data_complete = AcademicDataEntry.objects.filter(student=profile.student).exists()
+    profile.psychological_data_complete = PsychologicalDataEntry.objects.filter(student=profile.student).exists()
+    profile.physical_data_complete = PhysicalDataEntry.objects.filter(student=profile.student).exists()
+    profile.save()
@@ -19,6 +19,7 @@ urlpatterns = [
     
     # API endpoints for AJAX calls
     path('api/upload/', views.handle_file_upload, name='api_upload'),
+    path('api/upload/<int:upload_id>/status/', views.get_upload_processing_status, name='api_upload_status'),
     path('api/validation-action/', views.handle_validation_action, name='api_validation_action'),
     path('api/completion-status/', views.get_completion_status, name='api_completion_status'),
     path('api/analytics/', views.get_analytics_data, name='api_analytics'),
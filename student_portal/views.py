@@ -7,6 +7,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse, Http404
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core.files.storage import default_storage
@@ -26,9 +27,10 @@ from epr_system.data_models import (
     PsychologicalDataEntry, PhysicalDataEntry, DataValidationIssue,
     YearwiseDataSummary
 )
-from epr_system.file_processors import FileProcessor, DataValidator
+from epr_system.file_processors import HashingFile
 from epr_system.algorithms import EPRScoringAlgorithms
 from students.models import User
+from .upload_processor import enqueue_upload, get_upload_status
 
 @login_required
 def customer_dashboard(request):
@@ -217,11 +219,8 @@ def handle_file_upload(request):
         }
         
         file_type = file_type_mapping.get(file_extension, 'other')
-        
-        # Create upload record
-        upload = DataUpload.objects.create(
+        upload = DataUpload(
             student=request.user,
-            file=uploaded_file,
             original_filename=uploaded_file.name,
             file_size=uploaded_file.size,
             file_type=file_type,
@@ -230,179 +229,71 @@ def handle_file_upload(request):
             description=description,
             processing_status='pending'
         )
+        # Store the file, hashing its chunks as they are written
+        hashing_file = HashingFile(uploaded_file)
+        upload.file.save(uploaded_file.name, hashing_file, save=False)
+        upload.content_hash = hashing_file.content_hash
+        
+        # Reuse the extraction of an identical file this student already uploaded
+        previous_upload = find_duplicate_upload(request.user, upload.content_hash, academic_year)
+        if previous_upload:
+            upload.file.delete(save=False)
+            upload = link_duplicate_upload(previous_upload, uploaded_file.name, upload_type, description)
+            return JsonResponse({
+                'success': True,
+                'upload_id': upload.id,
+                'duplicate_of': previous_upload.id,
+                'message': 'This file was already processed; previous results have been reused'
+            })
+        
+        upload.save()
         
-        # Process file asynchronously (or immediately for demo)
-        process_uploaded_file(upload)
+        # Process file on the background worker pool
+        enqueue_upload(upload)
         
         return JsonResponse({
             'success': True,
             'upload_id': upload.id,
+            'job_id': upload.id,
+            'status_url': reverse('student_portal:api_upload_status', args=[upload.id]),
             'message': 'File uploaded successfully and processing started'
         })
         
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
-def process_uploaded_file(upload: DataUpload):
-    """Process uploaded file and extract data"""
-    try:
-        upload.processing_status = 'processing'
-        upload.save()
-        
-        # Initialize file processor
-        processor = FileProcessor(upload.file.path, upload.file_type)
-        
-        # Process file
-        result = processor.process()
-        
-        if result['success']:
-            upload.extracted_data = result.get('extracted_data', {})
-            upload.confidence_score = result.get('confidence_score', 0.0)
-            upload.processing_status = 'completed'
-            
-            # Create data entries based on extracted data
-            create_data_entries_from_upload(upload, result)
-            
-        else:
-            upload.processing_status = 'failed'
-            upload.processing_notes = result.get('error', 'Processing failed')
-        
-        upload.processed_at = timezone.now()
-        upload.save()
-        
-    except Exception as e:
-        upload.processing_status = 'failed'
-        upload.processing_notes = f"Processing error: {str(e)}"
-        upload.processed_at = timezone.now()
-        upload.save()
-
-def create_data_entries_from_upload(upload: DataUpload, result: Dict[str, Any]):
-    """Create data entries from processed upload"""
-    try:
-        extracted_data = result.get('extracted_data', {})
-        data_type = result.get('data_type', 'unknown')
-        
-        profile = upload.student.data_profile
-        
-        if data_type == 'academic' and isinstance(extracted_data, list):
-            for record in extracted_data:
-                create_academic_entry(upload, record, profile)
-        
-        elif data_type == 'psychological' and isinstance(extracted_data, list):
-            for record in extracted_data:
-                create_psychological_entry(upload, record, profile)
-        
-        elif data_type == 'physical' and isinstance(extracted_data, list):
-            for record in extracted_data:
-                create_physical_entry(upload, record, profile)
-        
-        # Update profile completion status
-        update_profile_completion(profile)
-        
-    except Exception as e:
-        upload.processing_notes += f" Data entry creation failed: {str(e)}"
-        upload.save()
-
-def create_academic_entry(upload: DataUpload, record: Dict[str, Any], profile: StudentDataProfile):
-    """Create academic data entry from extracted record"""
-    try:
-        entry = AcademicDataEntry.objects.create(
-            student=upload.student,
-            data_profile=profile,
-            academic_year=record.get('academic_year', upload.academic_year or profile.current_academic_year),
-            class_grade=record.get('class_grade', ''),
-            subject=record.get('subject', 'general'),
-            assessment_type=record.get('assessment_type', 'other'),
-            marks_obtained=record.get('marks_obtained', 0),
-            total_marks=record.get('total_marks', 100),
-            percentage=record.get('percentage'),
-            grade=record.get('grade', ''),
-            attendance_percentage=record.get('attendance'),
-            data_source='upload',
-            source_file=upload
-        )
-        
-        # Add to academic years if not present
-        if entry.academic_year:
-            profile.add_academic_year(entry.academic_year)
-        
-    except Exception as e:
-        # Create validation issue
-        DataValidationIssue.objects.create(
-            student=upload.student,
-            issue_type='format_error',
-            severity='medium',
-            status='open',
-            data_category='academic',
-            field_name='academic_entry',
-            description=f"Failed to create academic entry from upload: {str(e)}",
-        )
-
-def create_psychological_entry(upload: DataUpload, record: Dict[str, Any], profile: StudentDataProfile):
-    """Create psychological data entry from extracted record"""
-    try:
-        entry = PsychologicalDataEntry.objects.create(
-            student=upload.student,
-            data_profile=profile,
-            assessment_date=record.get('assessment_date', timezone.now().date()),
-            academic_year=record.get('academic_year', upload.academic_year or profile.current_academic_year),
-            assessment_category=record.get('assessment_category', 'other'),
-            assessment_name=record.get('assessment_name', 'Uploaded Assessment'),
-            custom_scores=record,
-            data_source='upload',
-            source_file=upload
-        )
-        
-        if entry.academic_year:
-            profile.add_academic_year(entry.academic_year)
-        
-    except Exception as e:
-        DataValidationIssue.objects.create(
-            student=upload.student,
-            issue_type='format_error',
-            severity='medium',
-            status='open',
-            data_category='psychological',
-            field_name='psychological_entry',
-            description=f"Failed to create psychological entry from upload: {str(e)}",
-        )
-
-def create_physical_entry(upload: DataUpload, record: Dict[str, Any], profile: StudentDataProfile):
-    """Create physical data entry from extracted record"""
-    try:
-        entry = PhysicalDataEntry.objects.create(
-            student=upload.student,
-            data_profile=profile,
-            measurement_date=record.get('measurement_date', timezone.now().date()),
-            academic_year=record.get('academic_year', upload.academic_year or profile.current_academic_year),
-            measurement_type=record.get('measurement_type', 'other'),
-            height_cm=record.get('height_cm'),
-            weight_kg=record.get('weight_kg'),
-            bmi=record.get('bmi'),
-            data_source='upload',
-            source_file=upload
-        )
-        
-        if entry.academic_year:
-            profile.add_academic_year(entry.academic_year)
-        
-    except Exception as e:
-        DataValidationIssue.objects.create(
-            student=upload.student,
-            issue_type='format_error',
-            severity='medium',
-            status='open',
-            data_category='physical',
-            field_name='physical_entry',
-            description=f"Failed to create physical entry from upload: {str(e)}",
-        )
-
-def update_profile_completion(profile: StudentDataProfile):
-    """Update profile data completion status"""
-    profile.academic_data_complete = AcademicDataEntry.objects.filter(student=profile.student).exists()
-    profile.psychological_data_complete = PsychologicalDataEntry.objects.filter(student=profile.student).exists()
-    profile.physical_data_complete = PhysicalDataEntry.objects.filter(student=profile.student).exists()
-    profile.save()
+def find_duplicate_upload(student: User, content_hash: str, academic_year: str) -> DataUpload:
+    """Find a successfully processed upload of the same file for this student"""
+    return DataUpload.objects.filter(
+        student=student,
+        content_hash=content_hash,
+        academic_year=academic_year,
+        processing_status='completed',
+        duplicate_of__isnull=True
+    ).order_by('-processed_at').first()
+
+def link_duplicate_upload(previous: DataUpload, filename: str, upload_type: str, description: str) -> DataUpload:
+    """Record a re-upload that shares the stored file and extraction of an earlier upload"""
+    return DataUpload.objects.create(
+        student=previous.student,
+        file=previous.file.name,
+        original_filename=filename,
+        file_size=previous.file_size,
+        file_type=previous.file_type,
+        content_hash=previous.content_hash,
+        duplicate_of=previous,
+        upload_type=upload_type,
+        academic_year=previous.academic_year,
+        description=description,
+        processing_status='completed',
+        processing_notes=f"Duplicate of upload #{previous.id}; previous extraction reused",
+        extracted_data=previous.extracted_data,
+        validation_errors=previous.validation_errors,
+        ocr_text=previous.ocr_text,
+        ai_extracted_fields=previous.ai_extracted_fields,
+        confidence_score=previous.confidence_score,
+        processed_at=timezone.now()
+    )
 
 def get_next_steps(profile: StudentDataProfile, completion_percentage: float) -> List[Dict[str, Any]]:
     """Get next steps based on current progress"""
@@ -520,6 +411,19 @@ def handle_validation_action(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
+@login_required
+def get_upload_processing_status(request, upload_id):
+    """API endpoint to poll the processing progress of an upload"""
+    upload = get_object_or_404(
+        DataUpload.objects.only(
+            'id', 'processing_status', 'processing_stage', 'processing_progress',
+            'processing_notes', 'validation_errors', 'processed_at'
+        ),
+        id=upload_id,
+        student=request.user
+    )
+    return JsonResponse({'success': True, **get_upload_status(upload)})
+
 @login_required
 def get_completion_status(request):
     """API endpoint to get current completion status"""
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class WorkflowSystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workflow_system'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .scheduler import start_scheduler_on_startup
+
+        start_scheduler_on_startup()
@@ -0,0 +1,131 @@
+"""
+Condition evaluation shared by workflow triggers and conditional steps
+Conditions are {field, operator, value} dicts; fields use dot notation into the context.
+compile_conditions turns a condition list into one predicate closure with the
+paths split and expected values converted up front, for repeated evaluation.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+
+def get_nested_value(data: Dict[str, Any], path: str) -> Any:
+    """Get nested value using dot notation"""
+    try:
+        value = data
+        for key in path.split('.'):
+            if isinstance(value, dict):
+                value = value.get(key)
+            else:
+                value = getattr(value, key, None)
+            if value is None:
+                break
+        return value
+    except (AttributeError, KeyError, TypeError):
+        return None
+
+
+def evaluate_condition(field_value: Any, operator: str, expected_value: Any) -> bool:
+    """Evaluate a single condition"""
+    if operator == 'equals':
+        return field_value == expected_value
+    elif operator == 'not_equals':
+        return field_value != expected_value
+    elif operator == 'greater_than':
+        try:
+            return float(field_value) > float(expected_value)
+        except (ValueError, TypeError):
+            return False
+    elif operator == 'less_than':
+        try:
+            return float(field_value) < float(expected_value)
+        except (ValueError, TypeError):
+            return False
+    elif operator == 'contains':
+        return str(expected_value).lower() in str(field_value).lower()
+
+    return False
+
+
+def evaluate_conditions(conditions: List[Dict[str, Any]], context: Dict[str, Any]) -> bool:
+    """Evaluate a list of conditions; all must hold, incomplete conditions are ignored"""
+    for condition in conditions or []:
+        field = condition.get('field')
+        operator = condition.get('operator')
+
+        if not all([field, operator]):
+            continue
+
+        if not evaluate_condition(get_nested_value(context, field), operator, condition.get('value')):
+            return False
+
+    return True
+
+
+def _never(context: Dict[str, Any]) -> bool:
+    return False
+
+
+def _always(context: Dict[str, Any]) -> bool:
+    return True
+
+
+def compile_getter(path: str) -> Callable[[Any], Any]:
+    """get_nested_value with the path split once"""
+    keys = tuple(path.split('.'))
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda data: data.get(key) if isinstance(data, dict) else getattr(data, key, None)
+
+    def get(data):
+        value = data
+        for key in keys:
+            value = value.get(key) if isinstance(value, dict) else getattr(value, key, None)
+            if value is None:
+                break
+        return value
+    return get
+
+
+def compile_condition(condition: Dict[str, Any]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Predicate equivalent to evaluate_condition on this condition; None for incomplete conditions"""
+    field = condition.get('field')
+    operator = condition.get('operator')
+    if not all([field, operator]):
+        return None
+
+    get = compile_getter(field)
+    expected_value = condition.get('value')
+
+    if operator == 'equals':
+        return lambda context: get(context) == expected_value
+    elif operator == 'not_equals':
+        return lambda context: get(context) != expected_value
+    elif operator in ('greater_than', 'less_than'):
+        try:
+            bound = float(expected_value)
+        except (ValueError, TypeError):
+            return _never
+        greater = operator == 'greater_than'
+
+        def compare(context):
+            try:
+                value = float(get(context))
+            except (ValueError, TypeError):
+                return False
+            return value > bound if greater else value < bound
+        return compare
+    elif operator == 'contains':
+        needle = str(expected_value).lower()
+        return lambda context: needle in str(get(context)).lower()
+
+    return _never
+
+
+def compile_conditions(conditions: List[Dict[str, Any]]) -> Callable[[Dict[str, Any]], bool]:
+    """Predicate equivalent to evaluate_conditions on these conditions"""
+    predicates = [predicate for predicate in map(compile_condition, conditions or []) if predicate]
+    if not predicates:
+        return _always
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda context: all(predicate(context) for predicate in predicates)
@@ -4,25 +4,36 @@ Handles workflow execution, step processing, and trigger evaluation
 """
 
 import json
-import time
 import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from django.utils import timezone
 from django.conf import settings
 from django.core.mail import send_mail
-from django.db import transaction
+from django.db import close_old_connections, transaction
 from django.contrib.auth import get_user_model
 from django.apps import apps
 
+from .execution_log import CURSOR_FIELDS, ExecutionLog
+from .plans import PlanCache, PlanStep
 from .models import (
     WorkflowTemplate, WorkflowExecution, WorkflowStepExecution, 
     WorkflowVariable, WorkflowTrigger, WorkflowAuditLog
 )
+from .scheduler import notify_scheduler
+from .trigger_index import get_trigger_index
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Steps whose effects outside the execution must not run twice after a crash, so each one's record
+# is written as soon as it completes (ExecutionLog.mark_done) rather than at the next checkpoint
+SIDE_EFFECT_ACTIONS = frozenset({'send_email', 'send_sms', 'update_record', 'http_request', 'custom_function'})
+
+APPROVAL_TIMED_OUT = 'Approval timed out'
+
 class WorkflowEngine:
     """Main workflow execution engine"""
     
@@ -42,172 +53,491 @@ class WorkflowEngine:
             'http_request': self._process_http_request,
             'custom_function': self._process_custom_function,
         }
+        self.plans = PlanCache(self.step_processors)
+        self._pool = None
+        self._pool_lock = threading.Lock()
     
     def execute_workflow(self, workflow_template: WorkflowTemplate, 
                         context: Dict[str, Any] = None, 
                         trigger: WorkflowTrigger = None,
-                        started_by: User = None) -> WorkflowExecution:
-        """Execute a workflow template"""
+                        started_by: User = None,
+                        defer: bool = False) -> WorkflowExecution:
+        """Execute a workflow template until it finishes or parks; with defer it is only queued for the scheduler"""
         
         if context is None:
             context = {}
         
-        # Create execution record
+        # Create execution record; it is due immediately
         execution = WorkflowExecution.objects.create(
             workflow_template=workflow_template,
             trigger=trigger,
             started_by=started_by,
             input_context=context,
-            status='pending'
+            context=dict(context),
+            status='pending',
+            resume_at=timezone.now()
         )
         
         # Log execution start
-        WorkflowAuditLog.objects.create(
-            action_type='execution_started',
+        log = ExecutionLog(execution)
+        log.audit(
+            'execution_started',
+            f"Workflow execution started: {workflow_template.name}",
             user=started_by,
-            workflow_template=workflow_template,
-            workflow_execution=execution,
-            description=f"Workflow execution started: {workflow_template.name}",
             metadata={'trigger_id': str(trigger.id) if trigger else None}
         )
         
+        if defer:
+            log.flush()
+            notify_scheduler()
+        elif self._claim(execution):
+            self._run_execution(execution, log)
+        return execution
+    
+    def resume(self, execution: WorkflowExecution) -> bool:
+        """Claim a due execution and run it from its cursor; False when another worker claimed it first"""
+        if (execution.status == 'waiting' and execution.waiting_for == 'approval'
+                and not self.plans.get(execution.workflow_template).parallel):
+            # Only due once the approval timeout has passed; parallel workflows check their approvals when run
+            return self.decide_approval(execution, approved=False, comments=APPROVAL_TIMED_OUT, timed_out=True)
+        
+        recovering = execution.status == 'running'
+        if not self._claim(execution):
+            return False
+        log = ExecutionLog(execution)
+        if recovering:
+            # The crashed run may have completed steps with side effects past its last checkpoint
+            log.load_marked()
+        self._run_execution(execution, log)
+        return True
+    
+    def decide_approval(self, execution: WorkflowExecution, approved: bool,
+                        user: User = None, comments: str = '', step_index: Optional[int] = None,
+                        timed_out: bool = False) -> bool:
+        """Record the decision on a step waiting for approval (the earliest, unless step_index is given);
+        approval queues the rest of the workflow. False unless the execution is parked"""
+        if execution.status != 'waiting':
+            return False
+        waiting_steps = execution.step_executions.filter(status='waiting')
+        if step_index is not None:
+            waiting_steps = waiting_steps.filter(step_index=step_index)
+        step_execution = waiting_steps.order_by('step_index').first()
+        if step_execution is None or not self._claim(execution, status='waiting'):
+            return False
+        
+        now = timezone.now()
+        decision = {
+            'approval_granted': approved,
+            'approved_by': user.pk if user else None,
+            'approval_comments': comments,
+        }
+        step_execution.status = 'completed' if approved else 'failed'
+        step_execution.output_data.update(decision)
+        step_execution.error_message = '' if approved else comments or 'Approval rejected'
+        step_execution.completed_at = now
+        step_execution.save()
+        # Parallel workflows count an approval step as done only once it is approved
+        if approved and step_execution.step_index not in execution.completed_steps:
+            execution.completed_steps.append(step_execution.step_index)
+        
+        log = ExecutionLog(execution)
+        log.audit(
+            'approval_granted' if approved else 'approval_rejected',
+            f"Approval {'granted' if approved else 'rejected'}: {execution.workflow_template.name}",
+            user=user,
+            metadata={'comments': comments, 'step': step_execution.step_index}
+        )
+        
+        execution.context.update(decision)
+        execution.waiting_for = ''
+        if not approved:
+            error_message = comments or 'Approval rejected'
+            if timed_out:
+                # Worded like a timeout in the parallel runner
+                step = self.plans.get(execution.workflow_template).steps[step_execution.step_index]
+                error_message = self._step_failure_message(step, {'error_message': error_message})
+            self._finish(execution, {
+                'success': False,
+                'error_message': error_message,
+                'output_context': execution.context
+            }, log)
+            return True
+        
+        # The remaining steps run on the scheduler rather than in the approver's request
+        execution.status = 'pending'
+        execution.resume_at = now
+        log.checkpoint()
+        notify_scheduler()
+        return True
+    
+    def _claim(self, execution: WorkflowExecution, status: Optional[str] = None) -> bool:
+        """Atomically mark the execution running with a lease, so only one worker runs it"""
+        now = timezone.now()
+        lease = now + timedelta(seconds=execution.workflow_template.max_execution_time)
+        claim = {'status': 'running', 'resume_at': lease}
+        if execution.started_at is None:
+            claim['started_at'] = now
+        claimed = WorkflowExecution.objects.filter(
+            pk=execution.pk, status=status or execution.status, resume_at=execution.resume_at
+        ).update(**claim)
+        if not claimed:
+            return False
+        
+        for field, value in claim.items():
+            setattr(execution, field, value)
+        return True
+    
+    def _run_execution(self, execution: WorkflowExecution, log: ExecutionLog):
+        """Run steps from the cursor until the workflow finishes or parks"""
         try:
-            # Start execution
-            execution.status = 'running'
-            execution.started_at = timezone.now()
-            execution.save()
-            
-            # Process workflow steps
-            result = self._execute_workflow_steps(execution, context)
-            
-            # Update execution status
-            execution.status = 'completed' if result['success'] else 'failed'
-            execution.completed_at = timezone.now()
-            execution.output_context = result.get('output_context', {})
-            execution.error_message = result.get('error_message', '')
-            execution.save()
-            
-            # Log completion
-            WorkflowAuditLog.objects.create(
-                action_type='execution_completed' if result['success'] else 'execution_failed',
-                user=started_by,
-                workflow_template=workflow_template,
-                workflow_execution=execution,
-                description=f"Workflow execution {'completed' if result['success'] else 'failed'}: {workflow_template.name}",
-                metadata={'duration_seconds': execution.get_duration().total_seconds() if execution.get_duration() else 0}
-            )
-            
+            result = self._execute_workflow_steps(execution, log)
         except Exception as e:
             logger.error(f"Workflow execution failed: {str(e)}")
-            execution.status = 'failed'
-            execution.completed_at = timezone.now()
-            execution.error_message = str(e)
-            execution.save()
-            
-            # Log failure
-            WorkflowAuditLog.objects.create(
-                action_type='execution_failed',
-                user=started_by,
-                workflow_template=workflow_template,
-                workflow_execution=execution,
-                description=f"Workflow execution failed: {workflow_template.name}",
-                metadata={'error': str(e)}
-            )
+            result = {'success': False, 'error_message': str(e), 'output_context': execution.context}
         
-        return execution
+        if not result.get('parked'):
+            self._finish(execution, result, log)
+    
+    def _finish(self, execution: WorkflowExecution, result: Dict[str, Any], log: ExecutionLog):
+        """Update execution status, log its completion and flush the buffered records"""
+        execution.status = 'completed' if result['success'] else 'failed'
+        execution.completed_at = timezone.now()
+        execution.output_context = result.get('output_context', {})
+        execution.error_message = result.get('error_message', '')
+        execution.waiting_for = ''
+        execution.resume_at = None
+        
+        duration = execution.get_duration()
+        log.audit(
+            'execution_completed' if result['success'] else 'execution_failed',
+            f"Workflow execution {'completed' if result['success'] else 'failed'}: {execution.workflow_template.name}",
+            user=execution.started_by,
+            metadata={
+                'duration_seconds': duration.total_seconds() if duration else 0,
+                'error': result.get('error_message', '')
+            }
+        )
+        log.flush(CURSOR_FIELDS + ('completed_at', 'output_context', 'error_message'))
     
-    def _execute_workflow_steps(self, execution: WorkflowExecution, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute workflow steps sequentially"""
+    def _park(self, execution: WorkflowExecution, log: ExecutionLog, waiting_for: str, resume_at: Optional[datetime]):
+        """Persist the cursor and release the worker; the scheduler resumes the execution at resume_at"""
+        execution.status = 'waiting'
+        execution.waiting_for = waiting_for
+        execution.resume_at = resume_at
         
-        steps = execution.workflow_template.workflow_config.get('steps', [])
-        if not steps:
+        log.audit(
+            'execution_waiting',
+            f"Workflow execution waiting for {waiting_for}: {execution.workflow_template.name}",
+            user=execution.started_by,
+            metadata={
+                'step': execution.current_step,
+                'resume_at': resume_at.isoformat() if resume_at else None
+            }
+        )
+        log.checkpoint()
+        if resume_at is not None:
+            notify_scheduler()
+    
+    def _execute_workflow_steps(self, execution: WorkflowExecution, log: ExecutionLog) -> Dict[str, Any]:
+        """Execute workflow steps sequentially from the execution's cursor, buffering their records"""
+        
+        plan = self.plans.get(execution.workflow_template)
+        if not plan.steps:
             return {'success': False, 'error_message': 'No steps defined in workflow'}
+        if plan.parallel:
+            return self._execute_parallel_steps(execution, log, plan.steps)
         
-        current_context = context.copy()
+        steps = plan.steps
+        current_context = execution.context
         
-        for i, step_config in enumerate(steps):
+        while execution.current_step < len(steps):
+            i = execution.current_step
+            step = steps[i]
+            
+            if i in log.marked:
+                # Completed before a crash; its side effects must not repeat
+                current_context.update(log.marked[i])
+                execution.completed_steps.append(i)
+                execution.current_step = i + 1
+                continue
+            
+            # A delayed step parks the execution instead of holding the worker
+            if step.delay_seconds > 0 and execution.waiting_for != 'delay':
+                self._park(execution, log, 'delay', timezone.now() + timedelta(seconds=step.delay_seconds))
+                return {'success': True, 'parked': True}
+            
+            # Step record; the context is copied since later steps update it in place
+            step_execution = log.step(
+                step_index=i,
+                step_name=step.name,
+                status='running',
+                input_data=dict(current_context),
+                started_at=timezone.now()
+            )
+            
             try:
-                # Create step execution record
-                step_execution = WorkflowStepExecution.objects.create(
-                    workflow_execution=execution,
-                    workflow_step=None,  # We're using config-based steps
-                    status='running',
-                    input_data=current_context,
-                    started_at=timezone.now()
-                )
-                
                 # Process step
-                step_result = self._process_step(step_config, current_context, execution)
-                
-                # Update step execution
-                step_execution.status = 'completed' if step_result['success'] else 'failed'
-                step_execution.output_data = step_result.get('output_data', {})
-                step_execution.error_message = step_result.get('error_message', '')
-                step_execution.completed_at = timezone.now()
-                step_execution.save()
-                
-                if not step_result['success']:
-                    return {
-                        'success': False,
-                        'error_message': f"Step {i+1} failed: {step_result.get('error_message', 'Unknown error')}",
-                        'output_context': current_context
-                    }
-                
-                # Update context with step output
-                if 'output_data' in step_result:
-                    current_context.update(step_result['output_data'])
-                
-                # Update execution progress
-                execution.completed_steps.append(i)
-                execution.save()
-                
-                # Check for conditional branching or early termination
-                if step_result.get('terminate_workflow'):
-                    break
-                
+                step_result = self._process_step(step, current_context, execution)
             except Exception as e:
-                logger.error(f"Step {i+1} execution failed: {str(e)}")
+                step_result = self._raised_step_result(step, e)
+                step_execution.status = 'failed'
+                step_execution.error_message = step_result['error_message']
+                step_execution.completed_at = timezone.now()
                 return {
                     'success': False,
-                    'error_message': f"Step {i+1} execution failed: {str(e)}",
+                    'error_message': self._step_failure_message(step, step_result),
                     'output_context': current_context
                 }
+            
+            park = step_result.get('park') if step_result['success'] else None
+            
+            # Update step execution
+            step_execution.status = 'waiting' if park else 'completed' if step_result['success'] else 'failed'
+            step_execution.output_data = step_result.get('output_data', {})
+            step_execution.error_message = step_result.get('error_message', '')
+            if not park:
+                step_execution.completed_at = timezone.now()
+            
+            if not step_result['success']:
+                return {
+                    'success': False,
+                    'error_message': self._step_failure_message(step, step_result),
+                    'output_context': current_context
+                }
+            
+            # Update context with step output
+            if 'output_data' in step_result:
+                current_context.update(step_result['output_data'])
+            
+            # Advance the cursor
+            execution.completed_steps.append(i)
+            execution.current_step = i + 1
+            execution.waiting_for = ''
+            
+            if park:
+                self._park(execution, log, park, step_result.get('resume_at'))
+                return {'success': True, 'parked': True}
+            
+            if step.action_type in SIDE_EFFECT_ACTIONS:
+                log.mark_done(step_execution)
+            
+            # Periodic checkpoint, renewing the lease as the persisted cursor moves
+            if log.step_finished():
+                execution.resume_at = timezone.now() + timedelta(seconds=execution.workflow_template.max_execution_time)
+                log.checkpoint()
+            
+            # Check for conditional branching or early termination
+            if step_result.get('terminate_workflow'):
+                break
         
         return {
             'success': True,
             'output_context': current_context
         }
     
-    def _process_step(self, step_config: Dict[str, Any], context: Dict[str, Any], 
-                     execution: WorkflowExecution) -> Dict[str, Any]:
-        """Process an individual workflow step"""
+    def _execute_parallel_steps(self, execution: WorkflowExecution, log: ExecutionLog,
+                                steps: Tuple[PlanStep, ...]) -> Dict[str, Any]:
+        """Run a plan with declared dependencies: each step starts on the step pool as soon as its
+        dependencies complete, so independent branches overlap
         
-        action_type = step_config.get('action_type')
-        if action_type not in self.step_processors:
-            return {
-                'success': False,
-                'error_message': f"Unknown action type: {action_type}"
-            }
+        Contexts never depend on which concurrent step finished first: a step's input is the
+        execution input plus its ancestors' outputs, and the execution context is the input plus
+        every completed step's output, both merged in step order. Delays count from when a step
+        becomes ready; approvals only hold back their own dependents.
+        """
+        completed = set(execution.completed_steps)
+        outputs, waiting = self._recorded_step_state(execution)
+        for index, output_data in log.marked.items():
+            # Completed before a crash; their side effects must not repeat
+            completed.add(index)
+            outputs[index] = output_data
+            execution.completed_steps.append(index)
+        execution.waiting_for = ''
+        pool = self._step_pool()
+        running = {}
+        failure = None
+        terminated = False
         
-        # Add delay if specified
-        delay = step_config.get('delay_seconds', 0)
-        if delay > 0:
-            time.sleep(delay)
+        def merged(indices):
+            context = dict(execution.input_context)
+            for index in sorted(indices):
+                context.update(outputs[index])
+            return context
         
-        # Execute step processor
-        processor = self.step_processors[action_type]
-        return processor(step_config, context, execution)
+        while True:
+            now = timezone.now()
+            timed_out = [index for index, deadline in self._approval_deadlines(steps, waiting).items() if now >= deadline]
+            if timed_out:
+                self._time_out_approvals(execution, log, timed_out, now)
+                for index in timed_out:
+                    del waiting[index]
+                failure = failure or self._step_failure_message(steps[min(timed_out)], {'error_message': APPROVAL_TIMED_OUT})
+            
+            # Start every ready step
+            running_steps = {step.index for step, _ in running.values()}
+            next_due = None
+            for step in steps if failure is None and not terminated else ():
+                i = step.index
+                if i in completed or i in waiting or i in running_steps:
+                    continue
+                if not all(dependency in completed for dependency in step.dependencies):
+                    continue
+                if step.delay_seconds > 0:
+                    due = datetime.fromisoformat(execution.delayed_steps.setdefault(
+                        str(i), (now + timedelta(seconds=step.delay_seconds)).isoformat()
+                    ))
+                    if due > now:
+                        next_due = min(next_due or due, due)
+                        continue
+                
+                context = merged(step.ancestors)
+                step_execution = log.step(
+                    step_index=i,
+                    step_name=step.name,
+                    status='running',
+                    input_data=context,
+                    started_at=now
+                )
+                running[pool.submit(self._run_pooled_step, step, context, execution)] = (step, step_execution)
+            
+            if not running:
+                break
+            
+            done, _ = wait(
+                running,
+                timeout=max(0.0, (next_due - now).total_seconds()) if next_due else None,
+                return_when=FIRST_COMPLETED
+            )
+            for future in sorted(done, key=lambda future: running[future][0].index):
+                step, step_execution = running.pop(future)
+                step_result = future.result()
+                park = step_result.get('park') if step_result['success'] else None
+                
+                step_execution.status = 'waiting' if park else 'completed' if step_result['success'] else 'failed'
+                step_execution.output_data = step_result.get('output_data', {})
+                step_execution.error_message = step_result.get('error_message', '')
+                if not park:
+                    step_execution.completed_at = timezone.now()
+                
+                if not step_result['success']:
+                    # Steps already running finish; nothing new starts
+                    failure = failure or self._step_failure_message(step, step_result)
+                elif park:
+                    waiting[step.index] = step_execution.started_at
+                else:
+                    if step.action_type in SIDE_EFFECT_ACTIONS:
+                        log.mark_done(step_execution)
+                    outputs[step.index] = step_execution.output_data
+                    completed.add(step.index)
+                    execution.completed_steps.append(step.index)
+                    execution.delayed_steps.pop(str(step.index), None)
+                    terminated = terminated or bool(step_result.get('terminate_workflow'))
+            
+            execution.context = merged(completed)
+            execution.current_step = len(completed)
+            
+            # Periodic checkpoint, renewing the lease
+            if done and log.step_finished():
+                execution.resume_at = timezone.now() + timedelta(seconds=execution.workflow_template.max_execution_time)
+                log.checkpoint()
+        
+        if failure:
+            return {'success': False, 'error_message': failure, 'output_context': execution.context}
+        if terminated or len(completed) == len(steps):
+            return {'success': True, 'output_context': execution.context}
+        
+        # Every remaining step waits on a delay or an approval
+        delays = [
+            datetime.fromisoformat(due) for index, due in execution.delayed_steps.items() if int(index) not in completed
+        ]
+        deadlines = list(self._approval_deadlines(steps, waiting).values())
+        self._park(execution, log, 'delay' if delays else 'approval', min(delays + deadlines, default=None))
+        return {'success': True, 'parked': True}
+    
+    def _recorded_step_state(self, execution: WorkflowExecution):
+        """Outputs of completed steps and start times of steps waiting for approval, from earlier runs"""
+        outputs, waiting = {}, {}
+        if not execution.completed_steps and not execution.waiting_for:
+            return outputs, waiting
+        
+        completed = set(execution.completed_steps)
+        records = execution.step_executions.filter(status__in=['completed', 'waiting']).order_by('started_at')
+        for index, status, output_data, started_at in records.values_list('step_index', 'status', 'output_data', 'started_at'):
+            if status == 'waiting':
+                waiting[index] = started_at
+            elif index in completed:
+                outputs[index] = output_data
+        return outputs, waiting
+    
+    @staticmethod
+    def _approval_deadlines(steps: Tuple[PlanStep, ...], waiting: Dict[int, datetime]) -> Dict[int, datetime]:
+        deadlines = {}
+        for index, started_at in waiting.items():
+            timeout = steps[index].configuration.get('timeout_seconds')
+            if timeout:
+                deadlines[index] = started_at + timedelta(seconds=timeout)
+        return deadlines
+    
+    @staticmethod
+    def _time_out_approvals(execution: WorkflowExecution, log: ExecutionLog, indices: List[int], now: datetime):
+        """Fail the waiting records of these approval steps, flushed or still buffered"""
+        execution.step_executions.filter(status='waiting', step_index__in=indices).update(
+            status='failed', error_message=APPROVAL_TIMED_OUT, completed_at=now
+        )
+        for step_execution in log.steps:
+            if step_execution.status == 'waiting' and step_execution.step_index in indices:
+                step_execution.status = 'failed'
+                step_execution.error_message = APPROVAL_TIMED_OUT
+                step_execution.completed_at = now
+    
+    def _step_pool(self) -> ThreadPoolExecutor:
+        """Bounded pool shared by the parallel steps of every execution this engine runs"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=settings.WORKFLOW_STEP_WORKERS, thread_name_prefix='workflow-step'
+                    )
+        return self._pool
+    
+    def _run_pooled_step(self, step: PlanStep, context: Dict[str, Any],
+                         execution: WorkflowExecution) -> Dict[str, Any]:
+        try:
+            return self._process_step(step, context, execution)
+        except Exception as e:
+            return self._raised_step_result(step, e)
+        finally:
+            # Pool threads outlive requests, so drop connections past their lifetime
+            close_old_connections()
+    
+    @staticmethod
+    def _raised_step_result(step: PlanStep, error: Exception) -> Dict[str, Any]:
+        """Result of a step whose handler raised instead of reporting a failure"""
+        logger.error(f"Step {step.index+1} execution failed: {str(error)}")
+        return {'success': False, 'error_message': str(error), 'raised': True}
+    
+    @staticmethod
+    def _step_failure_message(step: PlanStep, step_result: Dict[str, Any]) -> str:
+        """Execution error for a failed step, worded the same by the sequential and parallel runners"""
+        if step_result.get('raised'):
+            return f"Step {step.index+1} execution failed: {step_result['error_message']}"
+        return f"Step {step.index+1} failed: {step_result.get('error_message', 'Unknown error')}"
     
-    def _process_send_email(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_step(self, step: PlanStep, context: Dict[str, Any], 
+                     execution: WorkflowExecution) -> Dict[str, Any]:
+        """Process an individual workflow step through its pre-bound handler"""
+        return step.handler(step, context, execution)
+    
+    def _process_send_email(self, step_config: PlanStep, context: Dict[str, Any], 
                            execution: WorkflowExecution) -> Dict[str, Any]:
         """Process send email step"""
         try:
-            config = step_config.get('configuration', {})
+            config = step_config.configuration
             
             # Extract email parameters
-            to_email = self._resolve_value(config.get('to_email', ''), context)
-            subject = self._resolve_value(config.get('subject', ''), context)
-            message = self._resolve_value(config.get('message', ''), context)
+            to_email = step_config.resolve('to_email', context)
+            subject = step_config.resolve('subject', context)
+            message = step_config.resolve('message', context)
             from_email = config.get('from_email', settings.DEFAULT_FROM_EMAIL)
             
             if not all([to_email, subject, message]):
@@ -240,7 +570,7 @@ class WorkflowEngine:
                 'error_message': f"Email sending failed: {str(e)}"
             }
     
-    def _process_send_sms(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_send_sms(self, step_config: PlanStep, context: Dict[str, Any], 
                          execution: WorkflowExecution) -> Dict[str, Any]:
         """Process send SMS step"""
         # Placeholder for SMS integration
@@ -249,16 +579,16 @@ class WorkflowEngine:
             'output_data': {'sms_sent': True, 'message': 'SMS functionality not implemented yet'}
         }
     
-    def _process_create_notification(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_create_notification(self, step_config: PlanStep, context: Dict[str, Any], 
                                    execution: WorkflowExecution) -> Dict[str, Any]:
         """Process create notification step"""
         try:
-            config = step_config.get('configuration', {})
+            config = step_config.configuration
             
             # Get notification parameters
-            user_id = self._resolve_value(config.get('user_id', ''), context)
-            title = self._resolve_value(config.get('title', ''), context)
-            message = self._resolve_value(config.get('message', ''), context)
+            user_id = step_config.resolve('user_id', context)
+            title = step_config.resolve('title', context)
+            message = step_config.resolve('message', context)
             notification_type = config.get('type', 'info')
             
             # Create notification (assuming you have a notification system)
@@ -279,15 +609,15 @@ class WorkflowEngine:
                 'error_message': f"Notification creation failed: {str(e)}"
             }
     
-    def _process_update_record(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_update_record(self, step_config: PlanStep, context: Dict[str, Any], 
                               execution: WorkflowExecution) -> Dict[str, Any]:
         """Process update record step"""
         try:
-            config = step_config.get('configuration', {})
+            config = step_config.configuration
             
             model_name = config.get('model_name')
-            record_id = self._resolve_value(config.get('record_id', ''), context)
-            update_fields = config.get('update_fields', {})
+            record_id = step_config.resolve('record_id', context)
+            update_fields = step_config.resolve('update_fields', context, {})
             
             if not all([model_name, record_id, update_fields]):
                 return {
@@ -307,8 +637,7 @@ class WorkflowEngine:
             # Update record
             record = model_class.objects.get(pk=record_id)
             for field, value in update_fields.items():
-                resolved_value = self._resolve_value(value, context)
-                setattr(record, field, resolved_value)
+                setattr(record, field, value)
             record.save()
             
             return {
@@ -327,7 +656,7 @@ class WorkflowEngine:
                 'error_message': f"Record update failed: {str(e)}"
             }
     
-    def _process_create_assessment(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_create_assessment(self, step_config: PlanStep, context: Dict[str, Any], 
                                   execution: WorkflowExecution) -> Dict[str, Any]:
         """Process create assessment step"""
         # Placeholder for assessment creation
@@ -336,12 +665,11 @@ class WorkflowEngine:
             'output_data': {'assessment_created': True}
         }
     
-    def _process_run_epr_calculation(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_run_epr_calculation(self, step_config: PlanStep, context: Dict[str, Any], 
                                     execution: WorkflowExecution) -> Dict[str, Any]:
         """Process EPR calculation step"""
         try:
-            config = step_config.get('configuration', {})
-            student_id = self._resolve_value(config.get('student_id', ''), context)
+            student_id = step_config.resolve('student_id', context)
             
             if not student_id:
                 return {
@@ -371,7 +699,7 @@ class WorkflowEngine:
                 'error_message': f"EPR calculation failed: {str(e)}"
             }
     
-    def _process_create_alert(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_create_alert(self, step_config: PlanStep, context: Dict[str, Any], 
                              execution: WorkflowExecution) -> Dict[str, Any]:
         """Process create alert step"""
         # Placeholder for alert creation
@@ -380,7 +708,7 @@ class WorkflowEngine:
             'output_data': {'alert_created': True}
         }
     
-    def _process_assign_task(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_assign_task(self, step_config: PlanStep, context: Dict[str, Any], 
                             execution: WorkflowExecution) -> Dict[str, Any]:
         """Process assign task step"""
         # Placeholder for task assignment
@@ -389,24 +717,23 @@ class WorkflowEngine:
             'output_data': {'task_assigned': True}
         }
     
-    def _process_wait_for_approval(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_wait_for_approval(self, step_config: PlanStep, context: Dict[str, Any], 
                                   execution: WorkflowExecution) -> Dict[str, Any]:
-        """Process wait for approval step"""
-        # This would typically pause the workflow and wait for manual approval
+        """Process wait for approval step: parks the execution until decide_approval or the timeout"""
+        timeout = step_config.configuration.get('timeout_seconds')
         return {
             'success': True,
+            'park': 'approval',
+            'resume_at': timezone.now() + timedelta(seconds=timeout) if timeout else None,
             'output_data': {'approval_required': True, 'workflow_paused': True}
         }
     
-    def _process_conditional_branch(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_conditional_branch(self, step_config: PlanStep, context: Dict[str, Any], 
                                    execution: WorkflowExecution) -> Dict[str, Any]:
         """Process conditional branch step"""
         try:
-            config = step_config.get('configuration', {})
-            conditions = config.get('conditions', [])
-            
-            # Evaluate conditions
-            condition_met = self._evaluate_conditions(conditions, context)
+            # Evaluate the compiled conditions
+            condition_met = step_config.condition(context)
             
             return {
                 'success': True,
@@ -422,7 +749,7 @@ class WorkflowEngine:
                 'error_message': f"Conditional branch evaluation failed: {str(e)}"
             }
     
-    def _process_loop(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_loop(self, step_config: PlanStep, context: Dict[str, Any], 
                      execution: WorkflowExecution) -> Dict[str, Any]:
         """Process loop step"""
         # Placeholder for loop processing
@@ -431,21 +758,19 @@ class WorkflowEngine:
             'output_data': {'loop_executed': True}
         }
     
-    def _process_http_request(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_http_request(self, step_config: PlanStep, context: Dict[str, Any], 
                              execution: WorkflowExecution) -> Dict[str, Any]:
         """Process HTTP request step"""
         try:
             import requests
             
-            config = step_config.get('configuration', {})
-            url = self._resolve_value(config.get('url', ''), context)
+            config = step_config.configuration
+            url = step_config.resolve('url', context)
             method = config.get('method', 'GET').upper()
-            headers = config.get('headers', {})
-            data = config.get('data', {})
             
             # Resolve dynamic values in headers and data
-            resolved_headers = {k: self._resolve_value(v, context) for k, v in headers.items()}
-            resolved_data = {k: self._resolve_value(v, context) for k, v in data.items()}
+            resolved_headers = step_config.resolve('headers', context, {})
+            resolved_data = step_config.resolve('data', context, {})
             
             # Make HTTP request
             response = requests.request(
@@ -471,11 +796,11 @@ class WorkflowEngine:
                 'error_message': f"HTTP request failed: {str(e)}"
             }
     
-    def _process_custom_function(self, step_config: Dict[str, Any], context: Dict[str, Any], 
+    def _process_custom_function(self, step_config: PlanStep, context: Dict[str, Any], 
                                 execution: WorkflowExecution) -> Dict[str, Any]:
         """Process custom function step"""
         try:
-            config = step_config.get('configuration', {})
+            config = step_config.configuration
             function_name = config.get('function_name')
             
             if not function_name:
@@ -497,98 +822,43 @@ class WorkflowEngine:
                 'success': False,
                 'error_message': f"Custom function execution failed: {str(e)}"
             }
-    
-    def _resolve_value(self, value: Any, context: Dict[str, Any]) -> Any:
-        """Resolve dynamic values using context variables"""
-        if isinstance(value, str) and value.startswith('{{') and value.endswith('}}'):
-            # Extract variable name
-            var_name = value[2:-2].strip()
-            return self._get_nested_value(context, var_name)
-        return value
-    
-    def _get_nested_value(self, data: Dict[str, Any], path: str) -> Any:
-        """Get nested value using dot notation"""
-        try:
-            keys = path.split('.')
-            value = data
-            for key in keys:
-                if isinstance(value, dict):
-                    value = value.get(key)
-                else:
-                    value = getattr(value, key, None)
-                if value is None:
-                    break
-            return value
-        except (AttributeError, KeyError, TypeError):
-            return None
-    
-    def _evaluate_conditions(self, conditions: List[Dict[str, Any]], context: Dict[str, Any]) -> bool:
-        """Evaluate a list of conditions"""
-        if not conditions:
-            return True
-        
-        for condition in conditions:
-            field = condition.get('field')
-            operator = condition.get('operator')
-            expected_value = condition.get('value')
-            
-            if not all([field, operator]):
-                continue
-            
-            field_value = self._get_nested_value(context, field)
-            
-            if not self._evaluate_single_condition(field_value, operator, expected_value):
-                return False
-        
-        return True
-    
-    def _evaluate_single_condition(self, field_value: Any, operator: str, expected_value: Any) -> bool:
-        """Evaluate a single condition"""
-        if operator == 'equals':
-            return field_value == expected_value
-        elif operator == 'not_equals':
-            return field_value != expected_value
-        elif operator == 'greater_than':
-            try:
-                return float(field_value) > float(expected_value)
-            except (ValueError, TypeError):
-                return False
-        elif operator == 'less_than':
-            try:
-                return float(field_value) < float(expected_value)
-            except (ValueError, TypeError):
-                return False
-        elif operator == 'contains':
-            return str(expected_value).lower() in str(field_value).lower()
-        
-        return False
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_workflow_engine() -> WorkflowEngine:
+    """Process-wide workflow engine, whose compiled plans are shared by its callers"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = WorkflowEngine()
+    return _engine
 
 
 class TriggerManager:
     """Manages workflow triggers and their evaluation"""
     
     def __init__(self):
-        self.engine = WorkflowEngine()
+        self.engine = get_workflow_engine()
     
     def evaluate_triggers(self, event_type: str, context_data: Dict[str, Any]) -> List[WorkflowExecution]:
         """Evaluate all active triggers for a given event type"""
         
-        active_triggers = WorkflowTrigger.objects.filter(
-            is_active=True,
-            event_type=event_type
-        )
-        
         executions = []
         
-        for trigger in active_triggers:
-            if trigger.evaluate_conditions(context_data):
-                # Execute workflow
-                execution = self.engine.execute_workflow(
-                    workflow_template=trigger.workflow_template,
-                    context=context_data,
-                    trigger=trigger
-                )
-                executions.append(execution)
+        # Matched from the in-memory index, without a query per event
+        for trigger in get_trigger_index().triggers_for(event_type, context_data):
+            # Queue the workflow; the scheduler runs it off the caller's thread
+            execution = self.engine.execute_workflow(
+                workflow_template=trigger.workflow_template,
+                context=context_data,
+                trigger=trigger,
+                defer=True
+            )
+            executions.append(execution)
         
         return executions
     
@@ -0,0 +1,30 @@
+"""
+Resume parked and queued workflow executions as they fall due
+"""
+
+from django.core.management.base import BaseCommand
+
+from workflow_system.scheduler import get_workflow_scheduler
+
+
+class Command(BaseCommand):
+    help = ('Run the workflow scheduler: resumes executions whose delay, approval timeout or lease has passed, '
+            'and runs executions queued by triggers')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Resume one batch of due executions and exit')
+
+    def handle(self, *args, **options):
+        scheduler = get_workflow_scheduler()
+        if options['once']:
+            resumed = scheduler.run_due()
+            self.stdout.write(self.style.SUCCESS(f"Resumed {resumed} workflow executions"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Workflow scheduler running (poll every {scheduler.poll_interval}s); Ctrl+C to stop"
+        ))
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Workflow scheduler stopped')
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_system', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowExecution',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('waiting', 'Waiting'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=10)),
+                ('input_context', models.JSONField(blank=True, default=dict)),
+                ('output_context', models.JSONField(blank=True, default=dict)),
+                ('error_message', models.TextField(blank=True)),
+                ('current_step', models.IntegerField(default=0)),
+                ('context', models.JSONField(blank=True, default=dict)),
+                ('completed_steps', models.JSONField(blank=True, default=list)),
+                ('waiting_for', models.CharField(blank=True, choices=[('', 'Not Waiting'), ('delay', 'Step Delay'), ('approval', 'Approval')], default='', max_length=10)),
+                ('resume_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='started_workflow_executions', to=settings.AUTH_USER_MODEL)),
+                ('workflow_template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='executions', to='workflow_system.workflowtemplate')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkflowAuditLog',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('action_type', models.CharField(choices=[('workflow_created', 'Workflow Created'), ('workflow_updated', 'Workflow Updated'), ('workflow_deleted', 'Workflow Deleted'), ('trigger_created', 'Trigger Created'), ('trigger_updated', 'Trigger Updated'), ('execution_started', 'Execution Started'), ('execution_waiting', 'Execution Waiting'), ('execution_resumed', 'Execution Resumed'), ('execution_completed', 'Execution Completed'), ('execution_failed', 'Execution Failed'), ('execution_cancelled', 'Execution Cancelled'), ('approval_granted', 'Approval Granted'), ('approval_rejected', 'Approval Rejected')], max_length=30)),
+                ('description', models.TextField(blank=True)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='workflow_audit_logs', to=settings.AUTH_USER_MODEL)),
+                ('workflow_template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_logs', to='workflow_system.workflowtemplate')),
+                ('workflow_execution', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_logs', to='workflow_system.workflowexecution')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkflowStepExecution',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('step_index', models.IntegerField(default=0)),
+                ('step_name', models.CharField(blank=True, max_length=200)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('waiting', 'Waiting'), ('completed', 'Completed'), ('failed', 'Failed'), ('skipped', 'Skipped')], default='pending', max_length=10)),
+                ('input_data', models.JSONField(blank=True, default=dict)),
+                ('output_data', models.JSONField(blank=True, default=dict)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('workflow_execution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='step_executions', to='workflow_system.workflowexecution')),
+            ],
+            options={
+                'ordering': ['workflow_execution', 'step_index', 'started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkflowTrigger',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('event_type', models.CharField(choices=[('assessment_completed', 'Assessment Completed'), ('assessment_scheduled', 'Assessment Scheduled'), ('student_registered', 'Student Registered'), ('epr_calculated', 'EPR Calculated'), ('alert_raised', 'Alert Raised'), ('score_threshold', 'Score Threshold'), ('schedule', 'Schedule'), ('manual', 'Manual'), ('custom', 'Custom')], max_length=30)),
+                ('conditions', models.JSONField(blank=True, default=list, help_text='List of {field, operator, value} conditions')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_workflow_triggers', to=settings.AUTH_USER_MODEL)),
+                ('workflow_template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='triggers', to='workflow_system.workflowtemplate')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='workflowexecution',
+            name='trigger',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='executions', to='workflow_system.workflowtrigger'),
+        ),
+        migrations.CreateModel(
+            name='WorkflowVariable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('value', models.JSONField(blank=True, default=dict)),
+                ('description', models.TextField(blank=True)),
+                ('workflow_template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variables', to='workflow_system.workflowtemplate')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='workflowtrigger',
+            index=models.Index(fields=['event_type', 'is_active'], name='workflow_sy_event_t_5c7a02_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workflowexecution',
+            index=models.Index(fields=['status', 'resume_at'], name='workflow_sy_status_d1bb5d_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='workflowvariable',
+            unique_together={('workflow_template', 'name')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow_system', '0002_workflow_execution_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowexecution',
+            name='delayed_steps',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -7,6 +7,8 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 import json
 import uuid
 
+from .plans import step_dependencies
+
 class WorkflowTemplate(models.Model):
     """Template for creating workflows"""
     CATEGORY_CHOICES = [
@@ -71,6 +73,186 @@ class WorkflowTemplate(models.Model):
                 if 'name' not in step:
                     return False, f"Step {i+1} missing name"
             
+            try:
+                step_dependencies(steps)
+            except ValueError as e:
+                return False, str(e)
+            
             return True, "Valid"
         except Exception as e:
-            return False, f"Configuration error: {str(e)}"
\ No newline at end of file
+            return False, f"Configuration error: {str(e)}"
+
+
+class WorkflowTrigger(models.Model):
+    """Event that starts a workflow when its conditions match the event context"""
+    EVENT_TYPE_CHOICES = [
+        ('assessment_completed', 'Assessment Completed'),
+        ('assessment_scheduled', 'Assessment Scheduled'),
+        ('student_registered', 'Student Registered'),
+        ('epr_calculated', 'EPR Calculated'),
+        ('alert_raised', 'Alert Raised'),
+        ('score_threshold', 'Score Threshold'),
+        ('schedule', 'Schedule'),
+        ('manual', 'Manual'),
+        ('custom', 'Custom'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=200)
+    workflow_template = models.ForeignKey(WorkflowTemplate, on_delete=models.CASCADE, related_name='triggers')
+    event_type = models.CharField(max_length=30, choices=EVENT_TYPE_CHOICES)
+    conditions = models.JSONField(default=list, blank=True, help_text="List of {field, operator, value} conditions")
+    is_active = models.BooleanField(default=True)
+    
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_workflow_triggers')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['event_type', 'is_active'])]
+    
+    def __str__(self):
+        return f"{self.name} ({self.event_type})"
+    
+    def evaluate_conditions(self, context):
+        """Check whether the event context satisfies every condition"""
+        from .conditions import evaluate_conditions
+        return evaluate_conditions(self.conditions, context)
+
+
+class WorkflowVariable(models.Model):
+    """Named value available to every execution of a workflow"""
+    workflow_template = models.ForeignKey(WorkflowTemplate, on_delete=models.CASCADE, related_name='variables')
+    name = models.CharField(max_length=100)
+    value = models.JSONField(default=dict, blank=True)
+    description = models.TextField(blank=True)
+    
+    class Meta:
+        unique_together = ['workflow_template', 'name']
+    
+    def __str__(self):
+        return f"{self.workflow_template.name}: {self.name}"
+
+
+class WorkflowExecution(models.Model):
+    """One run of a workflow template; its cursor persists so it can park and resume"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('waiting', 'Waiting'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    WAITING_CHOICES = [
+        ('', 'Not Waiting'),
+        ('delay', 'Step Delay'),
+        ('approval', 'Approval'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    workflow_template = models.ForeignKey(WorkflowTemplate, on_delete=models.CASCADE, related_name='executions')
+    trigger = models.ForeignKey(WorkflowTrigger, on_delete=models.SET_NULL, null=True, blank=True, related_name='executions')
+    started_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='started_workflow_executions')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    
+    input_context = models.JSONField(default=dict, blank=True)
+    output_context = models.JSONField(default=dict, blank=True)
+    error_message = models.TextField(blank=True)
+    
+    # Cursor: the next step to run and the context the steps so far produced
+    current_step = models.IntegerField(default=0)
+    context = models.JSONField(default=dict, blank=True)
+    completed_steps = models.JSONField(default=list, blank=True)
+    waiting_for = models.CharField(max_length=10, choices=WAITING_CHOICES, blank=True, default='')
+    # Parallel workflows: when each ready delayed step may run, by step index
+    delayed_steps = models.JSONField(default=dict, blank=True)
+    # When the scheduler should pick the execution up: a delay's end, an approval
+    # timeout, or the lease deadline of a running execution
+    resume_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'resume_at'])]
+    
+    def __str__(self):
+        return f"{self.workflow_template.name} - {self.status}"
+    
+    def get_duration(self):
+        """Time from start to completion (or now while still in flight)"""
+        if not self.started_at:
+            return None
+        return (self.completed_at or timezone.now()) - self.started_at
+    
+    def is_finished(self):
+        return self.status in ('completed', 'failed', 'cancelled')
+
+
+class WorkflowStepExecution(models.Model):
+    """Record of one step of a workflow execution"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('waiting', 'Waiting'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    workflow_execution = models.ForeignKey(WorkflowExecution, on_delete=models.CASCADE, related_name='step_executions')
+    step_index = models.IntegerField(default=0)
+    step_name = models.CharField(max_length=200, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    input_data = models.JSONField(default=dict, blank=True)
+    output_data = models.JSONField(default=dict, blank=True)
+    error_message = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['workflow_execution', 'step_index', 'started_at']
+    
+    def __str__(self):
+        return f"{self.workflow_execution} - step {self.step_index + 1} ({self.status})"
+
+
+class WorkflowAuditLog(models.Model):
+    """Audit trail of workflow changes and executions"""
+    ACTION_TYPE_CHOICES = [
+        ('workflow_created', 'Workflow Created'),
+        ('workflow_updated', 'Workflow Updated'),
+        ('workflow_deleted', 'Workflow Deleted'),
+        ('trigger_created', 'Trigger Created'),
+        ('trigger_updated', 'Trigger Updated'),
+        ('execution_started', 'Execution Started'),
+        ('execution_waiting', 'Execution Waiting'),
+        ('execution_resumed', 'Execution Resumed'),
+        ('execution_completed', 'Execution Completed'),
+        ('execution_failed', 'Execution Failed'),
+        ('execution_cancelled', 'Execution Cancelled'),
+        ('approval_granted', 'Approval Granted'),
+        ('approval_rejected', 'Approval Rejected'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    action_type = models.CharField(max_length=30, choices=ACTION_TYPE_CHOICES)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='workflow_audit_logs')
+    workflow_template = models.ForeignKey(WorkflowTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs')
+    workflow_execution = models.ForeignKey(WorkflowExecution, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs')
+    description = models.TextField(blank=True)
+    metadata = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.action_type} at {self.created_at}"
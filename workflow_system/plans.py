@@ -0,0 +1,142 @@
+"""
+Execution plans compiled from workflow templates
+A template's step list is compiled once per template version (updated_at) into
+a plan: step handlers are bound, {{variable}} references become accessors with
+their dotted paths split, and branch conditions become predicate closures. The
+engine runs plans, so a step costs no parsing or operator dispatch.
+
+Steps may declare depends_on (names or indices of earlier steps); a step without
+it depends on the step before it, so plain step lists still run in order. Plans
+with declared dependencies run as a DAG, independent steps concurrently.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from .conditions import compile_conditions, compile_getter
+
+Resolver = Callable[[Dict[str, Any]], Any]
+
+
+def _is_reference(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith('{{') and value.endswith('}}')
+
+
+def _constant(value: Any) -> Resolver:
+    return lambda context: value
+
+
+def _compile_scalar(value: Any) -> Resolver:
+    return compile_getter(value[2:-2].strip()) if _is_reference(value) else _constant(value)
+
+
+def compile_value(value: Any) -> Resolver:
+    """Resolver for a configuration value: a {{path}} reference, a dict whose values may be references, or a constant"""
+    if isinstance(value, dict) and any(_is_reference(item) for item in value.values()):
+        resolvers = {key: _compile_scalar(item) for key, item in value.items()}
+        return lambda context: {key: resolve(context) for key, resolve in resolvers.items()}
+    return _compile_scalar(value)
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """One compiled step; handlers receive it in place of the raw step config"""
+    index: int
+    name: str
+    action_type: str
+    configuration: Dict[str, Any]
+    delay_seconds: float
+    handler: Callable
+    resolvers: Dict[str, Resolver]
+    condition: Callable[[Dict[str, Any]], bool]
+    dependencies: Tuple[int, ...] = ()
+    ancestors: Tuple[int, ...] = ()  # Every step this one transitively depends on, in index order
+
+    def resolve(self, key: str, context: Dict[str, Any], default: Any = '') -> Any:
+        """Configuration value with its variable references resolved against the context"""
+        resolver = self.resolvers.get(key)
+        return resolver(context) if resolver else default
+
+
+@dataclass(frozen=True)
+class WorkflowPlan:
+    template_id: Any
+    version: Any
+    steps: Tuple[PlanStep, ...]
+    parallel: bool = False  # Some step declares depends_on
+
+
+def _unknown_action(action_type):
+    def handler(step, context, execution):
+        return {
+            'success': False,
+            'error_message': f"Unknown action type: {action_type}"
+        }
+    return handler
+
+
+def step_dependencies(step_configs: List[Dict[str, Any]]) -> List[Tuple[int, ...]]:
+    """Indices each step depends on; raises ValueError for references that are not earlier steps"""
+    indices_by_name = {}
+    for index, step_config in enumerate(step_configs):
+        indices_by_name.setdefault(step_config.get('name'), index)
+
+    dependencies = []
+    for index, step_config in enumerate(step_configs):
+        if 'depends_on' not in step_config:
+            dependencies.append((index - 1,) if index else ())
+            continue
+
+        resolved = set()
+        for reference in step_config['depends_on'] or []:
+            dependency = reference if isinstance(reference, int) else indices_by_name.get(reference)
+            # Only earlier steps, so list order is a topological order and cycles cannot occur
+            if dependency is None or not 0 <= dependency < index:
+                raise ValueError(f"Step {index+1} depends on {reference!r}, which is not an earlier step")
+            resolved.add(dependency)
+        dependencies.append(tuple(sorted(resolved)))
+    return dependencies
+
+
+def compile_plan(template, processors: Dict[str, Callable]) -> WorkflowPlan:
+    step_configs = template.workflow_config.get('steps', [])
+    dependencies = step_dependencies(step_configs)
+    ancestors: List[set] = []
+    steps = []
+    for index, step_config in enumerate(step_configs):
+        action_type = step_config.get('action_type')
+        configuration = step_config.get('configuration', {})
+        ancestors.append(set(dependencies[index]).union(*(ancestors[dependency] for dependency in dependencies[index])))
+        steps.append(PlanStep(
+            index=index,
+            name=step_config.get('name', ''),
+            action_type=action_type,
+            configuration=configuration,
+            delay_seconds=step_config.get('delay_seconds', 0),
+            handler=processors.get(action_type) or _unknown_action(action_type),
+            resolvers={key: compile_value(value) for key, value in configuration.items()},
+            condition=compile_conditions(configuration.get('conditions', [])),
+            dependencies=dependencies[index],
+            ancestors=tuple(sorted(ancestors[index])),
+        ))
+    parallel = any('depends_on' in step_config for step_config in step_configs)
+    return WorkflowPlan(template.pk, template.updated_at, tuple(steps), parallel)
+
+
+class PlanCache:
+    """Compiled plans by template, recompiled when the template's version changes"""
+
+    def __init__(self, processors: Dict[str, Callable]):
+        self.processors = processors
+        self._plans: Dict[Any, WorkflowPlan] = {}
+
+    def get(self, template) -> WorkflowPlan:
+        plan = self._plans.get(template.pk)
+        if plan is None or plan.version != template.updated_at:
+            # Compiling is idempotent, so concurrent misses just compile twice
+            plan = compile_plan(template, self.processors)
+            self._plans[template.pk] = plan
+        return plan
+
+    def clear(self):
+        self._plans.clear()
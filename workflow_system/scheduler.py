@@ -0,0 +1,180 @@
+"""
+Scheduler for parked and queued workflow executions
+Executions persist their cursor and a resume_at time, so a delay or an approval
+costs a database row rather than a thread. The (status, resume_at) index is the
+priority queue: one worker claims whatever is due, earliest first, and sleeps
+until the next resume_at (or the poll interval, which picks up executions parked
+by other processes). Running executions hold a lease in resume_at, so work
+interrupted by a crashed worker is resumed from its last persisted step.
+
+Unless WORKFLOW_SCHEDULER_IN_PROCESS is off, every serving process (a WSGI/ASGI
+server or runserver) starts the scheduler in a daemon thread when it boots, so
+executions parked by any process are resumed without waiting for new work.
+Deployments that run the run_workflow_scheduler command as a service turn it
+off. Claims are atomic, so any number of schedulers can share the queue.
+"""
+
+import logging
+import os
+import sys
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import WorkflowExecution
+
+logger = logging.getLogger(__name__)
+
+# Statuses the scheduler picks up once resume_at has passed; for 'running' that means the lease expired
+RESUMABLE_STATUSES = ('pending', 'waiting', 'running')
+
+# Longest wait between polls while the database keeps failing
+MAX_ERROR_BACKOFF_SECONDS = 300
+
+# Programs that load Django without serving requests
+NON_SERVING_PROGRAMS = ('pytest', 'py.test', 'celery')
+
+
+class WorkflowScheduler:
+    """Resumes due workflow executions from a single thread"""
+
+    def __init__(self, engine=None, poll_interval: Optional[float] = None, batch_size: Optional[int] = None):
+        if engine is None:
+            from .engine import get_workflow_engine
+            engine = get_workflow_engine()
+        self.engine = engine
+        self.poll_interval = poll_interval if poll_interval is not None else settings.WORKFLOW_SCHEDULER_POLL_INTERVAL
+        self.batch_size = batch_size or settings.WORKFLOW_SCHEDULER_BATCH_SIZE
+        self._wake = threading.Event()
+        self.running = False
+
+    def due_executions(self, now=None):
+        now = now or timezone.now()
+        return WorkflowExecution.objects.filter(
+            status__in=RESUMABLE_STATUSES, resume_at__lte=now
+        ).select_related('workflow_template', 'started_by').order_by('resume_at')[:self.batch_size]
+
+    def next_due_at(self):
+        return WorkflowExecution.objects.filter(
+            status__in=RESUMABLE_STATUSES, resume_at__isnull=False
+        ).aggregate(next_due=Min('resume_at'))['next_due']
+
+    def run_due(self) -> int:
+        """Resume one batch of due executions; returns how many this worker ran"""
+        resumed = 0
+        for execution in self.due_executions():
+            try:
+                if self.engine.resume(execution):
+                    resumed += 1
+            except Exception as e:
+                logger.error(f"Resuming workflow execution {execution.pk} failed: {e}")
+        return resumed
+
+    def wake(self):
+        """Re-check for due executions now, e.g. after one was queued in this process"""
+        self._wake.set()
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None):
+        stop_event = stop_event or threading.Event()
+        self.running = True
+        try:
+            self._run_until(stop_event)
+        finally:
+            self.running = False
+
+    def _run_until(self, stop_event: threading.Event):
+        failures = 0
+        while not stop_event.is_set():
+            # Like a request, each poll starts on a connection that is neither broken nor past CONN_MAX_AGE
+            close_old_connections()
+            try:
+                resumed = self.run_due()
+                next_due = self.next_due_at() if resumed < self.batch_size else None
+            except DatabaseError as e:
+                failures += 1
+                backoff = min(max(self.poll_interval, 1) * 2 ** (failures - 1), MAX_ERROR_BACKOFF_SECONDS)
+                logger.error(f"Workflow scheduler could not poll the database: {e}; retrying in {backoff}s")
+                stop_event.wait(backoff)
+                continue
+            failures = 0
+
+            if resumed >= self.batch_size:
+                # More may already be due
+                continue
+
+            timeout = self.poll_interval
+            if next_due is not None:
+                wait = (next_due - timezone.now()).total_seconds()
+                # Overdue executions nothing could resume (claimed elsewhere or failing) wait for the next poll
+                if wait > 0 or resumed:
+                    timeout = min(timeout, max(0.0, wait))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_scheduler_thread = None
+
+
+def get_workflow_scheduler() -> WorkflowScheduler:
+    """Process-wide workflow scheduler, created on first use"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = WorkflowScheduler()
+    return _scheduler
+
+
+def start_in_process_scheduler() -> threading.Thread:
+    """Run the process-wide scheduler in a daemon thread, once per process"""
+    global _scheduler_thread
+    scheduler = get_workflow_scheduler()
+    with _scheduler_lock:
+        if _scheduler_thread is None or not _scheduler_thread.is_alive():
+            _scheduler_thread = threading.Thread(
+                target=_run_in_process, args=(scheduler,), name='workflow-scheduler', daemon=True
+            )
+            _scheduler_thread.start()
+    return _scheduler_thread
+
+
+def _run_in_process(scheduler: WorkflowScheduler):
+    try:
+        scheduler.run_forever()
+    except Exception as e:
+        logger.error(f"In-process workflow scheduler stopped: {e}")
+    finally:
+        close_old_connections()
+
+
+def serving_process(argv=None) -> bool:
+    """Whether this process serves requests: a WSGI/ASGI server, or runserver's serving process"""
+    argv = sys.argv if argv is None else argv
+    program = os.path.basename(argv[0]) if argv else ''
+    if program in ('manage.py', 'django-admin', '__main__.py'):
+        # Other commands (migrate, test, shell, run_workflow_scheduler itself) never start it;
+        # runserver's autoreloader parent only watches files
+        return argv[1:2] == ['runserver'] and (os.environ.get('RUN_MAIN') == 'true' or '--noreload' in argv)
+    return program not in NON_SERVING_PROGRAMS
+
+
+def start_scheduler_on_startup() -> Optional[threading.Thread]:
+    """Start the in-process scheduler when a serving process boots; called from AppConfig.ready"""
+    if settings.WORKFLOW_SCHEDULER_IN_PROCESS and serving_process():
+        return start_in_process_scheduler()
+    return None
+
+
+def notify_scheduler():
+    """Wake this process's scheduler so newly due executions start without waiting a poll,
+    restarting it when the scheduler runs in-process (e.g. in a worker forked after startup)"""
+    if _scheduler is not None and _scheduler.running:
+        _scheduler.wake()
+    elif settings.WORKFLOW_SCHEDULER_IN_PROCESS:
+        start_in_process_scheduler()
@@ -0,0 +1,15 @@
+"""
+Keep the in-memory trigger index in step with trigger and template changes
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import WorkflowTemplate, WorkflowTrigger
+from .trigger_index import invalidate_trigger_index
+
+
+@receiver([post_save, post_delete], sender=WorkflowTrigger)
+@receiver([post_save, post_delete], sender=WorkflowTemplate)
+def clear_trigger_index(sender, **kwargs):
+    invalidate_trigger_index()
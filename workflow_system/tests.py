@@ -1,3 +1,487 @@
-from django.test import TestCase
+import os
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .engine import TriggerManager, WorkflowEngine
+from .execution_log import ExecutionLog
+from .models import WorkflowExecution, WorkflowStepExecution, WorkflowTemplate, WorkflowTrigger
+from .plans import PlanCache
+from .scheduler import WorkflowScheduler, serving_process
+from .trigger_index import TriggerIndex, invalidate_trigger_index
+
+User = get_user_model()
+
+
+def record_step(step, context, execution):
+    """Step handler that reports which earlier step outputs it saw"""
+    return {'success': True, 'output_data': {step.name: sorted(key for key in context if key.startswith('s'))}}
+
+
+def probe_step(step, context, execution):
+    """Step handler that reports what has been persisted for the execution so far"""
+    return {'success': True, 'output_data': {
+        'persisted_steps': list(WorkflowStepExecution.objects.filter(
+            workflow_execution=execution
+        ).order_by('step_index').values_list('step_index', flat=True)),
+        'persisted_cursor': WorkflowExecution.objects.get(pk=execution.pk).current_step,
+    }}
+
+
+def failing_step(step, context, execution):
+    raise RuntimeError('boom')
+
+
+SLEEP_SECONDS = 0.5
+
+
+def sleep_step(step, context, execution):
+    """Step handler that only waits, standing in for a slow call outside the database"""
+    time.sleep(SLEEP_SECONDS)
+    return {'success': True, 'output_data': {step.name: True}}
+
+
+@override_settings(WORKFLOW_SCHEDULER_IN_PROCESS=False)
+class WorkflowTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='x', role='admin', is_staff=True)
+
+    def setUp(self):
+        invalidate_trigger_index()
+        self.engine = WorkflowEngine()
+        self.engine.step_processors.update(record=record_step, probe=probe_step, fail=failing_step, sleep=sleep_step)
+        self.engine.plans = PlanCache(self.engine.step_processors)
+        self.scheduler = WorkflowScheduler(self.engine, poll_interval=0)
+
+    def create_template(self, *steps, name='Workflow'):
+        return WorkflowTemplate.objects.create(
+            name=name, created_by=self.user, status='active', workflow_config={'steps': list(steps)}
+        )
+
+    def make_due(self, execution):
+        WorkflowExecution.objects.filter(pk=execution.pk).update(resume_at=timezone.now() - timedelta(seconds=1))
+        execution.refresh_from_db()
+
+
+class ParkAndResumeTests(WorkflowTestCase):
+
+    def test_delay_parks_the_execution_until_it_is_due(self):
+        template = self.create_template(
+            {'name': 's0', 'action_type': 'record'},
+            {'name': 's1', 'action_type': 'record', 'delay_seconds': 60},
+        )
+        execution = self.engine.execute_workflow(template, {'x': 1}, started_by=self.user)
+        execution.refresh_from_db()
+        self.assertEqual((execution.status, execution.waiting_for, execution.current_step), ('waiting', 'delay', 1))
+        self.assertEqual(self.scheduler.run_due(), 0)
+
+        self.make_due(execution)
+        self.assertEqual(self.scheduler.run_due(), 1)
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'completed')
+        self.assertEqual(execution.completed_steps, [0, 1])
+        self.assertEqual(execution.output_context['s1'], ['s0'])
+
+    def test_approval_resumes_on_the_scheduler(self):
+        template = self.create_template(
+            {'name': 's0', 'action_type': 'record'},
+            {'name': 'approve', 'action_type': 'wait_for_approval'},
+            {'name': 's2', 'action_type': 'record'},
+        )
+        execution = self.engine.execute_workflow(template, started_by=self.user)
+        self.assertEqual((execution.status, execution.waiting_for), ('waiting', 'approval'))
+        self.assertIsNone(execution.resume_at)
+
+        self.assertTrue(self.engine.decide_approval(execution, True, self.user, 'ok'))
+        self.assertFalse(self.engine.decide_approval(execution, True, self.user, 'again'))
+        self.assertEqual(execution.status, 'pending')
+        self.assertEqual(self.scheduler.run_due(), 1)
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'completed')
+        self.assertTrue(execution.output_context['approval_granted'])
+
+    def test_approval_timeout_rejects(self):
+        template = self.create_template(
+            {'name': 'approve', 'action_type': 'wait_for_approval', 'configuration': {'timeout_seconds': 3600}},
+            {'name': 's1', 'action_type': 'record'},
+        )
+        execution = self.engine.execute_workflow(template, started_by=self.user)
+        self.make_due(execution)
+        self.scheduler.run_due()
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'failed')
+        self.assertEqual(execution.error_message, 'Step 1 failed: Approval timed out')
+        self.assertEqual(execution.step_executions.get(step_index=0).error_message, 'Approval timed out')
+
+    def test_expired_lease_is_resumed_from_the_cursor(self):
+        template = self.create_template(
+            {'name': 's0', 'action_type': 'record'},
+            {'name': 's1', 'action_type': 'record'},
+        )
+        execution = WorkflowExecution.objects.create(
+            workflow_template=template, status='running', current_step=1, completed_steps=[0],
+            context={'s0': []}, resume_at=timezone.now() + timedelta(minutes=5)
+        )
+        self.assertEqual(self.scheduler.run_due(), 0)
+
+        self.make_due(execution)
+        self.assertEqual(self.scheduler.run_due(), 1)
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'completed')
+        self.assertEqual(list(execution.step_executions.values_list('step_index', flat=True)), [1])
+
+    def test_only_one_worker_claims_an_execution(self):
+        template = self.create_template({'name': 's0', 'action_type': 'record'})
+        execution = self.engine.execute_workflow(template, defer=True)
+        stale = WorkflowExecution.objects.get(pk=execution.pk)
+        self.assertTrue(self.engine.resume(execution))
+        self.assertFalse(self.engine.resume(stale))
+        self.assertEqual(execution.step_executions.count(), 1)
+
+    def test_triggers_queue_their_workflow(self):
+        template = self.create_template({'name': 's0', 'action_type': 'record'})
+        WorkflowTrigger.objects.create(
+            name='High score', workflow_template=template, event_type='custom',
+            conditions=[{'field': 'score', 'operator': 'greater_than', 'value': 80}]
+        )
+        self.assertEqual(TriggerManager().evaluate_triggers('custom', {'score': 10}), [])
+        execution, = TriggerManager().evaluate_triggers('custom', {'score': 90})
+        self.assertEqual(execution.status, 'pending')
+        self.assertEqual(execution.step_executions.count(), 0)
+
+    def test_queueing_starts_the_in_process_scheduler(self):
+        template = self.create_template({'name': 's0', 'action_type': 'record'})
+        with mock.patch('workflow_system.scheduler.start_in_process_scheduler') as start:
+            self.engine.execute_workflow(template, defer=True)
+            start.assert_not_called()
+            with self.settings(WORKFLOW_SCHEDULER_IN_PROCESS=True):
+                self.engine.execute_workflow(template, defer=True)
+            start.assert_called_once_with()
+
+
+class SchedulerThreadTests(SimpleTestCase):
+
+    def test_database_errors_back_off_until_a_poll_succeeds(self):
+        scheduler = WorkflowScheduler(mock.Mock(), poll_interval=2, batch_size=10)
+        stop = mock.Mock(spec=threading.Event)
+        stop.is_set.side_effect = [False, False, False, True]
+        with mock.patch.object(scheduler, 'run_due', side_effect=[OperationalError('gone'), OperationalError('gone'), 0]), \
+                mock.patch.object(scheduler, 'next_due_at', return_value=None), \
+                mock.patch.object(scheduler._wake, 'wait') as wake_wait, \
+                mock.patch('workflow_system.scheduler.close_old_connections') as close_old_connections, \
+                self.assertLogs('workflow_system.scheduler', 'ERROR'):
+            scheduler._run_until(stop)
+
+        self.assertEqual(stop.wait.call_args_list, [mock.call(2), mock.call(4)])
+        self.assertEqual(close_old_connections.call_count, 3)
+        wake_wait.assert_called_once_with(2)
+
+    def test_serving_processes(self):
+        cases = [
+            (['/venv/bin/gunicorn', 'edusight_django.wsgi'], {}, True),
+            (['manage.py', 'runserver'], {'RUN_MAIN': 'true'}, True),
+            (['manage.py', 'runserver', '--noreload'], {}, True),
+            (['manage.py', 'runserver'], {}, False),  # The autoreloader's parent
+            (['manage.py', 'migrate'], {}, False),
+            (['manage.py', 'run_workflow_scheduler'], {'RUN_MAIN': 'true'}, False),
+            (['/venv/bin/pytest'], {}, False),
+        ]
+        for argv, environ, serving in cases:
+            with self.subTest(argv=argv, environ=environ), mock.patch.dict(os.environ):
+                os.environ.pop('RUN_MAIN', None)
+                os.environ.update(environ)
+                self.assertIs(serving_process(argv), serving)
+
+    def test_serving_processes_start_the_scheduler_when_they_boot(self):
+        config = apps.get_app_config('workflow_system')
+        with mock.patch('workflow_system.scheduler.start_in_process_scheduler') as start:
+            with mock.patch('workflow_system.scheduler.serving_process', return_value=True):
+                with self.settings(WORKFLOW_SCHEDULER_IN_PROCESS=False):
+                    config.ready()
+                start.assert_not_called()
+                with self.settings(WORKFLOW_SCHEDULER_IN_PROCESS=True):
+                    config.ready()
+                start.assert_called_once_with()
+
+            # Running the tests is not a serving process
+            with self.settings(WORKFLOW_SCHEDULER_IN_PROCESS=True):
+                config.ready()
+            start.assert_called_once_with()
+
+
+class ApprovalViewTests(WorkflowTestCase):
+
+    def setUp(self):
+        super().setUp()
+        template = self.create_template({'name': 'approve', 'action_type': 'wait_for_approval'})
+        self.execution = self.engine.execute_workflow(template, started_by=self.user)
+        self.url = reverse('workflow_system:decide_approval', args=[self.execution.id])
+        self.client.force_login(self.user)
+
+    def test_reject(self):
+        response = self.client.post(self.url, {'decision': 'reject', 'comments': 'No'})
+        self.assertEqual(response.json(), {'success': True, 'execution_id': str(self.execution.id), 'status': 'failed'})
+        self.execution.refresh_from_db()
+        self.assertEqual(self.execution.error_message, 'No')
+
+    def test_approve_queues_the_execution(self):
+        response = self.client.post(self.url, {'decision': 'approve'})
+        self.assertEqual(response.json()['status'], 'pending')
+        self.assertEqual(self.client.post(self.url, {'decision': 'approve'}).status_code, 409)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.post(self.url, {'decision': 'maybe'}).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'decision': 'approve', 'step_index': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+        staff_only = User.objects.create_user(username='parent', password='x', role='parent')
+        self.client.force_login(staff_only)
+        self.assertEqual(self.client.post(self.url, {'decision': 'approve'}).status_code, 302)
+
+
+class ExecutionLogTests(WorkflowTestCase):
+    email = {'to_email': 'parent@example.com', 'subject': 'Report', 'message': 'Ready'}
+
+    def run_counting_checkpoints(self, template):
+        with mock.patch.object(ExecutionLog, 'checkpoint', autospec=True, side_effect=ExecutionLog.checkpoint) as checkpoint:
+            execution = self.engine.execute_workflow(template, started_by=self.user)
+        return execution, checkpoint.call_count
+
+    @override_settings(WORKFLOW_LOG_FLUSH_STEPS=5)
+    def test_pure_steps_are_checkpointed_in_batches(self):
+        template = self.create_template(*({'name': f's{i}', 'action_type': 'record'} for i in range(12)))
+        execution, checkpoints = self.run_counting_checkpoints(template)
+        self.assertEqual(execution.status, 'completed')
+        self.assertEqual(checkpoints, 2)
+        self.assertEqual(execution.step_executions.count(), 12)
+
+    def test_side_effects_are_marked_done_at_once(self):
+        template = self.create_template(
+            {'name': 'mail', 'action_type': 'send_email', 'configuration': self.email},
+            {'name': 'probe', 'action_type': 'probe'},
+        )
+        execution, checkpoints = self.run_counting_checkpoints(template)
+        self.assertEqual(execution.status, 'completed', execution.error_message)
+        self.assertEqual(checkpoints, 0)
+        # The step's record, without moving the cursor
+        self.assertEqual(execution.output_context['persisted_steps'], [0])
+        self.assertEqual(execution.output_context['persisted_cursor'], 0)
+        self.assertEqual(execution.step_executions.count(), 2)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_pure_steps_are_not_checkpointed_at_once(self):
+        template = self.create_template(
+            {'name': 's0', 'action_type': 'record'},
+            {'name': 'probe', 'action_type': 'probe'},
+        )
+        execution, _ = self.run_counting_checkpoints(template)
+        self.assertEqual(execution.output_context['persisted_steps'], [])
+
+    def test_parallel_side_effects_are_marked_done_at_once(self):
+        # Pooled steps run on other threads, so count the marks rather than probe the database
+        for action_type, expected in (('record', 0), ('send_email', 1)):
+            with self.subTest(action_type=action_type):
+                template = self.create_template(
+                    {'name': 'first', 'action_type': action_type, 'configuration': self.email},
+                    {'name': 'second', 'action_type': 'record', 'depends_on': ['first']},
+                )
+                with mock.patch.object(ExecutionLog, 'mark_done', autospec=True, side_effect=ExecutionLog.mark_done) as mark_done:
+                    execution, checkpoints = self.run_counting_checkpoints(template)
+                self.assertEqual(execution.status, 'completed', execution.error_message)
+                self.assertEqual((mark_done.call_count, checkpoints), (expected, 0))
+                self.assertEqual(execution.step_executions.count(), 2)
+
+    def test_steps_marked_done_are_not_repeated_after_a_crash(self):
+        for depends_on in ({}, {'depends_on': ['mail']}):
+            with self.subTest(parallel=bool(depends_on)):
+                template = self.create_template(
+                    {'name': 'mail', 'action_type': 'send_email', 'configuration': self.email},
+                    {'name': 's1', 'action_type': 'record', **depends_on},
+                )
+                # The worker died after marking the email step done, before any checkpoint
+                execution = WorkflowExecution.objects.create(
+                    workflow_template=template, status='running', resume_at=timezone.now() - timedelta(seconds=1)
+                )
+                execution.step_executions.create(
+                    step_index=0, step_name='mail', status='completed', input_data={}, output_data={'sent_to': 'x'}
+                )
+                self.assertEqual(self.scheduler.run_due(), 1)
+                execution.refresh_from_db()
+                self.assertEqual(execution.status, 'completed', execution.error_message)
+                self.assertEqual(len(mail.outbox), 0)
+                self.assertEqual(sorted(execution.completed_steps), [0, 1])
+                self.assertEqual(execution.output_context['sent_to'], 'x')
+                self.assertEqual(list(execution.step_executions.order_by('step_index').values_list('step_index', flat=True)), [0, 1])
+
+    def test_failures_are_worded_alike_in_both_runners(self):
+        for depends_on in ({}, {'depends_on': ['s0']}):
+            with self.subTest(parallel=bool(depends_on)):
+                template = self.create_template(
+                    {'name': 's0', 'action_type': 'record'},
+                    {'name': 'boom', 'action_type': 'fail', **depends_on},
+                )
+                execution = self.engine.execute_workflow(template)
+                self.assertEqual(execution.status, 'failed')
+                self.assertEqual(execution.error_message, 'Step 2 execution failed: boom')
+                self.assertEqual(execution.step_executions.get(step_index=1).error_message, 'boom')
+
+
+class TriggerIndexTests(WorkflowTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.template = self.create_template({'name': 's0', 'action_type': 'record'})
+        self.index = TriggerIndex(check_interval=3600)
+
+    def create_trigger(self, name, **fields):
+        return WorkflowTrigger.objects.create(name=name, workflow_template=self.template, event_type='custom', **fields)
+
+    def test_matches_compiled_conditions(self):
+        self.create_trigger('high', conditions=[{'field': 'student.score', 'operator': 'greater_than', 'value': 80}])
+        self.create_trigger('inactive', is_active=False)
+        self.assertEqual([t.name for t in self.index.triggers_for('custom', {'student': {'score': 90}})], ['high'])
+        self.assertEqual(self.index.triggers_for('custom', {'student': {'score': 10}}), [])
+        with self.assertNumQueries(0):
+            self.index.triggers_for('custom', {'student': {'score': 90}})
+
+    def test_saves_in_this_process_invalidate_the_index(self):
+        with mock.patch('workflow_system.trigger_index._index', self.index):
+            self.assertEqual(self.index.triggers_for('custom', {}), [])
+            trigger = self.create_trigger('any')
+            self.assertEqual(self.index.triggers_for('custom', {}), [trigger])
+            trigger.delete()
+            self.assertEqual(self.index.triggers_for('custom', {}), [])
+
+    def test_changes_from_other_processes_show_after_the_check_interval(self):
+        self.assertEqual(self.index.triggers_for('custom', {}), [])
+        # bulk_create sends no signals, like a save in another process
+        WorkflowTrigger.objects.bulk_create([WorkflowTrigger(name='other', workflow_template=self.template, event_type='custom')])
+        self.assertEqual(self.index.triggers_for('custom', {}), [])
+        self.index._checked_at -= self.index.check_interval
+        self.assertEqual([t.name for t in self.index.triggers_for('custom', {})], ['other'])
+
+
+class PlanCacheTests(WorkflowTestCase):
+
+    def test_plans_are_recompiled_when_the_template_changes(self):
+        template = self.create_template({'name': 's0', 'action_type': 'record'})
+        plan = self.engine.plans.get(template)
+        self.assertIs(self.engine.plans.get(template), plan)
+
+        template.workflow_config['steps'].append({'name': 'bad', 'action_type': 'nope'})
+        template.save()
+        updated = self.engine.plans.get(template)
+        self.assertIsNot(updated, plan)
+        self.assertEqual(len(updated.steps), 2)
+
+        execution = self.engine.execute_workflow(template)
+        self.assertEqual(execution.error_message, 'Step 2 failed: Unknown action type: nope')
+
+    def test_values_are_resolved_from_the_context(self):
+        template = self.create_template({'name': 'update', 'action_type': 'update_record', 'configuration': {
+            'model_name': 'workflow_system.WorkflowTemplate',
+            'record_id': '{{template.id}}',
+            'update_fields': {'description': '{{ note }}'},
+        }})
+        execution = self.engine.execute_workflow(template, {'template': {'id': str(template.pk)}, 'note': 'Reviewed'})
+        self.assertEqual(execution.status, 'completed', execution.error_message)
+        template.refresh_from_db()
+        self.assertEqual(template.description, 'Reviewed')
+
+
+class ParallelStepTests(WorkflowTestCase):
+
+    def test_fan_out_and_fan_in(self):
+        template = self.create_template(
+            {'name': 's0', 'action_type': 'record'},
+            {'name': 'sa', 'action_type': 'record', 'depends_on': ['s0']},
+            {'name': 'sb', 'action_type': 'record', 'depends_on': ['s0']},
+            {'name': 'sc', 'action_type': 'record', 'depends_on': ['s0']},
+            {'name': 'sj', 'action_type': 'record', 'depends_on': ['sa', 'sb', 'sc']},
+        )
+        execution = self.engine.execute_workflow(template, {'in': 1})
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'completed', execution.error_message)
+        self.assertEqual(sorted(execution.completed_steps), [0, 1, 2, 3, 4])
+        self.assertEqual(execution.output_context['sa'], ['s0'])
+        self.assertEqual(execution.output_context['sj'], ['s0', 'sa', 'sb', 'sc'])
+
+    def test_invalid_dependencies_fail_validation(self):
+        template = WorkflowTemplate(name='Bad', created_by=self.user, workflow_config={'steps': [
+            {'name': 'a', 'action_type': 'record', 'depends_on': ['missing']}
+        ]})
+        valid, error = template.is_valid_workflow()
+        self.assertFalse(valid)
+        self.assertIn("depends on 'missing'", error)
+
+    def test_delay_and_approval_only_hold_back_their_dependents(self):
+        template = self.create_template(
+            {'name': 's0', 'action_type': 'record'},
+            {'name': 'approve', 'action_type': 'wait_for_approval', 'depends_on': ['s0']},
+            {'name': 'sd', 'action_type': 'record', 'depends_on': ['s0'], 'delay_seconds': 60},
+            {'name': 'sx', 'action_type': 'record', 'depends_on': ['s0']},
+            {'name': 'sj', 'action_type': 'record', 'depends_on': ['approve', 'sd']},
+        )
+        execution = self.engine.execute_workflow(template)
+        execution.refresh_from_db()
+        self.assertEqual((execution.status, execution.waiting_for), ('waiting', 'delay'))
+        self.assertEqual(sorted(execution.completed_steps), [0, 3])
+
+        execution.delayed_steps = {'2': (timezone.now() - timedelta(seconds=1)).isoformat()}
+        execution.save()
+        self.make_due(execution)
+        self.assertTrue(self.engine.resume(execution))
+        execution.refresh_from_db()
+        self.assertEqual((execution.status, execution.waiting_for), ('waiting', 'approval'))
+        self.assertEqual(sorted(execution.completed_steps), [0, 2, 3])
+
+        self.assertTrue(self.engine.decide_approval(execution, True, self.user))
+        self.assertEqual(self.scheduler.run_due(), 1)
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'completed', execution.error_message)
+        self.assertEqual(execution.output_context['sj'], ['s0', 'sd'])
+
+    def test_approval_timeout_fails_a_parallel_workflow(self):
+        template = self.create_template(
+            {'name': 's0', 'action_type': 'record'},
+            {'name': 'approve', 'action_type': 'wait_for_approval', 'depends_on': ['s0'],
+             'configuration': {'timeout_seconds': 3600}},
+            {'name': 'sj', 'action_type': 'record', 'depends_on': ['approve']},
+        )
+        execution = self.engine.execute_workflow(template)
+        execution.step_executions.filter(status='waiting').update(started_at=timezone.now() - timedelta(hours=2))
+        self.make_due(execution)
+        self.scheduler.run_due()
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'failed')
+        self.assertEqual(execution.error_message, 'Step 2 failed: Approval timed out')
+        self.assertEqual(execution.step_executions.get(step_index=1).error_message, 'Approval timed out')
+
+    def test_independent_branches_overlap(self):
+        template = self.create_template(
+            {'name': 's0', 'action_type': 'record'},
+            {'name': 'sa', 'action_type': 'sleep', 'depends_on': ['s0']},
+            {'name': 'sb', 'action_type': 'sleep', 'depends_on': ['s0']},
+            {'name': 'sj', 'action_type': 'record', 'depends_on': ['sa', 'sb']},
+        )
+        started = time.perf_counter()
+        execution = self.engine.execute_workflow(template)
+        elapsed = time.perf_counter() - started
+
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'completed', execution.error_message)
+        self.assertEqual(execution.output_context['sj'], ['s0', 'sa', 'sb'])
+        # About the longer branch, not the sum of both
+        self.assertGreaterEqual(elapsed, SLEEP_SECONDS)
+        self.assertLess(elapsed, 1.6 * SLEEP_SECONDS)
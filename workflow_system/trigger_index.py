@@ -0,0 +1,91 @@
+"""
+In-memory index of active workflow triggers
+Active triggers are loaded once per process, grouped by event type, with their
+conditions compiled into predicates, so dispatching an event is a dict lookup
+and a few function calls. Trigger and template saves or deletes in this process
+clear the index through signals; changes made by other processes are picked up
+through a version stamp checked at most every WORKFLOW_TRIGGER_INDEX_CHECK_INTERVAL.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .conditions import compile_conditions
+from .models import WorkflowTrigger
+
+CompiledTrigger = Tuple[WorkflowTrigger, Callable[[Dict[str, Any]], bool]]
+
+
+def trigger_version() -> Tuple:
+    """Changes whenever a trigger, or the template of one, is saved, added or deleted"""
+    stamp = WorkflowTrigger.objects.aggregate(
+        count=Count('id'), triggers=Max('updated_at'), templates=Max('workflow_template__updated_at')
+    )
+    return stamp['count'], stamp['triggers'], stamp['templates']
+
+
+class TriggerIndex:
+    """Active triggers by event type with compiled conditions"""
+
+    def __init__(self, check_interval: float = 5):
+        self.check_interval = check_interval
+        self._by_event: Optional[Dict[str, List[CompiledTrigger]]] = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def triggers_for(self, event_type: str, context: Dict[str, Any]) -> List[WorkflowTrigger]:
+        """Active triggers for the event whose conditions match the context"""
+        return [trigger for trigger, matches in self._current().get(event_type, ()) if matches(context)]
+
+    def invalidate(self):
+        with self._lock:
+            self._by_event = None
+
+    def _current(self) -> Dict[str, List[CompiledTrigger]]:
+        by_event = self._by_event
+        now = time.monotonic()
+        if by_event is not None and now - self._checked_at < self.check_interval:
+            return by_event
+
+        with self._lock:
+            if self._by_event is None or now - self._checked_at >= self.check_interval:
+                # Stamp first: a change landing during the load shows up at the next check
+                version = trigger_version()
+                if self._by_event is None or version != self._version:
+                    self._by_event = self._load()
+                    self._version = version
+                self._checked_at = now
+            return self._by_event
+
+    @staticmethod
+    def _load() -> Dict[str, List[CompiledTrigger]]:
+        by_event: Dict[str, List[CompiledTrigger]] = {}
+        triggers = WorkflowTrigger.objects.filter(is_active=True).select_related('workflow_template').order_by('created_at')
+        for trigger in triggers:
+            by_event.setdefault(trigger.event_type, []).append((trigger, compile_conditions(trigger.conditions)))
+        return by_event
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_trigger_index() -> TriggerIndex:
+    """Process-wide trigger index, created on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = TriggerIndex(check_interval=settings.WORKFLOW_TRIGGER_INDEX_CHECK_INTERVAL)
+    return _index
+
+
+def invalidate_trigger_index():
+    """Rebuild the index on its next use"""
+    if _index is not None:
+        _index.invalidate()
@@ -0,0 +1,12 @@
+"""
+URL configuration for the workflow system app
+"""
+
+from django.urls import path
+from . import views
+
+app_name = 'workflow_system'
+
+urlpatterns = [
+    path('executions/<uuid:execution_id>/approval/', views.decide_approval, name='decide_approval'),
+]
@@ -13,7 +13,7 @@ from .models import (
     WorkflowTemplate, WorkflowTrigger, WorkflowExecution, 
     WorkflowStepExecution, WorkflowAuditLog
 )
-from .engine import WorkflowEngine, TriggerManager
+from .engine import WorkflowEngine, TriggerManager, get_workflow_engine
 
 def is_admin_user(user):
     """Check if user is admin"""
@@ -52,4 +52,41 @@ def workflow_dashboard(request):
         'recent_logs': recent_logs,
     }
     
-    return render(request, 'workflow_system/dashboard.html', context)
\ No newline at end of file
+    return render(request, 'workflow_system/dashboard.html', context)
+
+@login_required
+@user_passes_test(is_admin_user)
+@require_http_methods(["POST"])
+def decide_approval(request, execution_id):
+    """Approve or reject a workflow execution waiting for approval"""
+    
+    execution = get_object_or_404(
+        WorkflowExecution.objects.select_related('workflow_template'), id=execution_id
+    )
+    
+    decision = request.POST.get('decision')
+    if decision not in ('approve', 'reject'):
+        return JsonResponse({'error': "decision must be 'approve' or 'reject'"}, status=400)
+    
+    step_index = request.POST.get('step_index')
+    if step_index is not None:
+        try:
+            step_index = int(step_index)
+        except ValueError:
+            return JsonResponse({'error': 'step_index must be an integer'}, status=400)
+    
+    decided = get_workflow_engine().decide_approval(
+        execution,
+        approved=decision == 'approve',
+        user=request.user,
+        comments=request.POST.get('comments', ''),
+        step_index=step_index
+    )
+    if not decided:
+        return JsonResponse({'error': 'Execution is not waiting for this approval'}, status=409)
+    
+    return JsonResponse({
+        'success': True,
+        'execution_id': str(execution.id),
+        'status': execution.status,
+    })